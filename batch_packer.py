@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+토큰 예산 기반 배치 구성
+- 문장 개수(10개) 대신, 예상 출력 토큰 합계가 예산을 넘지 않도록 배치를 채움
+- 짧은 UI 문구는 한 요청에 많이, 긴 스토리 문단은 혼자 → max_tokens 초과로 잘려서
+  #BATCH_SPLIT_ 개수가 안 맞는 경우를 줄임
+- 토크나이저 없이 쓰는 문자 종류별 휴리스틱 (오프라인, 빠름)
+- 키 순서는 그대로 유지 (출력/저널 순서 동일)
+"""
+
+import re
+
+PLACEHOLDER_RE = re.compile(r'\{\d+\}')
+MARKER_TOKENS = 8         # "#BATCH_SPLIT_<n>#\n" 한 개당 대략적인 토큰 수
+PLACEHOLDER_TOKENS = 3    # "{<n>}" 한 개당 대략적인 토큰 수
+OUTPUT_RATIO = 1.3        # 일본어 → 한국어 번역 시 출력/입력 토큰 비율 (대략)
+PROMPT_TOKENS = 150       # 요청 하나의 시스템 프롬프트 + 안내문 토큰 수 (속도 제한 예약 / 실행 계획 공통)
+
+
+_HANGUL_RE = re.compile('[\uac00-\ud7a3]')
+
+
+def _char_tokens(text: str) -> float:
+    """
+    글자 종류별 토큰 수 합계. 글자마다 도는 대신 종류별 개수를 C 쪽에서 셈 (plan / 배치 구성이 문장 수에 비례)
+      영문/숫자/기호 0.3 (3~4글자당 1토큰), 한글 음절 1.2, 한자/가나/전각 기호 1.0
+    """
+    ascii_count = len(text.encode("ascii", "ignore"))
+    hangul = len(_HANGUL_RE.findall(text))
+    return (3 * ascii_count + 12 * hangul + 10 * (len(text) - ascii_count - hangul)) / 10
+
+
+def estimate_tokens(text: str) -> int:
+    """preprocess_text 결과의 대략적인 토큰 수 (플레이스홀더 포함)"""
+    if not text:
+        return 0
+    placeholders = len(PLACEHOLDER_RE.findall(text))
+    rest = PLACEHOLDER_RE.sub("", text) if placeholders else text
+    return int(placeholders * PLACEHOLDER_TOKENS + _char_tokens(rest)) + 1
+
+
+def estimate_output_tokens(text: str) -> int:
+    """번역 결과의 예상 토큰 수. 플레이스홀더는 그대로 나오고 본문만 비율만큼 늘어난다."""
+    if not text:
+        return 0
+    placeholders = len(PLACEHOLDER_RE.findall(text))
+    rest = PLACEHOLDER_RE.sub("", text) if placeholders else text
+    return int(placeholders * PLACEHOLDER_TOKENS + _char_tokens(rest) * OUTPUT_RATIO) + 1
+
+
+def pack_batches(keys, measure, token_budget: int, max_items: int):
+    """
+    keys 를 순서대로 훑으며 배치(키 목록)를 만들어 하나씩 돌려준다 (generator).
+    measure(key) -> 예상 출력 토큰 수 (빈 문자열은 0)
+    - 배치의 예상 출력 토큰 합(마커 포함)이 token_budget 을 넘기 전까지 채움
+    - 혼자서 예산을 넘는 문장은 단독 배치
+    - max_items 는 문장 수 상한 (마커가 너무 많아지면 모델이 번호를 헷갈리기 쉬움)
+    """
+    batch = []
+    used = 0
+    count = 0   # 실제로 요청에 들어가는 (빈 문자열이 아닌) 문장 수
+    for key in keys:
+        cost = measure(key)
+        if cost:
+            cost += MARKER_TOKENS
+            if count and (used + cost > token_budget or count >= max_items):
+                yield batch
+                batch, used, count = [], 0, 0
+            used += cost
+            count += 1
+        batch.append(key)
+    if batch:
+        yield batch
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+용어집 치환 마이크로 벤치마크: 기존 replace 루프 vs GlossaryMatcher
+- 합성 말뭉치(또는 실제 용어집/입력 파일)로 두 방식의 처리 시간을 비교
+- 결과가 모호하지 않은 문장(용어끼리 겹치지 않고, 치환 결과에 다른 용어가 없는 경우)은
+  두 방식의 출력이 같은지 확인
+
+사용법:
+    python bench_glossary.py                       # 합성 용어집 3000개, 문장 20000개
+    python bench_glossary.py --terms 5000 --strings 50000
+    python bench_glossary.py --glossary glossary-japan.json --input merged_output.json
+"""
+
+import argparse
+import json
+import random
+import time
+
+from glossary_matcher import GlossaryMatcher
+
+KANA = [chr(c) for c in range(0x30A1, 0x30F7)] + [chr(c) for c in range(0x3041, 0x3094)]
+KANJI = [chr(c) for c in range(0x4E00, 0x4E00 + 800)]
+
+
+def replace_loop(text: str, glossary: dict) -> str:
+    """기존 preprocess_text 의 용어집 적용 방식"""
+    for jp, kr in glossary.items():
+        text = text.replace(jp, kr)
+    return text
+
+
+def make_synthetic(num_terms: int, num_strings: int, seed: int = 0):
+    rnd = random.Random(seed)
+    glossary = {}
+    while len(glossary) < num_terms:
+        term = "".join(rnd.choice(KANJI + KANA) for _ in range(rnd.randint(2, 6)))
+        glossary[term] = f"용어{len(glossary)}"
+    terms = list(glossary)
+
+    strings = []
+    for _ in range(num_strings):
+        parts = []
+        for _ in range(rnd.randint(3, 20)):
+            if rnd.random() < 0.15:
+                parts.append(rnd.choice(terms))
+            else:
+                parts.append("".join(rnd.choice(KANA) for _ in range(rnd.randint(1, 8))))
+        strings.append("".join(parts))
+    return glossary, strings
+
+
+def is_unambiguous(text: str, glossary: dict, cascading: bool) -> bool:
+    """문장에 등장하는 용어끼리 겹치거나 포함 관계가 없고, 연쇄 치환도 없으면 True"""
+    if cascading:
+        return False
+    spans = []
+    for jp in glossary:
+        start = text.find(jp)
+        while start != -1:
+            spans.append((start, start + len(jp)))
+            start = text.find(jp, start + 1)
+    spans.sort()
+    return all(spans[i][1] <= spans[i + 1][0] for i in range(len(spans) - 1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="용어집 치환 벤치마크")
+    parser.add_argument("--glossary", help="glossary-japan.json 경로 (JP_TO_KR 사용)")
+    parser.add_argument("--input", help="번역 입력 JSON 경로 (값들을 말뭉치로 사용)")
+    parser.add_argument("--terms", type=int, default=3000)
+    parser.add_argument("--strings", type=int, default=20000)
+    parser.add_argument("--check", type=int, default=2000, help="결과 비교할 문장 수")
+    args = parser.parse_args()
+
+    glossary, strings = make_synthetic(args.terms, args.strings)
+    if args.glossary:
+        with open(args.glossary, "r", encoding="utf-8") as f:
+            glossary = json.load(f).get("JP_TO_KR", {})
+    if args.input:
+        with open(args.input, "r", encoding="utf-8-sig") as f:
+            strings = [str(v) for v in json.load(f).values() if v]
+
+    t = time.perf_counter()
+    matcher = GlossaryMatcher(glossary)
+    compile_time = time.perf_counter() - t
+
+    t = time.perf_counter()
+    old = [replace_loop(s, glossary) for s in strings]
+    loop_time = time.perf_counter() - t
+
+    t = time.perf_counter()
+    new = [matcher.replace(s) for s in strings]
+    matcher_time = time.perf_counter() - t
+
+    # 치환 결과 안에 다른 용어가 들어 있으면 기존 방식은 연쇄 치환이 일어날 수 있음
+    cascading = any(matcher.terms_in(kr) for kr in glossary.values())
+
+    checked = same = ambiguous = 0
+    mismatches = []
+    for s, a, b in zip(strings[:args.check], old, new):
+        if not is_unambiguous(s, glossary, cascading):
+            ambiguous += 1
+            continue
+        checked += 1
+        if a == b:
+            same += 1
+        elif len(mismatches) < 5:
+            mismatches.append(s)
+
+    print(f"📖 용어 {len(glossary)}개, 문장 {len(strings)}개")
+    print(f"⏱️ 기존 replace 루프 : {loop_time:.3f}s")
+    print(f"⏱️ GlossaryMatcher   : {matcher_time:.3f}s (컴파일 {compile_time:.3f}s) → {loop_time / max(matcher_time, 1e-9):.1f}배")
+    print(f"✅ 모호하지 않은 문장 {checked}개 중 {same}개 동일, 모호한 문장 {ambiguous}개는 비교 제외")
+    for s in mismatches:
+        print(f"❌ 불일치: {s}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+플레이스홀더 방식별 프롬프트 토큰 비교: 예전 __PH_n__ (괄호/따옴표 전부 보호) vs 지금 {n} (「」『』 는 그대로)
+- 말뭉치 전체의 예상 입력/출력 토큰 (batch_packer 휴리스틱), 문장당 플레이스홀더 수
+- 같은 토큰 예산으로 배치를 묶었을 때 요청 수
+- 모든 문장이 protect_text → postprocess_text 로 원문 그대로 돌아오는지 확인
+
+사용법:
+    python bench_placeholders.py                              # 합성 문장 20000개
+    python bench_placeholders.py --input merged_output.json
+    python bench_placeholders.py --input merged_output.json --budget 2800 --batch-items 40
+"""
+
+import argparse
+import re
+
+from batch_packer import MARKER_TOKENS, estimate_output_tokens, estimate_tokens, pack_batches
+from bench_translate import make_corpus
+from deepseek_transtool2 import postprocess_text, protect_text
+from json_stream import iter_json_object
+
+# 예전 preprocess_text 의 보호 규칙과 플레이스홀더 토큰 수
+LEGACY_TOKEN_RE = re.compile(
+    r'(#BATCH_SPLIT_\d+#|#n|#!ALB\([^)]*\)|<color=[^>]*?>|</color>|――|——|—|[「」｢｣『』【】〈〉《》“”‘’"“”])'
+)
+LEGACY_PLACEHOLDER_RE = re.compile(r'__PH_\d+__')
+LEGACY_PLACEHOLDER_TOKENS = 5
+
+
+def legacy_protect(text: str):
+    counter = 0
+
+    def _repl(m):
+        nonlocal counter
+        counter += 1
+        return f"__PH_{counter - 1}__"
+
+    return LEGACY_TOKEN_RE.sub(_repl, text.strip()), counter
+
+
+def legacy_tokens(text: str, output: bool = False) -> int:
+    """예전 방식 텍스트의 예상 토큰 수 (__PH_n__ 를 지우고 지금 휴리스틱으로 센 뒤 한 개당 5토큰)"""
+    placeholders = len(LEGACY_PLACEHOLDER_RE.findall(text))
+    rest = LEGACY_PLACEHOLDER_RE.sub("", text)
+    tokens = estimate_output_tokens(rest) if output else estimate_tokens(rest)
+    return tokens + placeholders * LEGACY_PLACEHOLDER_TOKENS
+
+
+def count_requests(costs, budget: int, batch_items: int) -> int:
+    return sum(1 for _ in pack_batches(range(len(costs)), costs.__getitem__, budget, batch_items))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="플레이스홀더 방식별 토큰 비교")
+    parser.add_argument("--input", help="번역 입력 JSON 경로 (값들을 말뭉치로 사용)")
+    parser.add_argument("--strings", type=int, default=20000, help="합성 문장 수")
+    parser.add_argument("--budget", type=int, default=2800, help="배치 토큰 예산 (BATCH_TOKEN_BUDGET)")
+    parser.add_argument("--batch-items", type=int, default=40, help="배치 최대 문장 수 (MAX_BATCH_ITEMS)")
+    args = parser.parse_args()
+
+    if args.input:
+        strings = [str(v) for _, v in iter_json_object(args.input) if v and str(v).strip()]
+    else:
+        strings = [v for v in make_corpus(args.strings).values() if v]
+
+    old_in = new_in = old_ph = new_ph = 0
+    old_costs, new_costs = [], []
+    broken = []
+    for s in strings:
+        old_text, old_count = legacy_protect(s)
+        new_text, placeholders = protect_text(s)
+        old_ph += old_count
+        new_ph += len(placeholders)
+        old_in += legacy_tokens(old_text) + MARKER_TOKENS
+        new_in += estimate_tokens(new_text) + MARKER_TOKENS
+        old_costs.append(legacy_tokens(old_text, output=True))
+        new_costs.append(estimate_output_tokens(new_text))
+        if postprocess_text(new_text, placeholders) != s.strip():
+            broken.append(s)
+    old_out, new_out = sum(old_costs), sum(new_costs)
+    old_requests = count_requests(old_costs, args.budget, args.batch_items)
+    new_requests = count_requests(new_costs, args.budget, args.batch_items)
+
+    n = max(len(strings), 1)
+    print(f"📄 문장 {len(strings)}개")
+    print(f"🔖 플레이스홀더: 문장당 {old_ph / n:.2f}개 → {new_ph / n:.2f}개")
+    print(f"📥 예상 입력 토큰: {old_in} → {new_in} ({1 - new_in / max(old_in, 1):.1%} 절약)")
+    print(f"📤 예상 출력 토큰: {old_out} → {new_out} ({1 - new_out / max(old_out, 1):.1%} 절약)")
+    print(f"📦 요청 수 (예산 {args.budget}, 최대 {args.batch_items}개): {old_requests} → {new_requests}")
+    if broken:
+        print(f"❌ 원문으로 복원되지 않는 문장 {len(broken)}개, 예: {broken[0]!r}")
+    else:
+        print("✅ 모든 문장이 플레이스홀더 복원 후 원문과 동일")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+번역기 전체(end-to-end) 처리량 벤치마크 - 로컬 모의 서버(mock_server.py) 사용, 쿼터 소모 없음
+- 배치 크기 / 토큰 예산 / 동시 요청 수 / 장애 시나리오 조합마다 batch_translate 를 처음부터 실행
+- 측정값: 초당 문장 수, 문장 1000개당 요청 수, 재시도 증폭(요청 수 / 배치 수), 체크포인트 오버헤드,
+  분할 불일치 복구 / 품질 검사 / 번역 메모리 통계, 출력에 남은 오류 문장 수
+- 결과는 JSONL 로 한 줄씩 추가 → 버전(label)끼리 비교 가능
+- --endpoints N 이면 모의 서버 N개로 분산, --down-endpoints K 면 앞의 K개는 연결이 안 되는 주소 (장애 조치 측정)
+- --workers N 이면 분산 모드 (work_store.py): 공유 저장소에 올리고 worker 프로세스 N개가 구간을 나눠 번역,
+  --kill-worker 면 첫 worker 를 중간에 강제 종료해서 임대 만료 → 재배정까지 확인
+- --stream 이면 스트리밍 모드 (runaway 시나리오에서 조기 중단으로 줄어든 출력 토큰은 server.completion_tokens)
+- --cpu-workers N 이면 비동기 모드 후처리를 프로세스 풀에서 (--cpu-offload-chars 로 넘기는 기준을 낮춰서 확인)
+- --hedge P 면 헤지 요청 (tail 시나리오: 가끔 몇 초씩 멈추는 요청, stages.batch 의 p99 / max 와 hedge 통계 비교)
+
+사용법:
+    python bench_translate.py                                  # 합성 문장 2000개, 기본 조합
+    python bench_translate.py --scenarios clean,markers --batch-items 10,40 --concurrency 1,4,8
+    python bench_translate.py --input original.json --limit 5000 --label after-fix --output bench.jsonl
+    python bench_translate.py --endpoints 3 --down-endpoints 1 --concurrency 8
+    python bench_translate.py --scenarios clean,runaway --stream
+    python bench_translate.py --scenarios clean,markers --concurrency 1 --workers 3 --kill-worker
+    python bench_translate.py --scenarios clean,runaway --concurrency 4 --cpu-workers 2 --cpu-offload-chars 0
+    python bench_translate.py --scenarios tail --endpoints 2 --concurrency 1,4 --hedge 0.95
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import deepseek_transtool2
+from deepseek_transtool2 import Translator, TranslatorConfig
+from filter_ai import find_broken_rule
+from json_stream import iter_json_object
+from metrics import Metrics
+from mock_server import MockConfig, add_config_arguments, config_from_args, start_server
+from work_store import WorkStore
+
+# 장애 시나리오: 공통 설정(--latency 등) 위에 덮어쓰는 MockConfig 값
+SCENARIOS = {
+    "clean": {},
+    "throttle": {"throttle_rate": 0.05},
+    "markers": {"fullwidth_rate": 0.1, "space_rate": 0.1, "drop_rate": 0.2, "think_rate": 0.1, "mangle_rate": 0.05},
+    "filter": {"content_filter_rate": 0.02},
+    "errors": {"error_rate": 0.05},
+    "mixed": {"throttle_rate": 0.03, "content_filter_rate": 0.01, "fullwidth_rate": 0.05,
+              "drop_rate": 0.1, "think_rate": 0.05},
+    "runaway": {"runaway_rate": 0.1, "notes_rate": 0.05},
+    "tail": {"stall_rate": 0.03, "stall_seconds": 8.0},
+}
+
+KANA = [chr(c) for c in range(0x3041, 0x3094)] + [chr(c) for c in range(0x30A1, 0x30F7)]
+KANJI = [chr(c) for c in range(0x4E00, 0x4E00 + 800)]
+
+
+def make_corpus(num_strings: int, seed: int = 0) -> dict:
+    """게임 텍스트 비슷한 합성 입력: 짧은 UI 문구, 대사(「」, #n, <color>), 긴 문단, 중복, 빈 문자열"""
+    rnd = random.Random(seed)
+
+    def words(n):
+        return "".join(rnd.choice(KANA + KANJI) for _ in range(n))
+
+    data = {}
+    for i in range(num_strings):
+        r = rnd.random()
+        if r < 0.05:
+            text = ""
+        elif r < 0.15 and data:
+            text = data[str(rnd.randrange(len(data)))]          # 중복 문장
+        elif r < 0.55:
+            text = words(rnd.randint(2, 10))                    # UI 문구
+        elif r < 0.9:
+            lines = [f"「{words(rnd.randint(5, 30))}」" for _ in range(rnd.randint(1, 3))]
+            if rnd.random() < 0.3:
+                lines[0] = f"<color=#ffcc00>{words(3)}</color>{lines[0]}"
+            text = "#n".join(lines)                             # 대사
+        else:
+            text = "。".join(words(rnd.randint(20, 60)) for _ in range(rnd.randint(3, 8)))   # 긴 문단
+        data[str(i)] = text
+    return data
+
+
+def closed_endpoint() -> str:
+    """아무도 듣고 있지 않은 로컬 주소 (장애 난 엔드포인트 흉내)"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+def git_revision() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+        return out.stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def shard_worker(translator_config, store_path, lease_seconds):
+    """--workers 모드의 worker 프로세스 (spawn 으로 시작, 로그는 버림)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        store = WorkStore(store_path, lease_seconds=lease_seconds)
+        with Translator(translator_config) as translator:
+            translator.work_shards(store, poll_interval=0.2)
+        store.close()
+
+
+def run_shards(args, translator_config, data: dict, workdir) -> dict:
+    """공유 작업 저장소에 올리고 worker 프로세스 args.workers 개로 나눠 번역. 저장소 통계를 반환"""
+    import multiprocessing
+
+    store_path = os.path.join(workdir, "store.sqlite")
+    store = WorkStore(store_path)
+    store.load(data.items(), args.range_size)
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=shard_worker, args=(translator_config, store_path, args.lease_seconds))
+               for _ in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    if args.kill_worker:
+        # 전체의 1/4 쯤 끝났을 때 첫 worker 를 강제 종료 → 잡고 있던 구간은 임대 만료 후 다른 worker 가 가져감
+        while workers[0].is_alive() and store.stats()["translated"] < len(data) // 4:
+            time.sleep(0.05)
+        workers[0].kill()
+    for worker in workers:
+        worker.join()
+    stats = store.stats()
+    store.close()
+    return stats
+
+
+def run_once(args, data: dict, scenario: str, batch_items: int, token_budget: int, concurrency: int) -> dict:
+    # 시나리오 값 위에 명령행에서 직접 준 값(None 이 아닌 것)을 덮어씀
+    overrides = {k: v for k, v in config_from_args(args).as_dict().items() if v is not None}
+    config = MockConfig(**{**SCENARIOS[scenario], **overrides})
+    down = min(args.down_endpoints, args.endpoints - 1)
+    servers = [start_server(MockConfig(**{**config.as_dict(), "seed": config.seed + i}))
+               for i in range(args.endpoints - down)]
+    workdir = tempfile.mkdtemp(prefix="bench_translate_")
+    try:
+        token_path = os.path.join(workdir, "token.txt")
+        addresses = [closed_endpoint() for _ in range(down)] + [server.endpoint for server in servers]
+        with open(token_path, "w", encoding="utf-8") as f:
+            f.write("\n\n".join(f"{address}\nmock-key-{i}\n2024-05-01-preview\nmock-deepseek\n"
+                                f"max_rpm={args.rpm}\nmax_tpm={args.tpm}\nname=mock{i}"
+                                for i, address in enumerate(addresses)) + "\n")
+        glossary_path = args.glossary
+        if not glossary_path:
+            glossary_path = os.path.join(workdir, "glossary.json")
+            with open(glossary_path, "w", encoding="utf-8") as f:
+                json.dump({"JP_TO_KR": {}}, f)
+
+        output_path = os.path.join(workdir, "output.json")
+        translator_config = TranslatorConfig(
+            token_path=token_path, output_path=output_path, glossary_path=glossary_path,
+            tm_path=os.path.join(workdir, "tm.sqlite"), concurrency=concurrency, max_rpm=args.rpm,
+            max_tpm=args.tpm, max_batch_items=batch_items, batch_token_budget=token_budget, stream=args.stream,
+            cpu_workers=args.cpu_workers, hedge_percentile=args.hedge, hedge_max_share=args.hedge_max_share)
+        metrics = Metrics(os.path.join(workdir, "metrics.jsonl"), labels={"scenario": scenario})
+        tt = Translator(translator_config, metrics=metrics)
+
+        batches = sum(1 for _ in tt.make_batches(data, list(data)))
+        log = sys.stdout if args.verbose else io.StringIO()
+        start = time.perf_counter()
+        shard = None
+        with contextlib.redirect_stdout(log):
+            if args.workers > 1:
+                shard = run_shards(args, translator_config, data, workdir)
+            elif concurrency > 1:
+                asyncio.run(tt.batch_translate_async(dict(data)))
+            else:
+                tt.batch_translate(dict(data))
+        elapsed = time.perf_counter() - start
+
+        output = dict(iter_json_object(output_path))
+        tm_stats = tt.translation_memory.stats()
+        tt.close()
+        stats = {}
+        for server in servers:
+            for name, value in server.stats.as_dict().items():
+                stats[name] = stats.get(name, 0) + value
+        endpoints = tt.endpoint_pool.stats()
+        snapshot = metrics.snapshot()
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+    # 죽은 엔드포인트로 보낸 요청은 서버에 도착하지 않으므로 번역기 쪽 집계를 더함
+    requests = stats["requests"] + sum(ep["requests"] for ep in endpoints[:down])
+
+    strings = len(data)
+    append_s = snapshot["stages"].get("checkpoint_append", {}).get("sum", 0.0)
+    compact_s = snapshot["stages"].get("checkpoint_compact", {}).get("sum", 0.0)
+    checkpoint = append_s + compact_s
+    return {
+        "scenario": scenario,
+        "params": {"batch_items": batch_items, "token_budget": token_budget, "concurrency": concurrency,
+                   "rpm": args.rpm, "tpm": args.tpm, "endpoints": args.endpoints, "down_endpoints": down,
+                   "stream": args.stream, "workers": args.workers, "cpu_workers": args.cpu_workers,
+                   "hedge": args.hedge, "hedge_max_share": args.hedge_max_share},
+        "mock": config.as_dict(),
+        "metrics": {
+            "strings": strings,
+            "elapsed_s": round(elapsed, 4),
+            "strings_per_sec": round(strings / elapsed, 2) if elapsed else None,
+            "batches": batches,
+            "requests": requests,
+            "requests_per_1k_strings": round(requests * 1000 / strings, 2) if strings else None,
+            "retry_amplification": round(requests / batches, 3) if batches else None,
+            "checkpoint_s": round(checkpoint, 4),
+            "checkpoint_append_s": round(append_s, 4),
+            "checkpoint_compact_s": round(compact_s, 4),
+            "checkpoint_overhead": round(checkpoint / elapsed, 4) if elapsed else None,
+            "missing_outputs": sum(1 for key in data if key not in output),
+            "broken_outputs": sum(1 for value in output.values() if find_broken_rule(value)),
+            "completion_tokens": stats["completion_tokens"],
+            "order_matches_input": list(output) == list(data),
+        },
+        "server": stats,
+        "endpoints": endpoints,
+        "shard": shard,
+        "recovery": tt.recovery_stats.as_dict(),
+        "quality": tt.quality_gate.as_dict(),
+        "hedge": tt.hedge_policy.as_dict() if tt.hedge_policy else None,
+        "translation_memory": {k: tm_stats[k] for k in ("hits", "misses", "shared_in_flight", "stored")},
+        "counters": snapshot["counters"],
+        "stages": snapshot["stages"],
+    }
+
+
+def int_list(text: str):
+    return [int(v) for v in text.split(",") if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모의 서버를 이용한 번역기 end-to-end 벤치마크")
+    parser.add_argument("--input", help="번역 입력 JSON (없으면 합성 문장)")
+    parser.add_argument("--limit", type=int, default=0, help="--input 에서 앞쪽 N개만 사용")
+    parser.add_argument("--strings", type=int, default=2000, help="합성 문장 수")
+    parser.add_argument("--glossary", help="용어집 JSON (없으면 빈 용어집)")
+    parser.add_argument("--scenarios", default="clean,markers,throttle", help=f"쉼표로 구분: {','.join(SCENARIOS)}")
+    parser.add_argument("--batch-items", type=int_list, default=[40], help="MAX_BATCH_ITEMS 후보 (쉼표 구분)")
+    parser.add_argument("--token-budgets", type=int_list, default=[2800], help="BATCH_TOKEN_BUDGET 후보")
+    parser.add_argument("--concurrency", type=int_list, default=[1, 4], help="동시 요청 수 후보")
+    parser.add_argument("--rpm", type=float, default=100000, help="번역기 쪽 엔드포인트별 속도 제한 (max_rpm)")
+    parser.add_argument("--tpm", type=float, default=0, help="번역기 쪽 엔드포인트별 토큰 제한 (max_tpm)")
+    parser.add_argument("--endpoints", type=int, default=1, help="모의 엔드포인트 수")
+    parser.add_argument("--down-endpoints", type=int, default=0, help="그중 장애 상태(연결 불가)인 엔드포인트 수")
+    parser.add_argument("--workers", type=int, default=1, help="분산 모드 worker 프로세스 수 (1 이면 단일 실행)")
+    parser.add_argument("--kill-worker", action="store_true", help="분산 모드에서 첫 worker 를 중간에 강제 종료")
+    parser.add_argument("--lease-seconds", type=float, default=3.0, help="분산 모드 구간 임대 시간")
+    parser.add_argument("--range-size", type=int, default=100, help="분산 모드 구간 하나의 키 수")
+    parser.add_argument("--stream", action="store_true", help="스트리밍 모드 (폭주 / 해설 조기 중단)")
+    parser.add_argument("--cpu-workers", type=int, default=0, help="비동기 모드 후처리 프로세스 수 (cpu_workers)")
+    parser.add_argument("--cpu-offload-chars", type=int, default=None,
+                        help="이 글자 수 이상만 프로세스 풀로 (기본: deepseek_transtool2.CPU_OFFLOAD_CHARS)")
+    parser.add_argument("--hedge", type=float, default=0.0, help="헤지 분위수 (hedge_percentile, 0 이면 끔)")
+    parser.add_argument("--hedge-max-share", type=float, default=0.05, help="헤지 요청 비율 상한")
+    parser.add_argument("--label", default=None, help="결과에 붙일 이름 (기본: git 커밋)")
+    parser.add_argument("--output", default="bench_results.jsonl", help="결과 JSONL (한 실행당 한 줄 추가)")
+    parser.add_argument("--verbose", action="store_true", help="번역기 로그 출력")
+    add_config_arguments(parser)
+    parser.set_defaults(latency="uniform:0.02,0.08", token_latency=0.0001, retry_after_ms=100,
+                        throttle_rate=None, rpm_limit=None, content_filter_rate=None, fullwidth_rate=None,
+                        space_rate=None, drop_rate=None, think_rate=None, error_rate=None, mangle_rate=None,
+                        runaway_rate=None, notes_rate=None, stall_rate=None, stall_seconds=None)
+    args = parser.parse_args()
+
+    if args.cpu_offload_chars is not None:
+        deepseek_transtool2.CPU_OFFLOAD_CHARS = args.cpu_offload_chars
+    if args.input:
+        data = {}
+        for key, value in iter_json_object(args.input):
+            if args.limit and len(data) >= args.limit:
+                break
+            data[key] = value
+    else:
+        data = make_corpus(args.strings, args.seed)
+
+    label = args.label or git_revision()
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    for scenario in scenarios:
+        if scenario not in SCENARIOS:
+            parser.error(f"알 수 없는 시나리오: {scenario}")
+
+    print(f"🏁 벤치마크 시작: 문장 {len(data)}개, label={label}")
+    print(f"{'scenario':<10} {'items':>5} {'budget':>6} {'conc':>4} {'str/s':>9} {'req/1k':>8} "
+          f"{'amplif':>7} {'ckpt%':>6} {'broken':>6}")
+    with open(args.output, "a", encoding="utf-8") as out:
+        for scenario in scenarios:
+            for batch_items in args.batch_items:
+                for token_budget in args.token_budgets:
+                    for concurrency in args.concurrency:
+                        result = run_once(args, data, scenario, batch_items, token_budget, concurrency)
+                        result = {"label": label, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                                  "python": sys.version.split()[0], **result}
+                        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                        out.flush()
+                        m = result["metrics"]
+                        print(f"{scenario:<10} {batch_items:>5} {token_budget:>6} {concurrency:>4} "
+                              f"{m['strings_per_sec']:>9.1f} {m['requests_per_1k_strings']:>8.1f} "
+                              f"{m['retry_amplification']:>7.2f} {m['checkpoint_overhead']:>6.1%} "
+                              f"{m['broken_outputs']:>6}")
+                        if result["shard"]:
+                            print(f"{'':<10} ↳ worker {args.workers}개: 구간 재배정 {result['shard']['reassigned']}회, "
+                                  f"누락 {m['missing_outputs']}, 입력 순서 유지 {m['order_matches_input']}")
+                        if result["hedge"]:
+                            batch = result["stages"].get("batch", {})
+                            print(f"{'':<10} ↳ 헤지 {result['hedge']['hedged']}건 (이김 {result['hedge']['hedge_wins']}), "
+                                  f"배치 p99 {batch.get('p99', 0):.2f}s / max {batch.get('max', 0):.2f}s")
+    print(f"📄 결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+추가 전용(append-only) 체크포인트 저널
+- 배치가 끝날 때마다 전체 JSON 을 다시 쓰지 않고, 새 결과만 한 줄씩 JSONL 로 추가
+- fsync 는 N건 / N초 단위로 묶어서 호출
+- 재개 시 저널을 다시 읽어서(replay) 이미 끝난 키는 건너뜀
+- 쓰다가 중간에 죽어서 마지막 줄이 잘려도, 그 줄만 버리고 나머지는 그대로 복구
+- 최종 출력 파일은 마지막에 한 번만 임시 파일 → os.replace 로 원자적으로 생성
+"""
+
+import json
+import os
+import time
+
+
+def write_json_atomic(path, data, indent=2):
+    """임시 파일에 다 쓴 뒤 교체 → 중간에 죽어도 기존 파일이 깨지지 않음"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class CheckpointJournal:
+    def __init__(self, path, fsync_every=50, fsync_interval=2.0):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.f = None
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def replay(self) -> dict:
+        """저널을 읽어 {key: 번역문} 복원. 잘린 꼬리 줄은 잘라낸다."""
+        data = {}
+        if not os.path.exists(self.path):
+            return data
+
+        good_offset = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # 쓰다 만 마지막 줄
+                try:
+                    record = json.loads(line)
+                    data[record["k"]] = record["v"]
+                except (ValueError, KeyError, TypeError):
+                    break
+                good_offset += len(line)
+
+        if good_offset < os.path.getsize(self.path):
+            print(f"⚠️ 저널 끝부분 손상 → {good_offset} byte 이후 잘라냄")
+            with open(self.path, "r+b") as f:
+                f.truncate(good_offset)
+        return data
+
+    def _open(self):
+        if self.f is None:
+            self.f = open(self.path, "a", encoding="utf-8", newline="\n")
+
+    def append(self, items: dict):
+        """배치 결과 추가. 줄 단위로 완결된 레코드만 쓴다."""
+        if not items:
+            return
+        self._open()
+        self.f.write("".join(
+            json.dumps({"k": k, "v": v}, ensure_ascii=False) + "\n" for k, v in items.items()
+        ))
+        self.f.flush()
+        self.unsynced += len(items)
+        if self.unsynced >= self.fsync_every or time.monotonic() - self.last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        if self.f is None or not self.unsynced:
+            return
+        os.fsync(self.f.fileno())
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def close(self):
+        if self.f is not None:
+            self.sync()
+            self.f.close()
+            self.f = None
+
+    def compact(self, data: dict, output_path, indent=2):
+        """최종 결과를 출력 파일로 한 번에 저장하고 저널 삭제"""
+        self.close()
+        write_json_atomic(output_path, data, indent=indent)
+        self.discard()
+
+    def discard(self):
+        """결과를 다른 곳(프로젝트 저장소 등)에 이미 저장했을 때: 출력 파일 없이 저널만 삭제"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -3,339 +3,119 @@
 """
 DeepSeek API 안전 최적화 배치 번역기 (개선판)
 - 괄호/특수문자 보호(「」『』【】 등)
-- 플레이스홀더 보존/복원
+- 플레이스홀더 보존/복원 (짧은 {n} 형식, 「」『』 는 그대로, 번역 후 전부 돌아왔는지 확인)
 - #BATCH_SPLIT 보정
 - 429 및 content-filter 예외 처리 보강
 - 불필요한 주석/노트 후처리 제거 강화
 - batch_size 자동 감소 제거 (불일치 발생 시 개별 fallback 처리)
+- 비동기 동시 요청 모드 (CONCURRENCY, 결과는 키 순서대로 저장)
+- 고정 sleep 대신 429 기반 AIMD 속도 제한 (rate_limiter.py)
+- 추가 전용 JSONL 저널 체크포인트, 최종 출력은 마지막에 한 번만 저장 (checkpoint_journal.py)
+- SQLite 번역 메모리로 같은 문장은 API 재호출 없이 재사용 (translation_memory.py)
+- 용어집은 trie 로 한 번 컴파일해서 최장 일치로 한 번에 치환 (glossary_matcher.py)
+- 문장 개수 대신 예상 토큰 예산으로 배치 구성 (batch_packer.py)
+- 분할 불일치 시 멀쩡한 조각은 살리고 누락 번호만 재요청/이분 탐색 (split_recovery.py)
+- 번역 직후 filter_ai 기준 품질 검사, 실패 문장은 즉시 재요청 후 dead-letter 기록 (quality_gate.py)
+- 입력 JSON 스트리밍 읽기 (json_stream.py)
+- 여러 엔드포인트/키에 가중 최소 처리중 방식으로 분산, 엔드포인트별 속도 제한 + 서킷 브레이커 장애 조치 (endpoint_pool.py)
+- 단계별 소요 시간 히스토그램 / 429·content_filter·분할 불일치 카운터 / 토큰 사용량 계측 (metrics.py)
+- 스트리밍으로 받으면서 출력 폭주 / "Translation Notes" 해설을 감지하면 조기 중단, 끝난 조각만 사용 (stream_guard.py)
+- 패치마다 새 원문 덤프를 매니페스트(원문 해시 + 걸리는 용어 해시)와 비교해서 바뀐 키만 번역 (translation_manifest.py)
+- DEEPSEEK_WORK_STORE 를 주면 분산 모드: 여러 프로세스/PC 가 공유 SQLite 에서 키 구간을 임대해서 번역,
+  죽은 worker 의 구간은 임대 만료 후 재배정, 마지막 worker 가 입력 순서대로 합쳐서 저장 (work_store.py)
+- DEEPSEEK_PROJECT_STORE 를 주면 배치마다 원문/번역/품질 상태를 프로젝트 저장소에 바로 기록,
+  출력 JSON 대신 project_store.py export 로 내보냄 (project_store.py)
+- 가끔 몇 분씩 멈추는 요청은 HEDGE_PERCENTILE 로 다른 엔드포인트에 한 번 더 보내고 먼저 온 응답 사용 (hedging.py)
+- 번역 로직은 deepseek_transtool2.py 의 Translator (import 만으로는 아무것도 읽거나 연결하지 않음),
+  이 파일은 설정값을 모아서 실행만 함
 """
 
 import os
-import json
-import time
-import random
-import re
-from azure.ai.inference import ChatCompletionsClient
-from azure.ai.inference.models import SystemMessage, UserMessage
-from azure.core.credentials import AzureKeyCredential
+import asyncio
+from json_stream import iter_json_object
+from deepseek_transtool2 import Translator, TranslatorConfig
+from work_store import WorkStore
 
 # ---------------------------
 # 파일 / 설정
 # ---------------------------
-TOKEN_PATH = r"C:\Users\hoho\Desktop\work\deepseek_token.txt"
+# (토큰/용어집/번역 메모리 경로는 환경 변수로 바꿀 수 있음)
+TOKEN_PATH = os.environ.get("DEEPSEEK_TOKEN_PATH", r"C:\Users\hoho\Desktop\work\deepseek_token.txt")
 INPUT_JSON_PATH = r"C:\Users\hoho\Desktop\work\original_texts_for_retranslation.json"
 OUTPUT_JSON_PATH = r"C:\Users\hoho\Desktop\work\translated_output-final22525111111122223334444444555.json"
-CHECKPOINT_PATH = OUTPUT_JSON_PATH.replace(".json", "_checkpoint.json")
-GLOSSARY_PATH = r"C:\Users\hoho\Desktop\work\glossary-japan.json"
-
-# ---------------------------
-# DeepSeek (Azure) 초기화
-# ---------------------------
-with open(TOKEN_PATH, "r", encoding="utf-8") as f:
-    lines = [line.strip() for line in f.readlines()]
-DEEPSEEK_ENDPOINT = lines[0]
-DEEPSEEK_API_KEY = lines[1]
-API_VERSION = lines[2]
-MODEL_NAME = lines[3]
-
-client = ChatCompletionsClient(
-    endpoint=DEEPSEEK_ENDPOINT,
-    credential=AzureKeyCredential(DEEPSEEK_API_KEY),
-    api_version=API_VERSION
-)
-
-# ---------------------------
-# 용어집 로드
-# ---------------------------
-with open(GLOSSARY_PATH, "r", encoding="utf-8") as f:
-    glossary = json.load(f).get("JP_TO_KR", {})
-
-# ---------------------------
-# 유틸 함수들
-# ---------------------------
-def clean_translation(result: str) -> str:
-    """모델 응답에서 불필요한 태그/주석/설명 제거 (강화 버전)"""
-    if not result:
-        return ""
-
-    text = result
-
-    # <think>...</think> 블록 제거
-    text = re.sub(r'<think>.*?</think>\n?', '', text, flags=re.DOTALL)
-
-    # "**Translation Notes:**" 이후 전부 제거
-    text = re.sub(r'\*\*Translation Notes:\*\*.*', '', text, flags=re.DOTALL)
-
-    # "(Note: ...)" 같은 괄호 주석 제거
-    text = re.sub(r'\(Note:.*?\)', '', text, flags=re.DOTALL)
-
-    # 줄 단위에서 "Note:" 로 시작하는 문장 제거
-    text = re.sub(r'^\s*Note:.*$', '', text, flags=re.MULTILINE)
-
-    # "Translation Notes:" 단독 패턴도 제거
-    text = re.sub(r'Translation Notes:.*', '', text, flags=re.DOTALL)
-
-    return text.strip()
-
-def fix_batch_markers(text: str) -> str:
-    """모델이 #BATCH_SPLIT_x# 을 변형했을 때 보정"""
-    text = text.replace('＃', '#')  # fullwidth # -> #
-    text = re.sub(r'#BATCH[_\s]*SPIT_(\d+)#', r'#BATCH_SPLIT_\1#', text, flags=re.IGNORECASE)
-    text = re.sub(r'#BATCH[_\s]*SPLlT_(\d+)#', r'#BATCH_SPLIT_\1#', text, flags=re.IGNORECASE)
-    text = re.sub(r'#BATCH[_\s]*SPLIT[_\s]*(\d+)#', r'#BATCH_SPLIT_\1#', text, flags=re.IGNORECASE)
-    return text
-
-
-# ---------------------------
-# 플레이스홀더 기반 전처리/후처리 (수정)
-# ---------------------------
-def preprocess_text(text: str):
-    text = text or ""
-    text = text.strip()
-
-    placeholders = {}
-    counter = 0
-
-    token_re = re.compile(
-        r'(#BATCH_SPLIT_\d+#|#n|#!ALB\([^)]*\)|<color=[^>]*?>|</color>|――|——|—|[「」｢｣『』【】〈〉《》“”‘’"“”])'
-    )
-
-    def _repl(m):
-        nonlocal counter
-        key = f"__PH_{counter}__"
-        placeholders[key] = m.group(0)
-        counter += 1
-        return key
-
-    protected = token_re.sub(_repl, text)
-
-    # glossary 적용
-    if glossary:
-        for jp, kr in glossary.items():
-            protected = protected.replace(jp, kr)
-
-    return protected, placeholders
-
-
-def postprocess_text(text: str, placeholders: dict):
-    # PH_n는 존재하면 제거, 대신 원래 특수문자는 복원
-    for k, v in placeholders.items():
-        text = text.replace(k, v)
-    # 만약 여전히 남은 PH_n 패턴이 있으면 제거
-    text = re.sub(r'__PH_\d+__', '', text)
-    return text.strip()
-
-
-
-
-# ---------------------------
-# 구조 복원 (#n 개수 맞추기 등)
-# ---------------------------
-def restore_structure(translated: str, source: str) -> str:
-    source_n_count = source.count("#n")
-    translated_n_count = translated.count("#n")
-    if translated_n_count > source_n_count:
-        translated = re.sub(r'#n', '', translated, count=(translated_n_count - source_n_count))
-    elif translated_n_count < source_n_count:
-        translated += "#n" * (source_n_count - translated_n_count)
-    translated_sentences = [s.strip() for s in translated.split("#n") if s.strip()]
-    final_sentences = []
-    for s in translated_sentences:
-        if s not in final_sentences:
-            final_sentences.append(s)
-    return "#n".join(final_sentences)
-
-# ---------------------------
-# 번역 요청 (단일 배치)
-# ---------------------------
-def translate_batch_text(batch_text: str) -> str:
-    user_prompt = (
-        f"{batch_text}\n\n"
-        "Translate the content to Korean. Leave any English text unchanged. "
-        "Do NOT change tokens that look like __PH_<number>__ or #BATCH_SPLIT_<number># or markers like #n, #!ALB(...), <color=...>. "
-        "Preserve punctuation and bracket characters exactly as in the original placeholders. "
-        "Output only the translated content; do not add explanations or notes."
-    )
-
-    system_msg = SystemMessage(content=(
-        "You are a professional translator. Translate Japanese/Chinese to Korean. "
-        "Keep English text unchanged. Do not modify placeholders or special markers. "
-        "Return ONLY the translated text. Do not include explanations, notes, or comments."
-    ))
-
-    retries = 20
-    wait_time = 2.0
-    for attempt in range(retries):
-        try:
-            response = client.complete(
-                messages=[system_msg, UserMessage(content=user_prompt)],
-                max_tokens=4096,
-                temperature=0.0,
-                top_p=0.1,
-                model=MODEL_NAME
-            )
-            result = response.choices[0].message.content
-            result = clean_translation(result)
-            result = fix_batch_markers(result)
-            return result
-        except Exception as e:
-            s = str(e)
-            if "429" in s or "Too Many Requests" in s:
-                print(f"⚠️ 429 → {wait_time:.1f}s 대기 후 재시도 ({attempt+1}/{retries})")
-                time.sleep(wait_time + random.uniform(0, 1))
-                wait_time *= 2
-                continue
-            if "ResponsibleAIPolicyViolation" in s or "content_filter" in s:
-                print("⚠️ content_filter 발생 → 프롬프트 간소화 후 재시도")
-                try:
-                    fallback_prompt = (
-                        f"{batch_text}\n\n"
-                        "Translate to Korean. Keep English unchanged. "
-                        "Do not change placeholders or markers. "
-                        "Output only translated text."
-                    )
-                    response2 = client.complete(
-                        messages=[SystemMessage(content="Translate text to Korean. Keep placeholders unchanged."),
-                                  UserMessage(content=fallback_prompt)],
-                        max_tokens=4096,
-                        temperature=0.0,
-                        top_p=0.1,
-                        model=MODEL_NAME
-                    )
-                    result = response2.choices[0].message.content
-                    result = clean_translation(result)
-                    result = fix_batch_markers(result)
-                    return result
-                except Exception as e2:
-                    print(f"⚠️ fallback 실패: {e2}")
-                    return batch_text
-            print(f"⚠️ API 오류: {e}")
-            return batch_text
-    print("❌ 재시도 실패 → 원문 반환")
-    return batch_text
-
-# ---------------------------
-# 배치 번역 (메인 루프)
-# ---------------------------
-def batch_translate(json_data, max_batch_size=10):
-    keys = list(json_data.keys())
-    translated_data = {}
-
-    # 체크포인트 불러오기
-    start_index = 0
-    if os.path.exists(CHECKPOINT_PATH):
-        with open(CHECKPOINT_PATH, "r", encoding="utf-8-sig") as f:
-            checkpoint = json.load(f)
-            translated_data = checkpoint.get("data", {})
-            start_index = checkpoint.get("index", 0)
-        print(f"🔄 체크포인트 불러오기: {start_index}/{len(keys)}")
-
-    total = len(keys)
-    i = start_index
-    current_batch_size = max_batch_size
-
-    while i < total:
-        batch_keys = keys[i:i + current_batch_size]
-
-        batch_text_list = []
-        placeholders_list = []
-        non_empty_keys = []
-
-        for key in batch_keys:
-            text = json_data.get(key, "")
-            if not text or not str(text).strip():
-                translated_data[key] = text
-                continue
-            pre_text, placeholders = preprocess_text(str(text))
-            idx = len(batch_text_list)
-            batch_text_list.append(f"#BATCH_SPLIT_{idx}#\n{pre_text}")
-            placeholders_list.append(placeholders)
-            non_empty_keys.append(key)
-
-        if not batch_text_list:
-            i += len(batch_keys)
-            continue
-
-        batch_input = "\n".join(batch_text_list)
-        batch_output = translate_batch_text(batch_input)
-        batch_output = fix_batch_markers(batch_output)
-
-        split_output = re.split(r'#BATCH_SPLIT_\d+#\n', batch_output)
-        split_output = [s.strip() for s in split_output if s.strip()]
-
-        # 분할 개수 불일치 시 → 자동 batch_size 감소 대신 개별 번역 fallback
-        # 분할 개수 불일치 시 → 임시로 batch_size 줄여서 재시도
-        if len(split_output) != len(batch_text_list):
-            print(f"⚠️ split_output({len(split_output)}) != batch({len(batch_text_list)}) → 임시 batch_size 축소 재시도")
-
-            # 최소 단위로 나눠서 재번역 (예: batch_size 5)
-            retry_size = max(3, min(5, len(batch_text_list)))  
-            for k in range(0, len(batch_text_list), retry_size):
-                sub_batch_keys = non_empty_keys[k:k+retry_size]
-                sub_batch_texts = batch_text_list[k:k+retry_size]
-
-                sub_input = "\n".join(sub_batch_texts)
-                sub_output = translate_batch_text(sub_input)
-                sub_output = fix_batch_markers(sub_output)
-
-                sub_split = re.split(r'#BATCH_SPLIT_\d+#\n', sub_output)
-                sub_split = [s.strip() for s in sub_split if s.strip()]
-
-                if len(sub_split) != len(sub_batch_texts):
-                    print(f"⚠️ 서브 배치 불일치 → 개별 번역 fallback 실행")
-                    for j, key in enumerate(sub_batch_keys):
-                        text = json_data[key]
-                        pre_text, placeholders = preprocess_text(str(text))
-                        translated = translate_batch_text(pre_text)
-                        translated = fix_batch_markers(translated)
-                        translated = postprocess_text(translated, placeholders)
-                        translated = restore_structure(translated, text)
-                        translated_data[key] = translated
-                else:
-                    for j, key in enumerate(sub_batch_keys):
-                        translated_fragment = sub_split[j]
-                        translated_fragment = postprocess_text(translated_fragment, placeholders_list[j])
-                        translated_fragment = restore_structure(translated_fragment, json_data[key])
-                        translated_data[key] = translated_fragment
-
-            # 체크포인트 저장
-            with open(OUTPUT_JSON_PATH, "w", encoding="utf-8") as f:
-                json.dump(translated_data, f, ensure_ascii=False, indent=2)
-            with open(CHECKPOINT_PATH, "w", encoding="utf-8") as f:
-                json.dump({"index": i + len(batch_keys), "data": translated_data}, f, ensure_ascii=False, indent=2)
-
-            i += len(batch_keys)
-            time.sleep(random.uniform(3, 5))
-
-            # ✅ 다음 루프에서는 다시 원래 batch_size로 복귀
-            current_batch_size = max_batch_size
-            continue
-
-        # 정상 처리
-        for j, key in enumerate(non_empty_keys):
-            translated_fragment = split_output[j]
-            translated_fragment = postprocess_text(translated_fragment, placeholders_list[j])
-            translated_fragment = restore_structure(translated_fragment, json_data[key])
-            translated_data[key] = translated_fragment
-
-        with open(OUTPUT_JSON_PATH, "w", encoding="utf-8") as f:
-            json.dump(translated_data, f, ensure_ascii=False, indent=2)
-        with open(CHECKPOINT_PATH, "w", encoding="utf-8") as f:
-            json.dump({"index": i + len(batch_keys), "data": translated_data}, f, ensure_ascii=False, indent=2)
-
-        print(f"💾 {i + len(batch_keys)}/{total} 완료 및 저장")
-        i += len(batch_keys)
-        time.sleep(random.uniform(3, 5))
-
-    if os.path.exists(CHECKPOINT_PATH):
-        os.remove(CHECKPOINT_PATH)
-
-    print(f"\n🎉 전체 번역 완료! 결과: {OUTPUT_JSON_PATH}")
+OUTPUT_STEM = os.path.splitext(OUTPUT_JSON_PATH)[0]
+CHECKPOINT_PATH = OUTPUT_STEM + "_checkpoint.json"  # 예전 형식 (있으면 저널로 옮김)
+JOURNAL_PATH = OUTPUT_STEM + "_journal.jsonl"
+DEAD_LETTER_PATH = OUTPUT_STEM + "_dead_letter.jsonl"  # 품질 검사 최종 실패 문장
+GLOSSARY_PATH = os.environ.get("DEEPSEEK_GLOSSARY_PATH", r"C:\Users\hoho\Desktop\work\glossary-japan.json")
+TM_PATH = os.environ.get("DEEPSEEK_TM_PATH", r"C:\Users\hoho\Desktop\work\translation_memory.sqlite")  # 실행 간 공유되는 번역 메모리
+MANIFEST_PATH = os.environ.get("DEEPSEEK_MANIFEST_PATH")  # 증분 번역 매니페스트 (None 이면 매번 입력 전체를 번역)
+MANIFEST_PRUNE = False        # 입력에 없는 키를 매니페스트에서 삭제 (입력이 패치 전체 덤프일 때만 True, 재번역용 일부 파일이면 False)
+STORE_PATH = os.environ.get("DEEPSEEK_PROJECT_STORE")  # 프로젝트 저장소 (None 이면 예전처럼 출력 JSON 을 씀)
+PROMPT_VERSION = "v2"         # 프롬프트(build_messages)를 바꾸면 올릴 것 → 번역 메모리 키가 달라짐
+
+CONCURRENCY = 4               # 동시에 요청할 배치 수 (1 이면 기존 직렬 모드)
+MAX_RPM = 60                  # 배포 쿼터: 분당 요청 수 (배포 설정에 맞게 변경, 엔드포인트별 기본값)
+MAX_TPM = 120000              # 배포 쿼터: 분당 토큰 수 (0 이면 토큰 제한 안 함, 엔드포인트별 기본값)
+MAX_RETRIES = 8               # 429 재시도 최대 횟수 (대기는 rate_limiter 가 전체 공통으로 조절)
+MAX_TOKENS = 4096
+MAX_BATCH_ITEMS = 40          # 배치 하나에 넣을 최대 문장 수
+BATCH_TOKEN_BUDGET = 2800     # 배치 하나의 예상 출력 토큰 상한 (MAX_TOKENS 보다 여유 있게)
+METRICS_PATH = OUTPUT_STEM + "_metrics.jsonl"  # 단계별 계측 스냅샷 (None 이면 기록 안 함)
+METRICS_PORT = 0              # Prometheus /metrics 엔드포인트 포트 (0 이면 안 띄움, 둘 다 끄면 계측 비용 거의 0)
+WORK_STORE_PATH = os.environ.get("DEEPSEEK_WORK_STORE")  # 분산 모드 공유 저장소 (None 이면 이 프로세스 혼자 전체 번역)
+LEASE_SECONDS = 300           # 분산 모드: 구간 임대 시간 (배치가 끝날 때마다 연장, 만료되면 다른 worker 에게 재배정)
+RANGE_SIZE = 200              # 분산 모드: 구간 하나의 키 수
+STREAM = True                 # 스트리밍 + 조기 중단 (폭주한 응답에 max_tokens 까지 돈을 쓰지 않음)
+CPU_WORKERS = 0               # 비동기 모드에서 후처리를 돌릴 프로세스 수 (0 이면 이벤트 루프에서 처리)
+HEDGE_PERCENTILE = 0.0        # 최근 지연 시간의 이 분위수(예: 0.95) 안에 응답이 없으면 같은 요청을 하나 더 (0 이면 끔)
+HEDGE_MAX_SHARE = 0.05        # 전체 요청 대비 헤지 요청 비율 상한
+
+# ---------------------------
+# 번역기 (토큰 파일 / 용어집 / 번역 메모리 / 클라이언트는 처음 쓸 때 열림)
+# ---------------------------
+# 토큰 파일: endpoint / key / api_version / model 4줄. 빈 줄로 구분해서 여러 개 적으면 분산 + 장애 조치
+translator = Translator(TranslatorConfig(
+    token_path=TOKEN_PATH,
+    output_path=OUTPUT_JSON_PATH,
+    glossary_path=GLOSSARY_PATH,
+    tm_path=TM_PATH,
+    checkpoint_path=CHECKPOINT_PATH,
+    journal_path=JOURNAL_PATH,
+    dead_letter_path=DEAD_LETTER_PATH,
+    metrics_path=METRICS_PATH,
+    metrics_port=METRICS_PORT,
+    manifest_path=MANIFEST_PATH,
+    manifest_prune=MANIFEST_PRUNE,
+    store_path=STORE_PATH,
+    prompt_version=PROMPT_VERSION,
+    concurrency=CONCURRENCY,
+    max_rpm=MAX_RPM,
+    max_tpm=MAX_TPM,
+    max_retries=MAX_RETRIES,
+    max_tokens=MAX_TOKENS,
+    max_batch_items=MAX_BATCH_ITEMS,
+    batch_token_budget=BATCH_TOKEN_BUDGET,
+    stream=STREAM,
+    cpu_workers=CPU_WORKERS,
+    hedge_percentile=HEDGE_PERCENTILE,
+    hedge_max_share=HEDGE_MAX_SHARE,
+))
 
 # ---------------------------
 # 실행
 # ---------------------------
 if __name__ == "__main__":
-    with open(INPUT_JSON_PATH, "r", encoding="utf-8-sig") as f:
-        input_json = json.load(f)
-    batch_translate(input_json, max_batch_size=10)
+    # 입력 파일은 스트리밍으로 읽음 → 전체 파싱을 기다리지 않고 첫 배치 시작
+    input_json = iter_json_object(INPUT_JSON_PATH)
+    with translator:
+        if WORK_STORE_PATH:
+            # 분산 모드: 먼저 시작한 worker 가 입력을 올리고, 나머지는 같은 저장소에서 구간을 나눠 가짐
+            store = WorkStore(WORK_STORE_PATH, lease_seconds=LEASE_SECONDS)
+            store.load(input_json, RANGE_SIZE)
+            translator.work_shards(store)
+            store.close()
+        elif CONCURRENCY > 1:
+            asyncio.run(translator.batch_translate_async(input_json, concurrency=CONCURRENCY))
+        else:
+            translator.batch_translate(input_json)
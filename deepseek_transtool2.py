@@ -0,0 +1,1542 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DeepSeek 배치 번역기 라이브러리 (실행은 "deepseek_transtool2 - 복사본.py")
+- import 할 때는 아무 일도 하지 않음: 토큰 파일 / 용어집 / 번역 메모리 / 네트워크 클라이언트를 읽거나 만들지 않음
+  → 다른 도구, 프로세스 풀 worker, 벤치마크가 preprocess_text / clean_translation / restore_structure 를 바로 사용
+- 보호할 특수문자/마커는 짧은 {n} 플레이스홀더로, 모델이 잘 유지하는 「」『』 는 그대로 보냄
+  → 번역 후 플레이스홀더/괄호가 전부 돌아왔는지 확인하고, 아니면 품질 검사 실패로 재요청
+- 정규식은 모듈을 읽을 때 한 번만 컴파일, asyncio 는 비동기 모드에서만 import
+- Translator(TranslatorConfig(...)) : 설정을 명시적으로 받는 번역기
+    - 엔드포인트 풀 / 클라이언트는 첫 요청 때 생성 (azure SDK import 도 그때)
+    - 용어집은 처음 쓸 때 읽어서 trie 로 컴파일, 같은 프로세스 안의 Translator 끼리 공유
+    - 번역 메모리 / 계측 / 매니페스트도 처음 쓸 때 열림
+    - manifest_path 를 주면 증분 모드: 매니페스트와 비교해서 새로 생기거나 바뀐 키, 걸리는 용어가 바뀐 키만 번역
+      (translation_manifest.py, 입력은 계속 스트리밍으로 읽음. 입력에 없는 키는 manifest_prune=True 일 때만 삭제)
+    - store_path 를 주면 배치가 끝날 때마다 그 배치의 원문/번역을 프로젝트 저장소에 바로 기록 (project_store.py)
+      → 출력 JSON 전체를 다시 쓰지 않음 (필요하면 project_store.py export)
+    - pickle 하면 설정만 넘어감 (프로세스 풀 worker 에서 필요한 것만 다시 만듦)
+    - work_shards(WorkStore) : 여러 프로세스/PC 가 공유 저장소에서 키 구간을 임대해서 나눠 번역 (work_store.py)
+    - stream=True 면 응답을 스트리밍으로 받으면서 폭주 / 해설을 감지해 조기 중단 (stream_guard.py)
+      → 그때까지 끝난 조각만 split_recovery 로 넘기고, 나머지 번호만 재요청
+    - cpu_workers 를 주면 비동기 모드에서 큰 응답의 정리 / 후처리 / 품질 검사를 프로세스 풀에서
+      (extract_text / finish_texts, 이벤트 루프가 후처리에 묶여 요청을 못 보내는 일이 없도록)
+    - hedge_percentile 을 주면 오래 걸리는 요청을 다른 엔드포인트로 한 번 더 보내고 먼저 온 응답 사용 (hedging.py)
+
+사용법:
+    from deepseek_transtool2 import Translator, TranslatorConfig
+    translator = Translator(TranslatorConfig(token_path=..., glossary_path=..., output_path=..., tm_path=...))
+    translator.batch_translate(iter_json_object(input_path))
+"""
+
+import contextlib
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+
+from batch_packer import PROMPT_TOKENS, estimate_tokens, estimate_output_tokens, pack_batches
+from checkpoint_journal import CheckpointJournal
+from endpoint_pool import EndpointPool, load_endpoints
+from glossary_matcher import GlossaryMatcher
+from hedging import HedgeCancelled, HedgePolicy
+from metrics import Metrics
+from project_store import ProjectStore
+from quality_gate import QualityGate
+from rate_limiter import get_retry_after
+from split_recovery import RecoveryStats, parse_marked_segments
+from stream_guard import StreamGuard
+from translation_manifest import ManifestDiff, TranslationManifest
+from translation_memory import PROMPT_VERSION, TranslationMemory, glossary_version
+
+# ---------------------------
+# 정규식 (한 번만 컴파일)
+# ---------------------------
+_THINK_RE = re.compile(r'<think>.*?</think>\n?', re.DOTALL)
+_NOTES_BOLD_RE = re.compile(r'\*\*Translation Notes:\*\*.*', re.DOTALL)
+_NOTE_PAREN_RE = re.compile(r'\(Note:.*?\)', re.DOTALL)
+_NOTE_LINE_RE = re.compile(r'^\s*Note:.*$', re.MULTILINE)
+_NOTES_RE = re.compile(r'Translation Notes:.*', re.DOTALL)
+# 위 패턴은 전부 "<think>" 또는 "Note" 가 있어야 걸림 → 둘 다 없는 응답(대부분)은 정규식을 돌리지 않음
+_CLEAN_TRIGGERS = ("<think>", "Note")
+
+# 모델이 변형한 배치 마커 (SPIT_ / SPLlT_ / SPLIT 뒤 공백·밑줄 변형) 를 한 번에 보정
+_MARKER_FIX_RE = re.compile(r'#BATCH[_\s]*SP(?:IT_|LLT_|LIT[_\s]*)(\d+)#', re.IGNORECASE)
+
+# 플레이스홀더는 {n} (예전 __PH_n__ 은 한 개에 5토큰 정도, {n} 은 2~3토큰).
+# 원문에 원래 있던 {0} 같은 문자열도 보호 대상이라 복원할 때 헷갈리지 않음
+_TOKEN_RE = re.compile(
+    r'(\{\d+\}|#BATCH_SPLIT_\d+#|#n|#!ALB\([^)]*\)|<color=[^>]*?>|</color>|――|——|—|[｢｣【】〈〉《》“”‘’"])'
+)
+_PLACEHOLDER_RE = re.compile(r'\{\d+\}')
+# 보호하지 않고 그대로 보내는 문자 (모델이 거의 항상 그대로 옮김, 개수로 확인)
+PLAIN_CHARS = "「」『』"
+_NEWLINE_MARK_RE = re.compile(r'#n')
+
+# 비동기 모드 + cpu_workers 일 때 이 글자 수 이상인 CPU 단계만 프로세스 풀로 넘김
+CPU_OFFLOAD_CHARS = 20000
+
+# 용어집 버전 -> 컴파일된 GlossaryMatcher (같은 프로세스 안의 Translator 끼리 공유)
+_MATCHERS = {}
+
+
+# ---------------------------
+# 유틸 함수들
+# ---------------------------
+def clean_translation(result: str) -> str:
+    """모델 응답에서 불필요한 태그/주석/설명 제거 (강화 버전)"""
+    if not result:
+        return ""
+    if not any(trigger in result for trigger in _CLEAN_TRIGGERS):
+        return result.strip()
+
+    text = result
+
+    # <think>...</think> 블록 제거
+    text = _THINK_RE.sub('', text)
+
+    # "**Translation Notes:**" 이후 전부 제거
+    text = _NOTES_BOLD_RE.sub('', text)
+
+    # "(Note: ...)" 같은 괄호 주석 제거
+    text = _NOTE_PAREN_RE.sub('', text)
+
+    # 줄 단위에서 "Note:" 로 시작하는 문장 제거
+    text = _NOTE_LINE_RE.sub('', text)
+
+    # "Translation Notes:" 단독 패턴도 제거
+    text = _NOTES_RE.sub('', text)
+
+    return text.strip()
+
+def fix_batch_markers(text: str) -> str:
+    """모델이 #BATCH_SPLIT_x# 을 변형했을 때 보정"""
+    text = text.replace('＃', '#')  # fullwidth # -> #
+    return _MARKER_FIX_RE.sub(r'#BATCH_SPLIT_\1#', text)
+
+
+def glossary_matcher_for(glossary: dict) -> GlossaryMatcher:
+    """용어집을 trie 로 컴파일 (같은 내용이면 프로세스 안에서 한 번만)"""
+    version = glossary_version(glossary)
+    matcher = _MATCHERS.get(version)
+    if matcher is None:
+        matcher = _MATCHERS[version] = GlossaryMatcher(glossary)
+    return matcher
+
+
+def glossary_terms_of(glossary: dict):
+    """원문 → 실제로 걸리는 용어집 항목 {jp: kr} 을 돌려주는 함수 (preprocess 와 같은 기준, 매니페스트 비교용)"""
+    matcher = glossary_matcher_for(glossary)
+
+    def terms_of(text) -> dict:
+        if not text:
+            return {}
+        protected, _ = protect_text(str(text))
+        return {jp: glossary[jp] for jp in matcher.terms_in(protected)}
+
+    return terms_of
+
+
+# ---------------------------
+# 플레이스홀더 기반 전처리/후처리 (수정)
+# ---------------------------
+def protect_text(text: str):
+    """특수문자/마커를 {n} 으로 바꿔 둔다. 반환: (보호된 텍스트, {플레이스홀더: 원래 문자열})"""
+    text = text or ""
+    text = text.strip()
+
+    placeholders = {}
+    counter = 0
+
+    def _repl(m):
+        nonlocal counter
+        key = f"{{{counter}}}"
+        placeholders[key] = m.group(0)
+        counter += 1
+        return key
+
+    return _TOKEN_RE.sub(_repl, text), placeholders
+
+
+def preprocess_text(text: str, glossary_matcher: GlossaryMatcher = None):
+    protected, placeholders = protect_text(text)
+
+    # glossary 적용 (trie 최장 일치, 한 번에 치환)
+    if glossary_matcher is not None:
+        protected = glossary_matcher.replace(protected)
+
+    return protected, placeholders
+
+
+def postprocess_text(text: str, placeholders: dict):
+    # {n} 을 한 번에 원래 특수문자로 복원 (모델이 지어낸 번호는 제거)
+    text = _PLACEHOLDER_RE.sub(lambda m: placeholders.get(m.group(0), ''), text)
+    return text.strip()
+
+
+def placeholder_mismatches(fragment: str, pre_text: str) -> int:
+    """번역 조각에서 빠지거나 더 생긴 플레이스홀더 / 보호 안 한 괄호 수 (0 이면 전부 그대로 돌아옴)"""
+    expected = Counter(_PLACEHOLDER_RE.findall(pre_text))
+    got = Counter(_PLACEHOLDER_RE.findall(fragment))
+    mismatches = sum(((expected - got) + (got - expected)).values())
+    for c in PLAIN_CHARS:
+        mismatches += abs(pre_text.count(c) - fragment.count(c))
+    return mismatches
+
+
+# ---------------------------
+# 구조 복원 (#n 개수 맞추기 등)
+# ---------------------------
+def restore_structure(translated: str, source: str) -> str:
+    source_n_count = source.count("#n")
+    translated_n_count = translated.count("#n")
+    if translated_n_count > source_n_count:
+        translated = _NEWLINE_MARK_RE.sub('', translated, count=(translated_n_count - source_n_count))
+    elif translated_n_count < source_n_count:
+        translated += "#n" * (source_n_count - translated_n_count)
+    # 중복 문장 제거 (처음 나온 순서 유지, dict 로 O(n) - 리스트 in 검사는 긴 대본에서 O(n²))
+    return "#n".join(dict.fromkeys(s for s in (s.strip() for s in translated.split("#n")) if s))
+
+
+# ---------------------------
+# CPU 단계 (프로세스 풀에 넘길 수 있도록 모듈 함수, 인자/반환은 전부 pickle 가능)
+# ---------------------------
+def extract_text(result: str) -> str:
+    """모델 응답 → 정리된 번역 (clean_translation + fix_batch_markers)"""
+    return fix_batch_markers(clean_translation(result))
+
+
+def finish_text(fragment: str, placeholders: dict, source) -> str:
+    """번역 조각 → 최종 번역 (플레이스홀더 복원 + 구조 복원)"""
+    return restore_structure(postprocess_text(fragment, placeholders), source)
+
+
+def finish_texts(items, check: bool = False) -> list:
+    """
+    [(조각, 플레이스홀더, 원문), ...] 를 한 번에 처리 (프로세스 풀에 배치 하나씩 넘기는 단위)
+    check=True 면 [(최종 번역, 품질 검사 실패 여부), ...]
+    """
+    if not check:
+        return [finish_text(*item) for item in items]
+    from filter_ai import is_translation_broken_final
+    return [(text, is_translation_broken_final(text)) for text in (finish_text(*item) for item in items)]
+
+
+def marked_input(pre_texts) -> str:
+    return "\n".join(f"#BATCH_SPLIT_{j}#\n{text}" for j, text in enumerate(pre_texts))
+
+
+# ---------------------------
+# 요청 메시지 / 오류 분류
+# ---------------------------
+def build_messages(batch_text: str, fallback: bool = False, strict: bool = False) -> list:
+    """
+    배치 텍스트로 요청 메시지 구성
+    - fallback=True : content_filter 회피용 간소화 프롬프트
+    - strict=True   : 품질 검사 실패 문장 재요청용 (일본어 잔존/주석 금지 강조)
+    """
+    from azure.ai.inference.models import SystemMessage, UserMessage
+
+    if fallback:
+        fallback_prompt = (
+            f"{batch_text}\n\n"
+            "Translate to Korean. Keep English unchanged. "
+            "Do not change placeholders or markers. "
+            "Output only translated text."
+        )
+        return [SystemMessage(content="Translate text to Korean. Keep placeholders unchanged."),
+                UserMessage(content=fallback_prompt)]
+
+    user_prompt = (
+        f"{batch_text}\n\n"
+        "Translate the content to Korean. Leave any English text unchanged. "
+        "Do NOT change tokens that look like {<number>} or #BATCH_SPLIT_<number># or markers like #n, #!ALB(...), <color=...>. "
+        "Keep every {<number>} token exactly once, and keep 「」『』 brackets exactly as in the original. "
+        "Output only the translated content; do not add explanations or notes."
+    )
+    if strict:
+        user_prompt += (
+            " Every Japanese word, including katakana names and terms, must be written in Korean (Hangul); "
+            "no hiragana or katakana may remain. Never write notes, comments, or the words 'Note' or 'translation'."
+        )
+
+    system_msg = SystemMessage(content=(
+        "You are a professional translator. Translate Japanese/Chinese to Korean. "
+        "Keep English text unchanged. Do not modify placeholders or special markers. "
+        "Return ONLY the translated text. Do not include explanations, notes, or comments."
+    ))
+    return [system_msg, UserMessage(content=user_prompt)]
+
+
+def is_rate_limited(e: Exception) -> bool:
+    s = str(e)
+    return "429" in s or "Too Many Requests" in s
+
+
+def is_content_filtered(e: Exception) -> bool:
+    s = str(e)
+    return "ResponsibleAIPolicyViolation" in s or "content_filter" in s
+
+
+def is_endpoint_failure(e: Exception) -> bool:
+    """요청 문제가 아니라 엔드포인트 자체의 장애 (연결 실패/타임아웃, 5xx, 키/배포 오류) → 다른 엔드포인트로"""
+    from asyncio import TimeoutError as AsyncTimeoutError
+    from azure.core.exceptions import ServiceRequestError, ServiceResponseError
+
+    if isinstance(e, (ServiceRequestError, ServiceResponseError, AsyncTimeoutError, OSError)):
+        return True
+    status = getattr(e, "status_code", None)
+    return status is not None and (status >= 500 or status in (401, 403, 404, 408))
+
+
+def valid_response(content) -> bool:
+    """헤지에서 이긴 것으로 칠 응답 (비어 있지 않은 텍스트)"""
+    return bool(content and content.strip())
+
+
+# ---------------------------
+# 배치 구성 / 입력
+# ---------------------------
+class Batch:
+    """배치 하나의 입력 정보. 같은 preprocess 결과는 슬롯 하나로 묶어서 한 번만 요청한다."""
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.pre_texts = []   # 슬롯별 preprocess_text 결과
+        self.members = []     # 슬롯별 [(key, placeholders), ...] (첫 번째가 대표, 나머지는 중복 문장)
+        self.results = {}     # 요청 없이 바로 끝난 결과 (빈 문자열, 번역 메모리 적중)
+        self.waiting = []     # (key, placeholders, future): 다른 배치가 요청 중인 같은 문장
+
+
+def open_source(json_data, translated_data, skip=()):
+    """
+    json_data: dict 또는 (key, value) iterator (json_stream.iter_json_object)
+    skip     : 번역하지 않을 키 (증분 모드에서 바뀌지 않은 키)
+    반환: (sources, pending)
+      - sources : 읽은 만큼 채워지는 {key: 원문}
+      - pending : 아직 번역 안 된 키 generator (입력을 읽는 즉시 첫 배치 시작 가능)
+    """
+    pairs = json_data.items() if isinstance(json_data, dict) else json_data
+    sources = {}
+
+    def pending():
+        for key, value in pairs:
+            sources[key] = value
+            if key not in translated_data and key not in skip:
+                yield key
+
+    return sources, pending()
+
+
+# ---------------------------
+# 설정
+# ---------------------------
+class TranslatorConfig:
+    def __init__(self, token_path, output_path, glossary_path=None, tm_path=None,
+                 checkpoint_path=None, journal_path=None, dead_letter_path=None, metrics_path=None,
+                 metrics_port=0, manifest_path=None, manifest_prune=False, store_path=None, prompt_version=PROMPT_VERSION,
+                 concurrency=4, max_rpm=60,
+                 max_tpm=120000, max_retries=8, max_tokens=4096, max_batch_items=40, batch_token_budget=2800,
+                 stream=False, cpu_workers=0, hedge_percentile=0.0, hedge_max_share=0.05):
+        """
+        token_path         : endpoint / key / api_version / model 4줄 (빈 줄로 구분해서 여러 개 → 분산 + 장애 조치)
+        output_path        : 최종 출력 JSON. checkpoint/journal/dead_letter 경로는 안 주면 여기서 만듦
+        glossary_path      : {"JP_TO_KR": {...}} 용어집 (None 이면 용어집 없음)
+        tm_path            : 번역 메모리 SQLite (None 이면 출력 파일 옆 .tm.sqlite)
+        metrics_path       : 단계별 계측 스냅샷 JSONL (None 이면 기록 안 함)
+        metrics_port       : Prometheus /metrics 포트 (0 이면 안 띄움, 둘 다 끄면 계측 비용 거의 0)
+        manifest_path      : 증분 번역 매니페스트 SQLite (None 이면 매번 입력 전체를 번역)
+        manifest_prune     : 입력에 없는 키를 매니페스트에서 삭제 (입력이 전체 덤프일 때만 켤 것,
+                             일부만 다시 번역하는 입력이면 나머지 키가 모두 지워짐)
+        store_path         : 프로젝트 저장소 SQLite (project_store.py). 주면 배치마다 결과를 바로 기록하고
+                             output_path 에 출력 JSON 을 쓰지 않음 (None 이면 예전처럼 출력 JSON)
+        prompt_version     : 프롬프트(build_messages)를 바꾸면 올릴 것 → 번역 메모리 키가 달라짐
+        concurrency        : 동시에 요청할 배치 수 (1 이면 직렬 모드)
+        max_rpm / max_tpm  : 배포 쿼터 (엔드포인트별 기본값, 토큰 파일에서 엔드포인트마다 바꿀 수 있음)
+        max_retries        : 요청 하나의 재시도 최대 횟수
+        max_batch_items    : 배치 하나에 넣을 최대 문장 수
+        batch_token_budget : 배치 하나의 예상 출력 토큰 상한 (max_tokens 보다 여유 있게)
+        stream             : 스트리밍으로 받으면서 출력이 비정상적으로 길어지거나 해설이 시작되면 조기 중단
+        cpu_workers        : 비동기 모드에서 응답 정리 / 후처리 / 품질 검사를 돌릴 프로세스 수
+                             (0 이면 이벤트 루프에서 바로 처리, 큰 대본에서 요청 스케줄링이 멈추면 켤 것)
+        hedge_percentile   : 요청이 최근 지연 시간의 이 분위수 안에 안 끝나면 같은 요청을 하나 더 보냄
+                             (가능하면 다른 엔드포인트로, 먼저 온 응답 사용, 0 이면 헤지 안 함, hedging.py)
+        hedge_max_share    : 전체 요청 수 대비 헤지 요청 비율 상한
+        """
+        self.token_path = token_path
+        self.output_path = output_path
+        self.glossary_path = glossary_path
+        self.tm_path = tm_path or output_path + ".tm.sqlite"
+        # 확장자를 떼고 붙임 (.json 이 아닌 출력 경로에서 저널 = 출력 파일이 되면 compact 가 결과를 지움)
+        stem = os.path.splitext(output_path)[0]
+        self.checkpoint_path = checkpoint_path or stem + "_checkpoint.json"  # 예전 형식
+        self.journal_path = journal_path or stem + "_journal.jsonl"
+        self.dead_letter_path = dead_letter_path or stem + "_dead_letter.jsonl"
+        for name in ("checkpoint_path", "journal_path", "dead_letter_path"):
+            if os.path.abspath(getattr(self, name)) == os.path.abspath(output_path):
+                raise ValueError(f"{name} 가 output_path 와 같음: {output_path}")
+        self.metrics_path = metrics_path
+        self.metrics_port = metrics_port
+        self.manifest_path = manifest_path
+        self.manifest_prune = manifest_prune
+        self.store_path = store_path
+        self.prompt_version = prompt_version
+        self.concurrency = concurrency
+        self.max_rpm = max_rpm
+        self.max_tpm = max_tpm
+        self.max_retries = max_retries
+        self.max_tokens = max_tokens
+        self.max_batch_items = max_batch_items
+        self.batch_token_budget = batch_token_budget
+        self.stream = stream
+        self.cpu_workers = cpu_workers
+        self.hedge_percentile = hedge_percentile
+        self.hedge_max_share = hedge_max_share
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+# ---------------------------
+# 번역기
+# ---------------------------
+class Translator:
+    # 처음 쓸 때 만드는 상태 (pickle 할 때는 버림)
+    _LAZY = ("_endpoint_pool", "_glossary_matcher", "_translation_memory", "_metrics", "_manifest", "_project_store",
+             "_cpu_pool", "_hedge_executor")
+
+    def __init__(self, config: TranslatorConfig, glossary: dict = None, metrics: Metrics = None):
+        """
+        glossary : 용어집 dict 를 직접 줄 때 (None 이면 config.glossary_path 를 처음 쓸 때 읽음)
+        metrics  : 계측 객체를 직접 줄 때 (None 이면 config.metrics_path / metrics_port 로 처음 쓸 때 만듦)
+        """
+        self.config = config
+        self._glossary = glossary
+        self._endpoint_pool = None
+        self._glossary_matcher = None
+        self._translation_memory = None
+        self._metrics = metrics
+        self._manifest = None
+        self._project_store = None
+        self._cpu_pool = None
+        self._hedge_executor = None
+        self._stragglers = []   # 헤지에서 져서 아직 끝나지 않은 동기 요청 (엔드포인트, future, 예약 토큰, 시도 번호)
+        self._prepared = {}   # make_batches 에서 잰 key -> (원문, preprocess 결과), build_batch 에서 꺼내 씀
+        self.recovery_stats = RecoveryStats()
+        self.quality_gate = QualityGate(config.dead_letter_path)
+        self.hedge_policy = (HedgePolicy(config.hedge_percentile, config.hedge_max_share)
+                             if config.hedge_percentile else None)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        for name in self._LAZY:
+            state[name] = None
+        state["_prepared"] = {}
+        state["_stragglers"] = []
+        return state
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    # ---- 처음 쓸 때 만드는 것들 ----
+    @property
+    def endpoint_pool(self) -> EndpointPool:
+        # 엔드포인트마다 속도 제한기와 서킷 브레이커가 따로 있음, 모든 요청이 공유
+        if self._endpoint_pool is None:
+            self._endpoint_pool = EndpointPool(
+                load_endpoints(self.config.token_path, self.config.max_rpm, self.config.max_tpm))
+        return self._endpoint_pool
+
+    @property
+    def glossary(self) -> dict:
+        if self._glossary is None:
+            if self.config.glossary_path:
+                with open(self.config.glossary_path, "r", encoding="utf-8") as f:
+                    self._glossary = json.load(f).get("JP_TO_KR", {})
+            else:
+                self._glossary = {}
+        return self._glossary
+
+    @property
+    def glossary_matcher(self) -> GlossaryMatcher:
+        if self._glossary_matcher is None:
+            self._glossary_matcher = glossary_matcher_for(self.glossary)
+        return self._glossary_matcher
+
+    @property
+    def translation_memory(self) -> TranslationMemory:
+        if self._translation_memory is None:
+            self._translation_memory = TranslationMemory(
+                self.config.tm_path, glossary_version(self.glossary), self.config.prompt_version)
+        return self._translation_memory
+
+    @property
+    def metrics(self) -> Metrics:
+        if self._metrics is None:
+            self._metrics = Metrics(self.config.metrics_path, self.config.metrics_port)
+        return self._metrics
+
+    @property
+    def manifest(self) -> TranslationManifest:
+        if self._manifest is None:
+            self._manifest = TranslationManifest(self.config.manifest_path)
+        return self._manifest
+
+    @property
+    def project_store(self) -> ProjectStore:
+        if self._project_store is None:
+            self._project_store = ProjectStore(self.config.store_path)
+        return self._project_store
+
+    @property
+    def cpu_pool(self):
+        # 모듈 함수만 넘기므로 spawn (Windows) 에서도 번역기 상태를 복사하지 않음
+        if self._cpu_pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+            self._cpu_pool = ProcessPoolExecutor(max_workers=self.config.cpu_workers)
+        return self._cpu_pool
+
+    @property
+    def hedge_executor(self):
+        # 직렬 모드 헤지: 주 요청 / 헤지 요청을 스레드에서 돌리고 메인 스레드는 먼저 끝난 쪽을 기다림
+        # (진 요청이 응답을 기다리며 스레드를 잡고 있어도 새 요청이 밀리지 않게 넉넉하게)
+        if self._hedge_executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="hedge")
+        return self._hedge_executor
+
+    def make_client(self, ep, asynchronous: bool = False):
+        """엔드포인트 하나의 azure.ai.inference 클라이언트 (asynchronous=True 면 aio 버전)"""
+        from azure.core.credentials import AzureKeyCredential
+        if asynchronous:
+            from azure.ai.inference.aio import ChatCompletionsClient
+        else:
+            from azure.ai.inference import ChatCompletionsClient
+
+        # 엔드포인트가 여러 개면 SDK 자체 재시도는 끄고 이쪽에서 다른 엔드포인트로 넘김
+        # (죽은 엔드포인트에서 SDK 가 백오프하며 재시도하는 동안 배치가 묶여 있지 않도록)
+        options = {} if len(self.endpoint_pool) == 1 else {"retry_total": 0}
+        return ChatCompletionsClient(
+            endpoint=ep.endpoint,
+            credential=AzureKeyCredential(ep.key),
+            api_version=ep.api_version,
+            **options
+        )
+
+    def client_for(self, ep):
+        """동기 클라이언트 (엔드포인트마다 처음 요청할 때 생성해서 재사용)"""
+        if ep.client is None:
+            ep.client = self.make_client(ep)
+        return ep.client
+
+    def close(self):
+        """만들어 둔 클라이언트 / 번역 메모리 / 매니페스트 / 프로젝트 저장소 / 프로세스 풀 / 헤지 스레드를 정리 (계측은 batch_translate 끝에서 닫힘)"""
+        if self._endpoint_pool is not None:
+            for ep in self._endpoint_pool:
+                if ep.client is not None:
+                    ep.client.close()
+                    ep.client = None
+        if self._translation_memory is not None:
+            self._translation_memory.close()
+            self._translation_memory = None
+        if self._manifest is not None:
+            self._manifest.close()
+            self._manifest = None
+        if self._project_store is not None:
+            self._project_store.close()
+            self._project_store = None
+        if self._cpu_pool is not None:
+            self._cpu_pool.shutdown()
+            self._cpu_pool = None
+        if self._hedge_executor is not None:
+            # 진 요청이 아직 응답을 기다리는 중일 수 있음 → 기다리지 않음 (결과는 버림)
+            self._hedge_executor.shutdown(wait=False)
+            self._hedge_executor = None
+            self._stragglers = []
+
+    # ---- 텍스트 처리 ----
+    def preprocess(self, text: str):
+        protected, placeholders = protect_text(text)
+        with self.metrics.timer("glossary"):
+            protected = self.glossary_matcher.replace(protected)
+        return protected, placeholders
+
+    def extract_result(self, result: str) -> str:
+        with self.metrics.timer("clean_translation"):
+            result = clean_translation(result)
+        with self.metrics.timer("fix_batch_markers"):
+            result = fix_batch_markers(result)
+        return result
+
+    def finish_fragment(self, fragment: str, placeholders: dict, source) -> str:
+        with self.metrics.timer("postprocess"):
+            fragment = postprocess_text(fragment, placeholders)
+        with self.metrics.timer("restore_structure"):
+            return restore_structure(fragment, source)
+
+    def offload_cpu(self, size: int) -> bool:
+        """
+        글자 수 size 의 CPU 단계를 프로세스 풀로 넘길지 (비동기 모드).
+        작은 입력은 프로세스 간 전달 비용이 더 커서 이벤트 루프에서 바로 처리
+        """
+        return self.config.cpu_workers > 0 and size >= CPU_OFFLOAD_CHARS
+
+    async def run_cpu(self, func, *args):
+        """프로세스 풀에서 func(*args) 실행. 기다리는 동안 이벤트 루프는 다른 배치의 요청을 계속 보냄"""
+        import asyncio
+        self.metrics.inc("cpu_offloads")
+        with self.metrics.timer("cpu_offload"):
+            return await asyncio.get_running_loop().run_in_executor(self.cpu_pool, func, *args)
+
+    async def extract_result_async(self, result: str) -> str:
+        if not self.offload_cpu(len(result)):
+            return self.extract_result(result)
+        return await self.run_cpu(extract_text, result)
+
+    # ---- 번역 요청 (단일 배치) ----
+    def estimate_request_tokens(self, batch_text: str) -> int:
+        """속도 제한기에 예약할 토큰 수 (입력 + 예상 출력 + 프롬프트)"""
+        return (estimate_tokens(batch_text) + min(estimate_output_tokens(batch_text), self.config.max_tokens)
+                + PROMPT_TOKENS)
+
+    def record_success(self, ep, usage, reserved: int):
+        """usage: 응답의 토큰 사용량 (스트리밍을 중간에 끊었으면 None → 예약한 토큰을 그대로 둠)"""
+        self.endpoint_pool.release(ep, ok=True)
+        ep.limiter.on_success()
+        if usage is not None and getattr(usage, "total_tokens", None):
+            ep.limiter.adjust_tokens(usage.total_tokens - reserved)
+            self.metrics.inc("prompt_tokens", usage.prompt_tokens or 0)
+            self.metrics.inc("completion_tokens", usage.completion_tokens or 0)
+            self.metrics.inc("total_tokens", usage.total_tokens)
+
+    def report_throttle(self, ep, e: Exception, attempt: int):
+        self.metrics.inc("throttled")
+        ep.throttles += 1
+        pause = ep.limiter.on_throttle(get_retry_after(e))
+        print(f"⚠️ 429 ({ep.name}) → {pause:.1f}s 대기, 속도 {ep.limiter.current_rpm:.0f} rpm 으로 조정 "
+              f"({attempt+1}/{self.config.max_retries})")
+
+    def handle_request_error(self, ep, e: Exception, attempt: int, failed: set, fallback: bool) -> str:
+        """
+        요청 실패 처리. 반환값:
+          "retry"    : 다시 요청 (429 는 같은/다른 엔드포인트, 장애는 다른 엔드포인트로)
+          "fallback" : content_filter → 간소화 프롬프트로 다시 요청
+          "give_up"  : 원문 반환
+        """
+        pool = self.endpoint_pool
+        if is_rate_limited(e):
+            pool.release(ep, ok=True)
+            self.report_throttle(ep, e, attempt)
+            return "retry"
+        if is_content_filtered(e):
+            pool.release(ep, ok=True)
+            if fallback:
+                print(f"⚠️ fallback 실패: {e}")
+                return "give_up"
+            print("⚠️ content_filter 발생 → 프롬프트 간소화 후 재시도")
+            self.metrics.inc("content_filter_fallbacks")
+            return "fallback"
+        if is_endpoint_failure(e):
+            pool.release(ep, ok=False)
+            self.metrics.inc("endpoint_failures")
+            failed.add(ep)
+            if len(failed) < len(pool):
+                pool.failovers += 1
+                self.metrics.inc("failovers")
+                print(f"⚠️ {ep.name} 장애 → 다른 엔드포인트로 재시도: {e}")
+                return "retry"
+        else:
+            pool.release(ep, ok=True)
+        print(f"⚠️ API 오류: {e}")
+        self.metrics.inc("api_errors")
+        return "give_up"
+
+    def request_kwargs(self, ep, batch_text: str, fallback: bool, strict: bool) -> dict:
+        return dict(
+            messages=build_messages(batch_text, fallback=fallback, strict=strict),
+            max_tokens=self.config.max_tokens,
+            temperature=0.0,
+            top_p=0.1,
+            model=ep.model
+        )
+
+    def stream_result(self, guard: StreamGuard, batch_text: str) -> str:
+        """스트리밍 결과. 조기 중단했으면 끝난 조각까지만 (마커 없는 요청에서 남는 게 없으면 원문 반환)"""
+        if guard.reason is None:
+            return guard.text
+        self.metrics.inc("stream_aborts")
+        self.metrics.inc(f"stream_abort_{guard.reason}")
+        result = guard.result()
+        if guard.marked:
+            print(f"✂️ 스트리밍 조기 중단 ({guard.reason}): "
+                  f"{len(guard.sources)}개 중 끝난 조각 {guard.finished_segments}개만 사용")
+            return result
+        print(f"✂️ 스트리밍 조기 중단 ({guard.reason})")
+        if not clean_translation(result):
+            self.metrics.inc("source_returns")
+            return batch_text
+        return result
+
+    def request_completion(self, client, ep, batch_text: str, fallback: bool, strict: bool, cancel=None):
+        """요청 하나 → (응답 텍스트, usage). cancel(threading.Event) 이 켜지면 스트리밍을 멈춤 (헤지에서 진 요청)"""
+        kwargs = self.request_kwargs(ep, batch_text, fallback, strict)
+        if not self.config.stream:
+            response = client.complete(**kwargs)
+            return response.choices[0].message.content, getattr(response, "usage", None)
+
+        guard = StreamGuard(batch_text)
+        usage = None
+        response = client.complete(stream=True, **kwargs)
+        try:
+            for update in response:
+                if cancel is not None and cancel.is_set():
+                    break
+                usage = getattr(update, "usage", None) or usage
+                delta = update.choices[0].delta.content if update.choices else None
+                if delta and not guard.feed(delta):
+                    break
+        finally:
+            response.close()
+        return self.stream_result(guard, batch_text), usage
+
+    async def request_completion_async(self, aclient, ep, batch_text: str, fallback: bool, strict: bool):
+        """request_completion 의 비동기 버전"""
+        kwargs = self.request_kwargs(ep, batch_text, fallback, strict)
+        if not self.config.stream:
+            response = await aclient.complete(**kwargs)
+            return response.choices[0].message.content, getattr(response, "usage", None)
+
+        guard = StreamGuard(batch_text)
+        usage = None
+        response = await aclient.complete(stream=True, **kwargs)
+        try:
+            async for update in response:
+                usage = getattr(update, "usage", None) or usage
+                delta = update.choices[0].delta.content if update.choices else None
+                if delta and not guard.feed(delta):
+                    break
+        finally:
+            await response.aclose()
+        return self.stream_result(guard, batch_text), usage
+
+    # ---- 헤지 요청 (hedging.py) ----
+    def choose_hedge_endpoint(self, ep, failed):
+        """헤지 요청을 보낼 엔드포인트 (다른 곳 우선, 없으면 같은 곳). 보낼 곳이 없으면 None"""
+        pool = self.endpoint_pool
+        return pool.choose(set(failed) | {ep}) or pool.choose(failed)
+
+    def settle_request(self, ep, future, reserved: int, attempt: int):
+        """헤지에서 진 요청 정리 (끝난 뒤 엔드포인트 outstanding / 속도 제한기 / 브레이커 반영)"""
+        pool = self.endpoint_pool
+        e = None if future.cancelled() else future.exception()
+        if future.cancelled() or isinstance(e, HedgeCancelled):
+            pool.release(ep, ok=None)
+        elif e is None:
+            self.record_success(ep, future.result()[1], reserved)
+        elif is_rate_limited(e):
+            pool.release(ep, ok=True)
+            self.report_throttle(ep, e, attempt)
+        else:
+            pool.release(ep, ok=not is_endpoint_failure(e))
+
+    def settle_stragglers(self):
+        """직렬 모드: 헤지에서 진 요청 중 끝난 것을 정리 (엔드포인트 상태는 메인 스레드에서만 바꿈)"""
+        remaining = []
+        for ep, future, reserved, attempt in self._stragglers:
+            if future.done():
+                self.settle_request(ep, future, reserved, attempt)
+            else:
+                remaining.append((ep, future, reserved, attempt))
+        self._stragglers = remaining
+
+    def hedge_completion(self, client, ep, batch_text: str, fallback: bool, strict: bool, reserved: int, cancel):
+        """헤지 요청 (헤지 스레드에서 실행). 속도 제한기는 주 요청과 똑같이 거침"""
+        ep.limiter.acquire(reserved)
+        if cancel.is_set():
+            raise HedgeCancelled()
+        self.metrics.inc("requests")
+        return self.request_completion(client, ep, batch_text, fallback, strict, cancel)
+
+    def request_hedged(self, ep, batch_text: str, fallback: bool, strict: bool, reserved: int, attempt: int, failed):
+        """
+        request_completion + 헤지. 반환: (응답을 준 엔드포인트, 응답 텍스트, usage)
+        - 최근 지연 시간 분위수 안에 응답이 없으면 다른 엔드포인트(없으면 같은 곳)로 같은 요청을 하나 더 보냄
+        - 먼저 온 유효한(비어 있지 않은) 응답을 쓰고 나머지는 취소 (스트리밍은 다음 청크에서 끊김,
+          스트리밍이 아니면 응답이 올 때까지 스레드에 남았다가 결과를 버림)
+        - 이긴 쪽 엔드포인트는 호출한 쪽이 record_success, 진 쪽은 여기서 정리
+        - 둘 다 실패하면 ep 쪽 예외를 그대로 올림 → handle_request_error
+        """
+        from concurrent.futures import FIRST_COMPLETED, wait
+
+        hedge = self.hedge_policy
+        hedge.requests += 1
+        self.settle_stragglers()
+        started = time.monotonic()
+        delay = hedge.delay(reserved)
+        if delay is None:
+            content, usage = self.request_completion(self.client_for(ep), ep, batch_text, fallback, strict)
+            hedge.observe(time.monotonic() - started, reserved)
+            return ep, content, usage
+
+        cancel = threading.Event()
+        executor = self.hedge_executor
+        primary = executor.submit(self.request_completion, self.client_for(ep), ep, batch_text, fallback, strict,
+                                  cancel)
+        hedge_ep = None
+        if not wait([primary], timeout=delay)[0] and hedge.allow():
+            hedge_ep = self.choose_hedge_endpoint(ep, failed)
+        if hedge_ep is None:
+            content, usage = primary.result()
+            hedge.observe(time.monotonic() - started, reserved)
+            return ep, content, usage
+
+        hedge.hedged += 1
+        self.metrics.inc("hedged_requests")
+        secondary = executor.submit(self.hedge_completion, self.client_for(hedge_ep), hedge_ep, batch_text,
+                                    fallback, strict, reserved, cancel)
+        owners = {primary: ep, secondary: hedge_ep}
+        starts = {primary: started, secondary: time.monotonic()}
+        pending = set(owners)
+        winner = None
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in sorted(done, key=lambda f: f is not primary):
+                if future.exception() is None and valid_response(future.result()[0]):
+                    winner = future
+                    break
+        if pending:
+            cancel.set()
+            hedge.cancelled += len(pending)
+        winner = winner or primary
+        self._stragglers += [(owner, future, reserved, attempt) for future, owner in owners.items() if future is not winner]
+        self.settle_stragglers()
+
+        content, usage = winner.result()
+        if winner is secondary:
+            hedge.wins += 1
+            self.metrics.inc("hedge_wins")
+        hedge.observe(time.monotonic() - starts[winner], reserved)
+        return owners[winner], content, usage
+
+    async def hedge_completion_async(self, aclient, ep, batch_text: str, fallback: bool, strict: bool, reserved: int):
+        """hedge_completion 의 비동기 버전"""
+        await ep.limiter.acquire_async(reserved)
+        self.metrics.inc("requests")
+        return await self.request_completion_async(aclient, ep, batch_text, fallback, strict)
+
+    async def request_hedged_async(self, aclients, ep, batch_text: str, fallback: bool, strict: bool,
+                                   reserved: int, attempt: int, failed):
+        """request_hedged 의 비동기 버전 (진 쪽 요청은 task 를 취소 → 연결을 바로 끊음)"""
+        import asyncio
+
+        hedge = self.hedge_policy
+        hedge.requests += 1
+        started = time.monotonic()
+        primary = asyncio.ensure_future(self.request_completion_async(aclients[ep], ep, batch_text, fallback, strict))
+        owners = {primary: ep}
+        winner = None
+        try:
+            delay = hedge.delay(reserved)
+            hedge_ep = None
+            if delay is not None and not (await asyncio.wait({primary}, timeout=delay))[0] and hedge.allow():
+                hedge_ep = self.choose_hedge_endpoint(ep, failed)
+            if hedge_ep is None:
+                winner = primary
+                content, usage = await primary
+                hedge.observe(time.monotonic() - started, reserved)
+                return ep, content, usage
+
+            hedge.hedged += 1
+            self.metrics.inc("hedged_requests")
+            secondary = asyncio.ensure_future(self.hedge_completion_async(
+                aclients[hedge_ep], hedge_ep, batch_text, fallback, strict, reserved))
+            owners[secondary] = hedge_ep
+            starts = {primary: started, secondary: time.monotonic()}
+            pending = set(owners)
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=lambda t: t is not primary):
+                    if task.exception() is None and valid_response(task.result()[0]):
+                        winner = task
+                        break
+            winner = winner or primary
+
+            content, usage = winner.result()
+            if winner is secondary:
+                hedge.wins += 1
+                self.metrics.inc("hedge_wins")
+            hedge.observe(time.monotonic() - starts[winner], reserved)
+            return owners[winner], content, usage
+        finally:
+            # 진 쪽 (또는 이 코루틴이 취소됐으면 전부) 취소 → 끝나면 엔드포인트 정리
+            for task, owner in owners.items():
+                if task is winner:
+                    continue
+                if not task.done():
+                    task.cancel()
+                    hedge.cancelled += 1
+                task.add_done_callback(
+                    lambda t, owner=owner: self.settle_request(owner, t, reserved, attempt))
+
+    def translate_batch_text(self, batch_text: str, strict: bool = False) -> str:
+        metrics = self.metrics
+        pool = self.endpoint_pool
+        reserved = self.estimate_request_tokens(batch_text)
+        failed = set()      # 이 요청이 장애를 겪은 엔드포인트 (다시 고르지 않음)
+        fallback = False
+        for attempt in range(self.config.max_retries):
+            ep = pool.choose(failed)
+            if ep is None:
+                # 남은 엔드포인트가 모두 브레이커 open → 다시 열릴 때까지 대기
+                wait = pool.retry_in(failed)
+                if wait is None:
+                    break
+                time.sleep(wait)
+                continue
+            with metrics.timer("rate_limit_wait"):
+                ep.limiter.acquire(reserved)
+            metrics.inc("requests")
+            try:
+                with metrics.timer("api_call"):
+                    if self.hedge_policy is None:
+                        content, usage = self.request_completion(self.client_for(ep), ep, batch_text, fallback, strict)
+                    else:
+                        ep, content, usage = self.request_hedged(
+                            ep, batch_text, fallback, strict, reserved, attempt, failed)
+            except Exception as e:
+                action = self.handle_request_error(ep, e, attempt, failed, fallback)
+                if action == "give_up":
+                    metrics.inc("source_returns")
+                    return batch_text
+                fallback = fallback or action == "fallback"
+                continue
+            self.record_success(ep, usage, reserved)
+            return self.extract_result(content)
+        print("❌ 재시도 실패 → 원문 반환")
+        metrics.inc("source_returns")
+        return batch_text
+
+    async def translate_batch_text_async(self, aclients, batch_text: str, strict: bool = False) -> str:
+        """translate_batch_text 의 비동기 버전 (aclients: 엔드포인트 → azure.ai.inference.aio 클라이언트)"""
+        import asyncio
+
+        metrics = self.metrics
+        pool = self.endpoint_pool
+        reserved = self.estimate_request_tokens(batch_text)
+        failed = set()
+        fallback = False
+        for attempt in range(self.config.max_retries):
+            ep = pool.choose(failed)
+            if ep is None:
+                wait = pool.retry_in(failed)
+                if wait is None:
+                    break
+                await asyncio.sleep(wait)
+                continue
+            with metrics.timer("rate_limit_wait"):
+                await ep.limiter.acquire_async(reserved)
+            metrics.inc("requests")
+            try:
+                with metrics.timer("api_call"):
+                    if self.hedge_policy is None:
+                        content, usage = await self.request_completion_async(
+                            aclients[ep], ep, batch_text, fallback, strict)
+                    else:
+                        ep, content, usage = await self.request_hedged_async(
+                            aclients, ep, batch_text, fallback, strict, reserved, attempt, failed)
+            except Exception as e:
+                action = self.handle_request_error(ep, e, attempt, failed, fallback)
+                if action == "give_up":
+                    metrics.inc("source_returns")
+                    return batch_text
+                fallback = fallback or action == "fallback"
+                continue
+            self.record_success(ep, usage, reserved)
+            return await self.extract_result_async(content)
+        print("❌ 재시도 실패 → 원문 반환")
+        metrics.inc("source_returns")
+        return batch_text
+
+    # ---- 배치 구성 / 결과 처리 ----
+    def build_batch(self, json_data, batch_keys, inflight=None) -> Batch:
+        """
+        배치 입력 구성.
+        - 빈 문자열은 번역 없이 그대로 결과에 넣는다.
+        - 번역 메모리에 있는 문장은 API 를 부르지 않는다.
+        - inflight(비동기 모드): 다른 배치가 이미 요청 중인 문장은 그 결과를 기다려서 재사용
+        """
+        metrics = self.metrics
+        tm = self.translation_memory
+        batch = Batch(batch_keys)
+        slots = {}   # pre_text -> 슬롯 번호 (배치 안 중복)
+        if inflight is not None:
+            import asyncio
+            loop = asyncio.get_running_loop()
+
+        for key in batch_keys:
+            text = json_data.get(key, "")
+            if not text or not str(text).strip():
+                batch.results[key] = text
+                continue
+            prepared = self._prepared.pop(key, None)
+            if prepared is not None and prepared[0] == text:
+                pre_text, placeholders = prepared[1]
+            else:
+                with metrics.timer("preprocess"):
+                    pre_text, placeholders = self.preprocess(str(text))
+
+            if pre_text in slots:
+                batch.members[slots[pre_text]].append((key, placeholders))
+                tm.shared += 1
+                continue
+            if inflight is not None and pre_text in inflight:
+                batch.waiting.append((key, placeholders, inflight[pre_text]))
+                tm.shared += 1
+                continue
+            with metrics.timer("tm_lookup"):
+                cached = tm.get(pre_text)
+            if cached is not None:
+                batch.results[key] = self.finish_fragment(cached, placeholders, text)
+                continue
+
+            slots[pre_text] = len(batch.pre_texts)
+            batch.pre_texts.append(pre_text)
+            batch.members.append([(key, placeholders)])
+            if inflight is not None:
+                inflight[pre_text] = loop.create_future()
+
+        return batch
+
+    def collect_results(self, batch, json_data, fragments, rejected=(), finished=None) -> dict:
+        """
+        슬롯별 번역 조각 → 키별 최종 번역 (중복 키 포함). 번역된 조각은 번역 메모리에 저장.
+        rejected: 품질 검사를 끝내 통과하지 못한 슬롯 (번역 메모리에 저장하지 않음)
+        finished: 슬롯/키 순서대로 미리 만든 최종 번역 (finish_batch_async, None 이면 여기서 후처리)
+        """
+        results = batch.results
+        finished = iter(finished) if finished is not None else None
+        for idx, fragment in enumerate(fragments):
+            for key, placeholders in batch.members[idx]:
+                if finished is not None:
+                    results[key] = next(finished)
+                else:
+                    results[key] = self.finish_fragment(fragment, placeholders, json_data[key])
+        # API 오류로 원문이 그대로 돌아온 조각은 저장하지 않음
+        with self.metrics.timer("tm_store"):
+            self.translation_memory.put_many(
+                (pre_text, fragment) for idx, (pre_text, fragment) in enumerate(zip(batch.pre_texts, fragments))
+                if fragment != pre_text and idx not in rejected
+            )
+        return results
+
+    def broken_slots(self, batch, json_data, fragments, slots) -> list:
+        """
+        품질 검사에 걸리는 슬롯 목록
+        - 플레이스홀더 / 「」『』 가 그대로 돌아오지 않은 조각 (예전에는 조용히 지워졌음)
+        - 후처리까지 끝낸 결과가 filter_ai 기준에 걸리는 조각
+        """
+        bad = []
+        for idx in slots:
+            key, placeholders = batch.members[idx][0]
+            if placeholder_mismatches(fragments[idx], batch.pre_texts[idx]):
+                self.metrics.inc("placeholder_mismatches")
+                bad.append(idx)
+                continue
+            translated = self.finish_fragment(fragments[idx], placeholders, json_data[key])
+            with self.metrics.timer("quality_check"):
+                if self.quality_gate.is_broken(translated):
+                    bad.append(idx)
+        return bad
+
+    async def broken_slots_async(self, batch, json_data, fragments, slots) -> list:
+        """broken_slots 의 비동기 버전 (큰 배치는 후처리 + 품질 검사를 프로세스 풀에서)"""
+        slots = list(slots)
+        items = [(fragments[idx], batch.members[idx][0][1], json_data[batch.members[idx][0][0]]) for idx in slots]
+        if not self.offload_cpu(sum(len(item[0]) for item in items)):
+            return self.broken_slots(batch, json_data, fragments, slots)
+        checked = await self.run_cpu(finish_texts, items, True)
+        bad = []
+        for idx, (_, broken) in zip(slots, checked):
+            if placeholder_mismatches(fragments[idx], batch.pre_texts[idx]):
+                self.metrics.inc("placeholder_mismatches")
+                bad.append(idx)
+            elif broken:
+                bad.append(idx)
+        return bad
+
+    async def finish_batch_async(self, batch, json_data, fragments):
+        """collect_results 에 넘길 최종 번역을 프로세스 풀에서 미리 만듦 (작은 배치면 None → collect_results 에서)"""
+        items = [(fragment, placeholders, json_data[key])
+                 for idx, fragment in enumerate(fragments) for key, placeholders in batch.members[idx]]
+        if not self.offload_cpu(sum(len(item[0]) for item in items)):
+            return None
+        return await self.run_cpu(finish_texts, items)
+
+    def reject_slots(self, batch, json_data, fragments, bad) -> set:
+        """끝까지 품질 검사를 통과하지 못한 슬롯은 dead-letter 에 기록 (결과에는 마지막 번역을 그대로 둠)"""
+        for idx in bad:
+            rule = "placeholder" if placeholder_mismatches(fragments[idx], batch.pre_texts[idx]) else None
+            for key, placeholders in batch.members[idx]:
+                self.quality_gate.dead_letter(
+                    key, json_data[key], self.finish_fragment(fragments[idx], placeholders, json_data[key]), rule)
+        if bad:
+            self.metrics.inc("dead_letters", len(bad))
+            print(f"☠️ 품질 검사 실패 {len(bad)}개 → dead-letter 기록: {self.config.dead_letter_path}")
+        return set(bad)
+
+    def enforce_quality(self, batch, json_data, fragments) -> set:
+        """
+        품질 검사 실패 조각을 같은 실행 안에서 재요청.
+        1단계: 실패한 것끼리 묶어서 strict 프롬프트, 2단계 이후: 하나씩 strict 프롬프트.
+        끝까지 실패한 슬롯 번호 집합을 반환.
+        """
+        gate = self.quality_gate
+        gate.checked += len(fragments)
+        bad = self.broken_slots(batch, json_data, fragments, range(len(fragments)))
+        gate.failed += len(bad)
+        self.metrics.inc("quality_failures", len(bad))
+        first_bad = len(bad)
+
+        for attempt in range(gate.max_attempts):
+            if not bad or not gate.allow_retry(len(bad)):
+                break
+            if attempt == 0 and len(bad) > 1:
+                sources = [batch.pre_texts[i] for i in bad]
+                output = fix_batch_markers(self.translate_batch_text(marked_input(sources), strict=True))
+                for j, segment in parse_marked_segments(output, sources).items():
+                    fragments[bad[j]] = segment
+            else:
+                for idx in bad:
+                    fragments[idx] = fix_batch_markers(self.translate_batch_text(batch.pre_texts[idx], strict=True))
+            bad = self.broken_slots(batch, json_data, fragments, bad)
+
+        gate.recovered += first_bad - len(bad)
+        return self.reject_slots(batch, json_data, fragments, bad)
+
+    async def enforce_quality_async(self, aclients, batch, json_data, fragments) -> set:
+        """enforce_quality 의 비동기 버전"""
+        gate = self.quality_gate
+        gate.checked += len(fragments)
+        bad = await self.broken_slots_async(batch, json_data, fragments, range(len(fragments)))
+        gate.failed += len(bad)
+        self.metrics.inc("quality_failures", len(bad))
+        first_bad = len(bad)
+
+        for attempt in range(gate.max_attempts):
+            if not bad or not gate.allow_retry(len(bad)):
+                break
+            if attempt == 0 and len(bad) > 1:
+                sources = [batch.pre_texts[i] for i in bad]
+                output = fix_batch_markers(
+                    await self.translate_batch_text_async(aclients, marked_input(sources), strict=True))
+                for j, segment in parse_marked_segments(output, sources).items():
+                    fragments[bad[j]] = segment
+            else:
+                for idx in bad:
+                    fragments[idx] = fix_batch_markers(
+                        await self.translate_batch_text_async(aclients, batch.pre_texts[idx], strict=True))
+            bad = await self.broken_slots_async(batch, json_data, fragments, bad)
+
+        gate.recovered += first_bad - len(bad)
+        return self.reject_slots(batch, json_data, fragments, bad)
+
+    def load_checkpoint(self, journal, total):
+        """저널 replay. 예전 형식 체크포인트(checkpoint_path)가 남아 있으면 저널로 옮긴다."""
+        translated_data = journal.replay()
+        checkpoint_path = self.config.checkpoint_path
+
+        if os.path.exists(checkpoint_path):
+            with open(checkpoint_path, "r", encoding="utf-8-sig") as f:
+                legacy = json.load(f).get("data", {})
+            journal.append({k: v for k, v in legacy.items() if k not in translated_data})
+            journal.sync()
+            legacy.update(translated_data)
+            translated_data = legacy
+            os.remove(checkpoint_path)
+
+        if translated_data:
+            print(f"🔄 체크포인트 불러오기: {len(translated_data)}/{total}")
+        return translated_data
+
+    def translate_fragments(self, batch) -> list:
+        """
+        슬롯별 번역 조각 목록.
+        분할 불일치 시 번호/내용이 멀쩡한 조각은 살리고 빠진 번호만 다시 묶어서 요청
+        (한 조각도 못 살리면 반으로 나눠서 요청, 1개만 남으면 개별 번역)
+        """
+        fragments = [None] * len(batch.pre_texts)
+
+        def request(slots, first=False) -> list:
+            """slots 를 한 번에 요청하고, 못 살린 슬롯 목록을 반환 (재요청 1개짜리는 마커 없이 개별 번역)"""
+            if len(slots) == 1 and not first:
+                self.metrics.inc("individual_fallbacks")
+                fragments[slots[0]] = fix_batch_markers(self.translate_batch_text(batch.pre_texts[slots[0]]))
+                return []
+            sources = [batch.pre_texts[i] for i in slots]
+            output = fix_batch_markers(self.translate_batch_text(marked_input(sources)))
+            segments = parse_marked_segments(output, sources)
+            for j, segment in segments.items():
+                fragments[slots[j]] = segment
+            return [slots[j] for j in range(len(slots)) if j not in segments]
+
+        missing = request(list(range(len(fragments))), first=True)
+        if not missing:
+            return fragments
+
+        print(f"⚠️ 분할 불일치: {len(fragments)}개 중 {len(missing)}개 누락/손상 → 해당 번호만 재요청")
+        self.metrics.inc("split_mismatches")
+        stats = self.recovery_stats
+        stats.salvaged += len(fragments) - len(missing)
+        calls = 0
+        individual = []   # 개별 번역까지 간 슬롯
+        queue = [missing]
+        while queue:
+            slots = queue.pop()
+            still_missing = request(slots)
+            calls += 1
+            if len(slots) > 1:
+                stats.salvaged += len(slots) - len(still_missing)
+            else:
+                individual.append(slots[0])
+            if len(still_missing) == len(slots):
+                # 하나도 못 살림 → 원인 문장을 찾을 때까지 반으로 나눔
+                half = len(slots) // 2
+                queue += [slots[half:], slots[:half]]
+            elif still_missing:
+                queue.append(still_missing)
+
+        stats.record(len(fragments), calls, individual)
+        return fragments
+
+    async def translate_fragments_async(self, aclients, batch) -> list:
+        """translate_fragments 의 비동기 버전"""
+        fragments = [None] * len(batch.pre_texts)
+
+        async def request(slots, first=False) -> list:
+            if len(slots) == 1 and not first:
+                self.metrics.inc("individual_fallbacks")
+                fragments[slots[0]] = fix_batch_markers(
+                    await self.translate_batch_text_async(aclients, batch.pre_texts[slots[0]]))
+                return []
+            sources = [batch.pre_texts[i] for i in slots]
+            output = fix_batch_markers(await self.translate_batch_text_async(aclients, marked_input(sources)))
+            segments = parse_marked_segments(output, sources)
+            for j, segment in segments.items():
+                fragments[slots[j]] = segment
+            return [slots[j] for j in range(len(slots)) if j not in segments]
+
+        missing = await request(list(range(len(fragments))), first=True)
+        if not missing:
+            return fragments
+
+        print(f"⚠️ 분할 불일치: {len(fragments)}개 중 {len(missing)}개 누락/손상 → 해당 번호만 재요청")
+        self.metrics.inc("split_mismatches")
+        stats = self.recovery_stats
+        stats.salvaged += len(fragments) - len(missing)
+        calls = 0
+        individual = []   # 개별 번역까지 간 슬롯
+        queue = [missing]
+        while queue:
+            slots = queue.pop()
+            still_missing = await request(slots)
+            calls += 1
+            if len(slots) > 1:
+                stats.salvaged += len(slots) - len(still_missing)
+            else:
+                individual.append(slots[0])
+            if len(still_missing) == len(slots):
+                half = len(slots) // 2
+                queue += [slots[half:], slots[:half]]
+            elif still_missing:
+                queue.append(still_missing)
+
+        stats.record(len(fragments), calls, individual)
+        return fragments
+
+    def translate_batch(self, json_data, batch_keys) -> dict:
+        """배치 하나를 번역해서 {key: 번역문} 반환 (키 순서 유지)"""
+        batch = self.build_batch(json_data, batch_keys)
+        fragments = []
+        rejected = set()
+        if batch.pre_texts:
+            fragments = self.translate_fragments(batch)
+            rejected = self.enforce_quality(batch, json_data, fragments)
+        results = self.collect_results(batch, json_data, fragments, rejected)
+        return {key: results[key] for key in batch_keys}
+
+    async def translate_batch_async(self, aclients, json_data, batch_keys, inflight) -> dict:
+        """translate_batch 의 비동기 버전. inflight 로 다른 배치와 같은 문장 요청을 공유한다."""
+        batch = self.build_batch(json_data, batch_keys, inflight)
+        fragments = []
+        rejected = set()
+        try:
+            if batch.pre_texts:
+                fragments = await self.translate_fragments_async(aclients, batch)
+                rejected = await self.enforce_quality_async(aclients, batch, json_data, fragments)
+        finally:
+            # 이 배치 결과를 기다리는 다른 배치들에게 전달 (실패 시 None → 원문 유지)
+            for idx, pre_text in enumerate(batch.pre_texts):
+                future = inflight.pop(pre_text)
+                future.set_result(fragments[idx] if idx < len(fragments) else None)
+        finished = await self.finish_batch_async(batch, json_data, fragments)
+        results = self.collect_results(batch, json_data, fragments, rejected, finished)
+
+        for key, placeholders, future in batch.waiting:
+            fragment = await future
+            if fragment is None:
+                results[key] = json_data[key]
+            else:
+                results[key] = self.finish_fragment(fragment, placeholders, json_data[key])
+        return {key: results[key] for key in batch_keys}
+
+    # ---- 증분 번역 (매니페스트) ----
+    def diff_source(self, json_data):
+        """
+        입력을 읽으면서 매니페스트와 비교 (입력 전체를 기다리지 않고 첫 배치 시작).
+        반환: ((key, value) iterator, ManifestDiff) - diff 는 iterator 를 읽는 만큼 채워짐
+        """
+        pairs = json_data.items() if isinstance(json_data, dict) else json_data
+        diff = ManifestDiff()
+        return self.manifest.diff_iter(pairs, glossary_terms_of(self.glossary), diff), diff
+
+    def finish_manifest(self, diff, sources, translated_data, merge: bool = True):
+        """
+        증분 모드 마무리: 매니페스트 갱신 후, 바뀌지 않은 키는 저장된 번역을 끼워 넣어 입력 순서대로 합침.
+        원문이 그대로 돌아온 것(API 실패)과 품질 검사 실패는 기록하지 않음 → 다음 비교 때 다시 번역.
+        merge=False 면 합치지 않고 None (프로젝트 저장소 모드, 바뀐 키는 이미 저장소에 있음)
+        """
+        stats = diff.as_dict()
+        print(f"🧾 매니페스트 비교: {stats['total']}개 중 {stats['changed']}개 번역 "
+              f"(새 키 {diff.reasons['new']}, 원문 변경 {diff.reasons['source']}, 용어집 변경 {diff.reasons['glossary']}), "
+              f"{stats['unchanged']}개 재사용, 입력에 없는 키 {stats['removed']}개")
+        self.metrics.inc("manifest_reused", len(diff.unchanged))
+        rows = []
+        for key, (source_h, glossary_h) in diff.changed.items():
+            translation = translated_data[key]
+            source = sources[key]
+            if (translation == source and str(source).strip()) or self.quality_gate.is_broken(translation):
+                continue
+            rows.append((key, source_h, glossary_h, translation))
+        self.manifest.update(rows)
+        if self.config.manifest_prune and diff.removed:
+            self.manifest.remove(diff.removed)
+            print(f"🧹 입력에 없는 키 {len(diff.removed)}개를 매니페스트에서 삭제")
+        if not merge:
+            return None
+        stored = self.manifest.translations(key for key in diff.unchanged if key not in translated_data)
+        return {key: translated_data[key] if key in translated_data else stored[key] for key in sources}
+
+    def store_results(self, sources, results: dict):
+        """store_path 모드: 배치 결과를 원문과 함께 프로젝트 저장소에 기록 (바로 품질 검사, 이 배치의 키만)"""
+        if not self.config.store_path or not results:
+            return
+        with self.metrics.timer("store_write"):
+            self.project_store.import_translation(
+                results.items(), label=os.path.basename(self.config.output_path),
+                sources={key: sources[key] for key in results if key in sources})
+
+    def finish_output(self, journal, translated_data) -> str:
+        """
+        저널을 최종 결과로 정리하고 결과 위치를 돌려줌.
+        store_path 모드면 결과는 배치마다 이미 저장소에 있으므로 출력 JSON 을 쓰지 않고 저널만 지움
+        """
+        with self.metrics.timer("checkpoint_compact"):
+            if self.config.store_path:
+                journal.discard()
+                return f"{self.config.store_path} (JSON 은 project_store.py export)"
+            journal.compact(translated_data, self.config.output_path)
+        return self.config.output_path
+
+    # ---- 배치 번역 (메인 루프) ----
+    def print_run_stats(self):
+        stats = self.translation_memory.stats()
+        print(f"📚 번역 메모리: 적중 {stats['hits']} / 미적중 {stats['misses']} "
+              f"(적중률 {stats['hit_rate']:.1%}), 동시 요청 공유 {stats['shared_in_flight']}, "
+              f"저장 {stats['stored']}, 전체 {stats['entries']}개")
+        recovery = self.recovery_stats
+        if recovery.mismatches:
+            print(f"🩹 분할 불일치 {recovery.mismatches}회: 조각 {recovery.salvaged}개 살림, "
+                  f"복구 호출 {recovery.recovery_calls}회, 개별 번역 {recovery.individual}개 "
+                  f"(예전 서브 배치 fallback 대비 {recovery.calls_saved}회 절약)")
+        pool = self.endpoint_pool
+        if len(pool) > 1:
+            for ep in pool:
+                print(f"🌐 {ep.name}: 요청 {ep.requests}, 장애 {ep.failures}, 429 {ep.throttles}, "
+                      f"브레이커 {ep.breaker.state} (열림 {ep.breaker.trips}회), {ep.limiter.current_rpm:.0f} rpm")
+            if pool.failovers:
+                print(f"↪️ 다른 엔드포인트로 넘긴 요청: {pool.failovers}회")
+        gate = self.quality_gate
+        if gate.failed:
+            print(f"🔍 품질 검사: {gate.checked}개 중 {gate.failed}개 실패 → "
+                  f"재요청으로 {gate.recovered}개 통과, dead-letter {gate.dead}개")
+
+    def make_batches(self, json_data, pending, max_batch_size=None, token_budget=None):
+        """
+        예상 출력 토큰 기준으로 pending 키를 배치로 묶는다 (generator, 키 순서 유지).
+        재느라 만든 preprocess 결과는 build_batch 가 그대로 씀 (보호 + 용어집 치환을 문장당 한 번만)
+        """
+        metrics = self.metrics
+
+        def measure(key):
+            text = json_data.get(key, "")
+            if not text or not str(text).strip():
+                return 0
+            with metrics.timer("pack_measure"):
+                prepared = self.preprocess(str(text))
+            self._prepared[key] = (text, prepared)
+            return estimate_output_tokens(prepared[0])
+
+        return pack_batches(pending, measure, token_budget or self.config.batch_token_budget,
+                            max_batch_size or self.config.max_batch_items)
+
+    def batch_translate(self, json_data, max_batch_size=None, token_budget=None):
+        config = self.config
+        metrics = self.metrics
+        diff = None
+        if config.manifest_path:
+            json_data, diff = self.diff_source(json_data)
+            total = "?"
+        else:
+            total = len(json_data) if isinstance(json_data, dict) else "?"
+
+        # 체크포인트 불러오기 (이미 끝난 키는 건너뜀)
+        journal = CheckpointJournal(config.journal_path)
+        translated_data = self.load_checkpoint(journal, total)
+        sources, pending = open_source(json_data, translated_data, diff.unchanged if diff else ())
+
+        for batch_keys in self.make_batches(sources, pending, max_batch_size, token_budget):
+            with metrics.timer("batch"):
+                results = self.translate_batch(sources, batch_keys)
+            translated_data.update(results)
+            # 저장소를 먼저 → 저널에 있는 키는 항상 저장소에도 있음 (재시작 때 건너뛰어도 빠지지 않음)
+            self.store_results(sources, results)
+            with metrics.timer("checkpoint_append"):
+                journal.append(results)
+            metrics.inc("strings_done", len(results))
+            metrics.maybe_flush()
+            print(f"💾 {len(translated_data)}/{total} 완료 및 저장")
+
+        if diff is not None:
+            translated_data = self.finish_manifest(diff, sources, translated_data, merge=not config.store_path)
+        destination = self.finish_output(journal, translated_data)
+        metrics.close()
+        self.print_run_stats()
+        print(f"\n🎉 전체 번역 완료! 결과: {destination}")
+
+    def work_shards(self, store, max_batch_size=None, token_budget=None, poll_interval: float = 5.0):
+        """
+        분산 모드 worker 루프: 공유 작업 저장소(work_store.py)에서 구간을 임대해서 번역.
+        - 배치가 끝날 때마다 결과를 저장소에 쓰고 임대 연장 (저널 / 체크포인트 대신)
+        - 다른 worker 가 임대 중인 구간만 남으면 기다림 → 그 worker 가 죽어서 임대가 만료되면 넘겨받음
+        - 모든 구간이 끝나면 worker 하나만 입력 순서대로 합쳐서 output_path 에 저장
+          (store_path 모드면 배치마다 프로젝트 저장소에 기록하므로 합치지 않음)
+        """
+        config = self.config
+        metrics = self.metrics
+        done = 0
+        while not store.finished():
+            work = store.lease()
+            if work is None:
+                time.sleep(poll_interval)
+                continue
+            if work.reassigned:
+                metrics.inc("shard_reassigned")
+                print(f"♻️ 만료된 구간 {work.range_id} 넘겨받음 (이미 저장된 {work.done}개는 건너뜀)")
+            owned = True
+            try:
+                for batch_keys in self.make_batches(work.sources, list(work.sources), max_batch_size, token_budget):
+                    with metrics.timer("batch"):
+                        results = self.translate_batch(work.sources, batch_keys)
+                    with metrics.timer("shard_save"):
+                        owned = store.save(work, results)
+                    self.store_results(work.sources, results)
+                    done += len(results)
+                    metrics.inc("strings_done", len(results))
+                    metrics.maybe_flush()
+                    if not owned:
+                        print(f"⚠️ 구간 {work.range_id} 임대 만료 → 다른 worker 가 이어서 번역")
+                        break
+            except BaseException:
+                store.release(work)
+                raise
+            if owned and store.complete(work):
+                metrics.inc("shard_ranges")
+                print(f"💾 구간 {work.range_id} 완료 (이 worker 누적 {done}개)")
+
+        if store.claim_merge():
+            if config.store_path:
+                print(f"📦 모든 구간 완료 → 결과는 배치마다 프로젝트 저장소에 기록됨: {config.store_path}")
+            else:
+                with metrics.timer("shard_merge"):
+                    count = store.merge(config.output_path)
+                print(f"📦 모든 구간 완료 → {count}개를 입력 순서대로 합쳐서 저장: {config.output_path}")
+        metrics.close()
+        self.print_run_stats()
+        print(f"\n🎉 이 worker 작업 완료! ({store.worker_id}, {done}개 번역)")
+
+    async def batch_translate_async(self, json_data, max_batch_size=None, token_budget=None, concurrency=None):
+        """
+        concurrency 개의 배치를 동시에 요청하는 비동기 메인 루프.
+        - 배치는 키 순서대로 번호를 매기고, 완료된 배치는 앞 배치가 모두 끝난 뒤에만 반영
+          → 출력 파일/저널은 직렬 실행과 동일한 키 순서를 유지
+        """
+        import asyncio
+
+        config = self.config
+        metrics = self.metrics
+        pool = self.endpoint_pool
+        concurrency = concurrency or config.concurrency
+        diff = None
+        if config.manifest_path:
+            json_data, diff = self.diff_source(json_data)
+            total = "?"
+        else:
+            total = len(json_data) if isinstance(json_data, dict) else "?"
+
+        journal = CheckpointJournal(config.journal_path)
+        translated_data = self.load_checkpoint(journal, total)
+        sources, pending = open_source(json_data, translated_data, diff.unchanged if diff else ())
+        batches = enumerate(self.make_batches(sources, pending, max_batch_size, token_budget))
+        next_commit = 0   # 다음에 반영할 배치 번호
+        finished = {}     # 배치 번호 -> 결과 (앞 배치 대기 중인 것들)
+        inflight = {}     # 요청 중인 preprocess 결과 -> future (배치 간 중복 요청 방지)
+
+        async def worker(aclients):
+            nonlocal next_commit
+            for b, batch_keys in batches:   # 모든 worker 가 같은 iterator 를 나눠 가짐
+                with metrics.timer("batch"):
+                    finished[b] = await self.translate_batch_async(aclients, sources, batch_keys, inflight)
+
+                # 앞에서부터 연속으로 끝난 배치만 반영
+                committed = False
+                while next_commit in finished:
+                    results = finished.pop(next_commit)
+                    translated_data.update(results)
+                    self.store_results(sources, results)
+                    with metrics.timer("checkpoint_append"):
+                        journal.append(results)
+                    metrics.inc("strings_done", len(results))
+                    next_commit += 1
+                    committed = True
+                if committed:
+                    metrics.maybe_flush()
+                    print(f"💾 {len(translated_data)}/{total} 완료 및 저장 (동시 {concurrency}, {pool.current_rpm:.0f} rpm)")
+
+        async with contextlib.AsyncExitStack() as stack:
+            aclients = {}
+            for ep in pool:
+                aclients[ep] = await stack.enter_async_context(self.make_client(ep, asynchronous=True))
+            await asyncio.gather(*(worker(aclients) for _ in range(max(1, concurrency))))
+
+        if diff is not None:
+            translated_data = self.finish_manifest(diff, sources, translated_data, merge=not config.store_path)
+        destination = self.finish_output(journal, translated_data)
+        metrics.close()
+        self.print_run_stats()
+        print(f"\n🎉 전체 번역 완료! 결과: {destination}")
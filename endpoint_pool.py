@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+여러 엔드포인트 / 키 분산 + 상태 기반 장애 조치
+- 토큰 파일에 엔드포인트를 여러 개 적을 수 있음 (빈 줄로 구분, 기존 4줄 형식 그대로 호환)
+      https://a.services.ai.azure.com/models
+      <key>
+      2024-05-01-preview
+      DeepSeek-V3
+      weight=2            ← 선택: weight / max_rpm / max_tpm / name
+
+      https://b.services.ai.azure.com/models
+      ...
+  (.json 이면 [{"endpoint": ..., "key": ..., "api_version": ..., "model": ..., "weight": ...}, ...])
+- 요청마다 가중치 대비 처리 중인 요청 수가 가장 적은 엔드포인트를 고름 (weighted least-outstanding)
+- 엔드포인트마다 따로 AIMD 속도 제한기(rate_limiter.py)와 서킷 브레이커를 가짐
+- 연결 오류 / 5xx 등으로 실패한 요청은 다른 정상 엔드포인트로 넘겨서 재시도 (번역기 쪽에서 처리)
+"""
+
+import json
+import re
+import time
+
+from rate_limiter import AdaptiveRateLimiter
+
+
+class CircuitBreaker:
+    """
+    closed    : 정상. 연속 실패가 failure_threshold 번이면 open
+    open      : 요청 안 보냄. reset_timeout 초가 지나면 half-open
+    half-open : 시험 요청 1건만 보내서 성공하면 closed, 실패하면 다시 open
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.trips = 0
+
+    def available(self, now: float) -> bool:
+        """지금 요청을 보낼 수 있는지 (상태는 바꾸지 않음)"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            return now - self.opened_at >= self.reset_timeout
+        return not self.probing
+
+    def retry_in(self, now: float) -> float:
+        """open 상태에서 시험 요청을 보낼 수 있을 때까지 남은 시간(초)"""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - now)
+
+    def on_dispatch(self, now: float):
+        if self.state == self.OPEN and now - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            self.probing = True
+
+    def on_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.probing = False
+
+    def on_failure(self, now: float):
+        self.failures += 1
+        self.probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.trips += 1
+            self.state = self.OPEN
+            self.opened_at = now
+
+
+class Endpoint:
+    def __init__(self, endpoint, key, api_version, model, name=None, weight=1.0, max_rpm=60, max_tpm=0,
+                 failure_threshold=3, reset_timeout=30.0):
+        self.endpoint = endpoint
+        self.key = key
+        self.api_version = api_version
+        self.model = model
+        self.name = name or endpoint
+        self.weight = max(float(weight), 0.001)
+        self.limiter = AdaptiveRateLimiter(float(max_rpm), float(max_tpm))
+        self.breaker = CircuitBreaker(int(failure_threshold), float(reset_timeout))
+        self.client = None        # 동기 클라이언트 (번역기가 만들어서 넣음)
+        self.outstanding = 0      # 지금 처리 중인 요청 수
+
+        self.requests = 0
+        self.failures = 0
+        self.throttles = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "weight": self.weight,
+            "state": self.breaker.state,
+            "requests": self.requests,
+            "failures": self.failures,
+            "throttles": self.throttles,
+            "trips": self.breaker.trips,
+            "rpm": round(self.limiter.current_rpm, 1),
+        }
+
+
+class EndpointPool:
+    def __init__(self, endpoints):
+        if not endpoints:
+            raise ValueError("엔드포인트가 하나도 없습니다")
+        self.endpoints = list(endpoints)
+        self.failovers = 0
+
+    def __iter__(self):
+        return iter(self.endpoints)
+
+    def __len__(self):
+        return len(self.endpoints)
+
+    @property
+    def current_rpm(self) -> float:
+        return sum(ep.limiter.current_rpm for ep in self.endpoints if ep.breaker.state != CircuitBreaker.OPEN)
+
+    def choose(self, exclude=()):
+        """
+        보낼 엔드포인트를 골라서 outstanding 을 올려 둔다 (끝나면 release 필수).
+        exclude(이번 요청에서 이미 실패한 곳)와 브레이커가 열린 곳은 빼고,
+        429 로 쉬는 중이 아닌 곳 → (처리 중 + 1) / weight 가 작은 곳 순으로 고름.
+        (같으면 지금까지 보낸 요청 수 / weight 가 작은 곳 → 직렬 모드에서도 쿼터를 고르게 사용)
+        보낼 곳이 없으면 None.
+        """
+        now = time.monotonic()
+        best = None
+        best_score = None
+        for ep in self.endpoints:
+            if ep in exclude or not ep.breaker.available(now):
+                continue
+            score = (ep.limiter.paused, (ep.outstanding + 1) / ep.weight, ep.requests / ep.weight)
+            if best is None or score < best_score:
+                best, best_score = ep, score
+        if best is not None:
+            best.breaker.on_dispatch(now)
+            best.outstanding += 1
+            best.requests += 1
+        return best
+
+    def retry_in(self, exclude=()):
+        """
+        choose 가 None 일 때: 브레이커가 다시 열릴 때까지 기다릴 시간(초).
+        exclude 때문에 보낼 곳이 없는 것(모든 엔드포인트에서 이미 실패)이면 None.
+        """
+        now = time.monotonic()
+        waits = [ep.breaker.retry_in(now) for ep in self.endpoints if ep not in exclude]
+        return min(waits) if waits else None
+
+    def release(self, ep, ok: bool):
+        """
+        ok=True  : 응답을 받음 (429 / content_filter 도 엔드포인트 자체는 정상)
+        ok=False : 연결 오류 / 5xx 등 엔드포인트 장애
+        ok=None  : 결과를 모름 (헤지에서 진 요청을 취소) → 브레이커 상태는 그대로, 시험 요청만 끝난 것으로
+        """
+        ep.outstanding -= 1
+        if ok is None:
+            ep.breaker.probing = False
+        elif ok:
+            ep.breaker.on_success()
+        else:
+            ep.failures += 1
+            ep.breaker.on_failure(time.monotonic())
+
+    def stats(self) -> list:
+        return [ep.as_dict() for ep in self.endpoints]
+
+
+def load_endpoints(path, max_rpm=60, max_tpm=0) -> list:
+    """토큰 파일(텍스트 블록 또는 JSON)에서 Endpoint 목록을 만든다. max_rpm/max_tpm 은 엔드포인트별 기본값"""
+    with open(path, "r", encoding="utf-8-sig") as f:
+        text = f.read()
+
+    if path.lower().endswith(".json"):
+        entries = json.loads(text)
+        if isinstance(entries, dict):
+            entries = [entries]
+    else:
+        entries = []
+        for block in re.split(r"\n\s*\n", text.replace("\r\n", "\n")):
+            lines = [line.strip() for line in block.split("\n") if line.strip() and not line.strip().startswith("#")]
+            if not lines:
+                continue
+            if len(lines) < 4:
+                raise ValueError(f"토큰 파일 형식 오류 (endpoint/key/api_version/model 4줄 필요): {lines[0]}")
+            entry = dict(zip(("endpoint", "key", "api_version", "model"), lines[:4]))
+            for option in lines[4:]:
+                name, _, value = option.partition("=")
+                entry[name.strip()] = value.strip()
+            entries.append(entry)
+
+    endpoints = []
+    for i, entry in enumerate(entries):
+        entry = dict(entry)
+        entry.setdefault("max_rpm", max_rpm)
+        entry.setdefault("max_tpm", max_tpm)
+        entry.setdefault("name", f"ep{i}")
+        endpoints.append(Endpoint(**entry))
+    return endpoints
@@ -1,6 +1,94 @@
+import argparse
 import json
 import os
 import re
+from collections import Counter, deque
+
+from json_stream import JsonObjectWriter, iter_json_object
+
+# 1. AI의 생각 과정(영문) 또는 주석이 포함된 경우 -> 오류
+# --- 수정된 부분 ---
+# 사용자가 제공한 새로운 오류 유형(Note: ...)을 탐지하기 위해 패턴을 추가하고 구체화했습니다.
+# (패턴도 소문자로 바꿔서 비교합니다. 예전에는 "Output", "Translated" 가 절대 걸리지 않았습니다.)
+broken_english_patterns = [
+    # 기존 패턴
+    "this is japanese", "translate to korean", "the segment is",
+    "we must split it", "original:", "translation:", "combined:",
+    "we must be cautious", "let's break down",
+    # 새로 추가된 패턴
+    "(note:",
+    "actual translation",
+    "placeholder \"xxx\"",
+    "will be replaced with",
+    "will be provided here",
+    "remain intact",
+    "translation",
+    "Output",
+    "<color=...>",
+    "Translated",
+    "japanese/chinese content"
+]
+# ------------------
+
+# 2. 번역되지 않은 일본어 문자가 포함된 경우 -> 오류
+# 2-1. 히라가나(ぁ-ん)가 하나라도 포함되면 확실한 오류입니다.
+# 2-2. 가타카나(ァ-ン)의 경우, 이름 등에 쓰이는 중간점(・)을 제외하고
+#      다른 문자가 발견되면 오류로 판단합니다.
+HIRAGANA_CHARS = '\u3040-\u309F'
+KATAKANA_CHARS = '\u30A0-\u30FA\u30FC-\u30FF'
+_HIRAGANA = re.compile(f'[{HIRAGANA_CHARS}]')
+
+# 한 번의 훑기로 모든 규칙을 검사하는 스캐너
+# - 소문자로 바꾼 텍스트에서 "패턴 첫 글자 또는 가나" 위치만 정규식으로 빠르게 찾고
+# - 그 위치에서 시작하는 패턴/문자 종류를 확인합니다.
+# (패턴을 전부 | 로 이은 정규식은 한글 문장에서 오히려 훨씬 느립니다.)
+_PATTERNS_BY_FIRST = {}
+for _p in broken_english_patterns:
+    _PATTERNS_BY_FIRST.setdefault(_p.lower()[0], []).append((_p, _p.lower()))
+_CANDIDATE = re.compile(
+    "[" + re.escape("".join(sorted(_PATTERNS_BY_FIRST))) + HIRAGANA_CHARS + KATAKANA_CHARS + "]"
+)
+
+
+def _scan(text, first_only):
+    rules = []
+    lower = text.lower()
+    search = _CANDIDATE.search
+    m = search(lower)
+    while m:
+        i = m.start()
+        c = lower[i]
+        patterns = _PATTERNS_BY_FIRST.get(c)
+        if patterns:
+            for name, p in patterns:
+                if lower.startswith(p, i):
+                    rules.append(name)
+                    if first_only:
+                        return rules
+        elif _HIRAGANA.match(c):
+            rules.append("hiragana")
+        else:
+            rules.append("katakana")
+        if rules and first_only:
+            return rules
+        m = search(lower, i + 1)
+    return rules
+
+
+def find_broken_rule(text):
+    """처음 걸린 규칙 이름을 반환 (정상이면 None)"""
+    if not isinstance(text, str):
+        return None
+    rules = _scan(text, first_only=True)
+    return rules[0] if rules else None
+
+
+def find_broken_rules(text):
+    """걸린 규칙 이름 전체를 집합으로 반환 (규칙별 통계용)"""
+    if not isinstance(text, str):
+        return set()
+    return set(_scan(text, first_only=False))
+
 
 def is_translation_broken_final(text):
     """
@@ -9,85 +97,114 @@ def is_translation_broken_final(text):
     - 실제 번역되지 않은 일본어(특히 히라가나)가 포함된 경우를 오류로 판단합니다.
     - AI의 주석 또는 플레이스홀더 설명이 포함된 경우를 오류로 판단합니다.
     """
-    if not isinstance(text, str):
-        return False
-
-    # 1. AI의 생각 과정(영문) 또는 주석이 포함된 경우 -> 오류
-    # --- 수정된 부분 ---
-    # 사용자가 제공한 새로운 오류 유형(Note: ...)을 탐지하기 위해 패턴을 추가하고 구체화했습니다.
-    broken_english_patterns = [
-        # 기존 패턴
-        "this is japanese", "translate to korean", "the segment is",
-        "we must split it", "original:", "translation:", "combined:",
-        "we must be cautious", "let's break down",
-        # 새로 추가된 패턴
-        "(note:",
-        "actual translation",
-        "placeholder \"xxx\"",
-        "will be replaced with",
-        "will be provided here",
-        "remain intact",
-        "translation",
-        "Output",
-        "<color=...>",
-        "Translated",
-        "japanese/chinese content"
-    ]
-    # ------------------
-
-    text_lower = text.lower()
-    for pattern in broken_english_patterns:
-        if pattern in text_lower:
-            return True
-
-    # 2. 번역되지 않은 일본어 문자가 포함된 경우 -> 오류
-    # 2-1. 히라가나(ぁ-ん)가 하나라도 포함되면 확실한 오류입니다.
-    hiragana_pattern = re.compile(r'[\u3040-\u309F]')
-    if hiragana_pattern.search(text):
-        return True
-
-    # 2-2. 가타카나(ァ-ン)의 경우, 이름 등에 쓰이는 중간점(・)을 제외하고
-    #      다른 문자가 발견되면 오류로 판단합니다.
-    katakana_pattern = re.compile(r'[\u30A0-\u30FA\u30FC-\u30FF]')
-    if katakana_pattern.search(text):
-        return True
-
-    return False # 위의 조건에 해당하지 않으면 정상 번역으로 판단
-
-def filter_json_file_final(input_path, good_output_path, broken_output_path):
+    return find_broken_rule(text) is not None
+
+
+def _classify_items(items):
+    """(key, value) 목록을 정상/오류로 나누고 규칙별 적중 수를 셉니다. (프로세스 풀 작업 단위)"""
+    good, broken = {}, {}
+    rule_hits = Counter()
+    for key, value in items:
+        rules = find_broken_rules(value)
+        if rules:
+            broken[key] = value
+            rule_hits.update(rules)
+        else:
+            good[key] = value
+    return good, broken, rule_hits
+
+
+def _chunks(pairs, size):
+    chunk = []
+    for item in pairs:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _classified_chunks(pairs, workers, chunk_size):
+    """
+    (정상, 오류, 규칙별 적중 수) 를 입력 순서대로 돌려줍니다.
+    프로세스 풀에는 workers * 2 개 묶음까지만 올려서 메모리 사용량을 제한합니다.
+    """
+    if workers <= 1:
+        for chunk in _chunks(pairs, chunk_size):
+            yield _classify_items(chunk)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor   # 번역기에서 품질 검사용으로 import 할 때는 필요 없음
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        queue = deque()
+        for chunk in _chunks(pairs, chunk_size):
+            queue.append(pool.submit(_classify_items, chunk))
+            if len(queue) >= workers * 2:
+                yield queue.popleft().result()
+        while queue:
+            yield queue.popleft().result()
+
+
+def filter_json_file_final(input_path, good_output_path, broken_output_path, workers=1, chunk_size=2000):
     """
     최종 로직을 사용하여 JSON 파일을 정상/오류 번역으로 분리 저장합니다.
+    - 입력은 스트리밍으로 읽고 결과도 바로바로 써서, 파일 크기와 상관없이 메모리를 적게 씁니다.
+    - workers > 1 이면 chunk_size 개씩 나눠서 프로세스 풀로 검사합니다. (결과 순서는 같습니다)
     """
+    good_count = broken_count = 0
+    rule_hits = Counter()
     try:
-        with open(input_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with JsonObjectWriter(good_output_path) as good_f, JsonObjectWriter(broken_output_path) as broken_f:
+            for good, broken, hits in _classified_chunks(iter_json_object(input_path), workers, chunk_size):
+                good_f.write_many(good.items())
+                broken_f.write_many(broken.items())
+                good_count += len(good)
+                broken_count += len(broken)
+                rule_hits.update(hits)
     except FileNotFoundError:
         print(f"오류: 파일을 찾을 수 없습니다. 경로를 확인해주세요: {input_path}")
         return
-    except json.JSONDecodeError:
-        print(f"오류: JSON 파일 형식이 올바르지 않습니다: {input_path}")
+    except json.JSONDecodeError as e:
+        print(f"오류: JSON 파일 형식이 올바르지 않습니다: {input_path} ({e})")
         return
 
-    good_translations = {}
-    broken_translations = {}
+    print("✨ 최종 필터링 작업이 완료되었습니다.")
+    print(f"✅ 정상 번역 ({good_count}개) -> {os.path.basename(good_output_path)}")
+    print(f"❌ 오류 번역 ({broken_count}개) -> {os.path.basename(broken_output_path)}")
+    if rule_hits:
+        print("📊 규칙별 적중 수:")
+        for rule, count in rule_hits.most_common():
+            print(f"   {count:>8}  {rule}")
 
-    for key, value in data.items():
-        if is_translation_broken_final(value):
-            broken_translations[key] = value
-        else:
-            good_translations[key] = value
 
-    # 정상 번역 파일 저장
-    with open(good_output_path, 'w', encoding='utf-8') as f:
-        json.dump(good_translations, f, ensure_ascii=False, indent=4)
+def filter_store(store_path, broken_output_path):
+    """
+    프로젝트 저장소(project_store.py) 모드: 번역은 들어올 때 이미 검사되어 있으므로
+    바뀐 규칙으로 다시 검사(상태가 바뀐 행만 갱신)하고, 오류 번역만 파일로 내보냅니다.
+    정상 번역 전체는 다시 쓰지 않습니다. (필요하면 project_store.py export --status good)
+    """
+    from project_store import open_store   # project_store 가 이 모듈을 import 하므로 여기서
 
-    # 오류 번역 파일 저장
-    with open(broken_output_path, 'w', encoding='utf-8') as f:
-        json.dump(broken_translations, f, ensure_ascii=False, indent=4)
+    try:
+        store = open_store(store_path)
+    except FileNotFoundError:
+        print(f"오류: 저장소를 찾을 수 없습니다. 경로를 확인해주세요: {store_path}")
+        return
+    counts = store.recheck()
+    broken_count = store.export(broken_output_path, statuses=["broken"])
+    stats = store.stats()
+    store.close()
 
     print("✨ 최종 필터링 작업이 완료되었습니다.")
-    print(f"✅ 정상 번역 ({len(good_translations)}개) -> {os.path.basename(good_output_path)}")
-    print(f"❌ 오류 번역 ({len(broken_translations)}개) -> {os.path.basename(broken_output_path)}")
+    print(f"🔍 {counts['checked']}개 다시 검사, 상태가 바뀐 키 {counts['changed']}개")
+    print(f"✅ 정상 번역 ({stats['good']}개) -> 저장소에 그대로")
+    print(f"❌ 오류 번역 ({broken_count}개) -> {os.path.basename(broken_output_path)}")
+    if stats["broken_rules"]:
+        print("📊 규칙별 오류 수:")
+        for rule, count in stats["broken_rules"].items():
+            print(f"   {count:>8}  {rule}")
 
 if __name__ == '__main__':
     # --- 설정 ---
@@ -95,13 +212,22 @@ if __name__ == '__main__':
     # 예: "C:\\Users\\hoho\\Desktop\\work\\translated_output_end.json"
     INPUT_FILE_PATH = r"C:\Users\hoho\Desktop\new\translated_output_end3.json" # 이 경로를 실제 파일 위치로 변경하세요.
 
+    parser = argparse.ArgumentParser(description="번역 결과를 정상/오류로 분리합니다.")
+    parser.add_argument("input", nargs="?", default=INPUT_FILE_PATH, help="필터링할 번역 파일 경로")
+    parser.add_argument("--workers", type=int, default=1, help="검사에 사용할 프로세스 수")
+    parser.add_argument("--store", help="프로젝트 저장소 경로 (주면 파일 대신 저장소를 다시 검사하고 오류 번역만 내보냄)")
+    args = parser.parse_args()
+
     # --- 실행 ---
-    if os.path.exists(INPUT_FILE_PATH):
-        base_dir = os.path.dirname(os.path.abspath(INPUT_FILE_PATH))
+    if args.store:
+        base_dir = os.path.dirname(os.path.abspath(args.store))
+        filter_store(args.store, os.path.join(base_dir, "final_broken_output.json"))
+    elif os.path.exists(args.input):
+        base_dir = os.path.dirname(os.path.abspath(args.input))
         # 결과 파일 이름 설정
         FINAL_CLEAN_PATH = os.path.join(base_dir, "final_clean_output.json")
         FINAL_BROKEN_PATH = os.path.join(base_dir, "final_broken_output.json")
 
-        filter_json_file_final(INPUT_FILE_PATH, FINAL_CLEAN_PATH, FINAL_BROKEN_PATH)
+        filter_json_file_final(args.input, FINAL_CLEAN_PATH, FINAL_BROKEN_PATH, workers=args.workers)
     else:
-        print(f"오류: 입력 파일 '{INPUT_FILE_PATH}'를 찾을 수 없습니다. 파일 경로를 확인해주세요.")
\ No newline at end of file
+        print(f"오류: 입력 파일 '{args.input}'를 찾을 수 없습니다. 파일 경로를 확인해주세요.")
@@ -1,6 +1,9 @@
 import json
 import os
 
+from json_stream import JsonObjectWriter, iter_json_object
+from project_store import open_store
+
 def extract_original_texts(original_file_path, broken_keys_file_path, output_file_path):
     """
     '오류 번역' 파일의 키 목록을 사용하여 '원본' 파일에서 해당 항목을 추출합니다.
@@ -9,18 +12,23 @@ def extract_original_texts(original_file_path, broken_keys_file_path, output_fil
         original_file_path (str): 원본 텍스트가 포함된 JSON 파일 경로.
         broken_keys_file_path (str): 오류 번역 키가 포함된 JSON 파일 경로.
         output_file_path (str): 추출된 원본 텍스트를 저장할 파일 경로.
+
+    두 파일 모두 스트리밍으로 읽습니다. 메모리에는 오류 키 목록만 올라가고,
+    결과는 원본 파일 순서대로 바로 저장됩니다.
     """
     try:
-        # 오류 번역 파일 로드하여 키 목록 가져오기
-        with open(broken_keys_file_path, 'r', encoding='utf-8') as f:
-            broken_data = json.load(f)
-        broken_keys = set(broken_data.keys())
+        # 오류 번역 파일에서 키 목록만 가져오기
+        broken_keys = {key for key, _ in iter_json_object(broken_keys_file_path)}
         print(f"'{os.path.basename(broken_keys_file_path)}'에서 {len(broken_keys)}개의 키를 찾았습니다.")
 
-        # 원본 파일 로드
-        with open(original_file_path, 'r', encoding='utf-8') as f:
-            original_data = json.load(f)
-        print(f"'{os.path.basename(original_file_path)}' 파일을 성공적으로 로드했습니다.")
+        # 원본 파일을 훑으면서 오류 키에 해당하는 원본 데이터 추출
+        found = set()
+        with JsonObjectWriter(output_file_path) as writer:
+            for key, value in iter_json_object(original_file_path):
+                if key in broken_keys:
+                    writer.write(key, value)
+                    found.add(key)
+        print(f"'{os.path.basename(original_file_path)}' 파일을 성공적으로 읽었습니다.")
 
     except FileNotFoundError as e:
         print(f"오류: 파일을 찾을 수 없습니다. 경로를 확인해주세요: {e.filename}")
@@ -28,23 +36,32 @@ def extract_original_texts(original_file_path, broken_keys_file_path, output_fil
     except json.JSONDecodeError as e:
         print(f"오류: JSON 파일 형식이 올바르지 않습니다. 파일 내용을 확인해주세요. 오류: {e}")
         return
+    except IOError as e:
+        print(f"오류: 파일을 저장하는 데 실패했습니다. {e}")
+        return
+
+    for key in broken_keys - found:
+        print(f"경고: 원본 파일에서 키 '{key}'를 찾을 수 없습니다.")
 
-    # 오류 키에 해당하는 원본 데이터 추출
-    extracted_data = {}
-    for key in broken_keys:
-        if key in original_data:
-            extracted_data[key] = original_data[key]
-        else:
-            print(f"경고: 원본 파일에서 키 '{key}'를 찾을 수 없습니다.")
+    print("\n추출 작업이 완료되었습니다.")
+    print(f"✅ 총 {len(found)}개의 원본 텍스트를 추출하여 다음 파일에 저장했습니다:\n{output_file_path}")
 
-    # 추출된 데이터를 새 파일에 저장
+
+def extract_original_texts_from_store(store_path, output_file_path):
+    """
+    프로젝트 저장소(project_store.py)에서 오류(broken) 상태인 키의 원본을 추출합니다.
+    상태 색인으로 오류 키만 읽으므로 원본 / 오류 파일 전체를 훑지 않습니다.
+    """
     try:
-        with open(output_file_path, 'w', encoding='utf-8') as f:
-            json.dump(extracted_data, f, ensure_ascii=False, indent=4)
-        print("\n추출 작업이 완료되었습니다.")
-        print(f"✅ 총 {len(extracted_data)}개의 원본 텍스트를 추출하여 다음 파일에 저장했습니다:\n{output_file_path}")
-    except IOError as e:
-        print(f"오류: 파일을 저장하는 데 실패했습니다. {e}")
+        store = open_store(store_path)
+    except FileNotFoundError as e:
+        print(f"오류: 파일을 찾을 수 없습니다. 경로를 확인해주세요: {e.filename}")
+        return
+    count = store.export(output_file_path, what="source", statuses=["broken"])
+    store.close()
+
+    print("\n추출 작업이 완료되었습니다.")
+    print(f"✅ 총 {count}개의 원본 텍스트를 추출하여 다음 파일에 저장했습니다:\n{output_file_path}")
 
 
 if __name__ == '__main__':
@@ -55,10 +72,16 @@ if __name__ == '__main__':
     # 이전에 필터링했던, 오류가 있는 번역 파일 경로
     BROKEN_TRANSLATION_FILE = r"C:\Users\hoho\Desktop\work\final_broken_output.json"
 
+    # 프로젝트 저장소(project_store.py)를 쓰면 경로 (None 이면 위 두 파일에서 추출)
+    STORE_FILE = None
+
     # --- 실행 ---
     # 결과 파일이 저장될 경로 설정
     base_dir = os.path.dirname(os.path.abspath(ORIGINAL_FILE))
     OUTPUT_FILE = os.path.join(base_dir, "original_texts_for_retranslation.json")
 
     # 스크립트 실행
-    extract_original_texts(ORIGINAL_FILE, BROKEN_TRANSLATION_FILE, OUTPUT_FILE)
\ No newline at end of file
+    if STORE_FILE:
+        extract_original_texts_from_store(STORE_FILE, OUTPUT_FILE)
+    else:
+        extract_original_texts(ORIGINAL_FILE, BROKEN_TRANSLATION_FILE, OUTPUT_FILE)
\ No newline at end of file
@@ -1,5 +1,8 @@
 import dirtyjson
 import json
+import time
+
+from json_stream import JsonObjectWriter, ObjectScan, scan_json_object
 
 # ------------------- 설정 ------------------- #
 # 여기에 문제가 있는 원본 JSON 파일 이름을 입력하세요.
@@ -7,8 +10,16 @@ INPUT_FILENAME = r"C:\Users\hoho\Desktop\new\translated_output_end2.json"
 
 # 복구 후 새로 저장될 파일의 이름입니다.
 OUTPUT_FILENAME = r"C:\Users\hoho\Desktop\new\translated_output_end3.json"
+
+# "tail": 앞에서부터 정상인 항목은 그대로 두고 손상이 시작된 곳부터만 dirtyjson 으로 복구 (빠름, 잘린 파일에 적합)
+# "full": 파일 전체를 dirtyjson 으로 읽음 (예전 방식, 중간 여러 곳이 깨졌을 때)
+REPAIR_MODE = "tail"
 # ------------------------------------------- #
 
+TAIL_ATTEMPTS = 50   # 손상 구간을 끝에서부터 항목 단위로 잘라가며 dirtyjson 을 다시 시도할 최대 횟수
+MIDDLE_DAMAGE_CHARS = 1 << 16   # 이보다 많이 버렸으면 끝이 잘린 게 아니라 중간이 깨진 것으로 보고 경고
+_WS = " \t\r\n"
+
 
 def repair_json_file(input_path, output_path):
     """
@@ -29,8 +40,13 @@ def repair_json_file(input_path, output_path):
         # 3. 수정된 객체를 표준 JSON 형식으로 다시 파일에 씁니다.
         # indent=2 옵션으로 가독성을 높이고,
         # ensure_ascii=False 옵션으로 한글이 깨지지 않게 합니다.
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(python_object, f, indent=2, ensure_ascii=False)
+        # 최상위가 객체이면 항목을 하나씩 써서 큰 문자열을 한 번 더 만들지 않습니다.
+        if isinstance(python_object, dict):
+            with JsonObjectWriter(output_path, indent=2) as writer:
+                writer.write_many(python_object.items())
+        else:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(python_object, f, indent=2, ensure_ascii=False)
 
         print(f"✅ 복구 성공! '{output_path}' 파일로 저장되었습니다.")
 
@@ -39,6 +55,85 @@ def repair_json_file(input_path, output_path):
         print(f"오류 내용: {e}")
 
 
+def recover_tail(text):
+    """
+    손상 구간(마지막 정상 항목 뒤 ~ 파일 끝)만 dirtyjson 으로 읽습니다.
+    실패하면 오류 위치 앞의 ',' 에서 잘라 다시 시도합니다. (잘려서 끝나지 않은 마지막 항목은 버림)
+    반환: (복구한 (key, value) 목록, 복구하지 못하고 버린 글자 수)
+    """
+    text = text.lstrip(_WS + ",").rstrip(_WS + "\x00")
+    body = text
+    for _ in range(TAIL_ATTEMPTS):
+        body = body.rstrip(_WS + ",")
+        if not body:
+            break
+        # 중간이 깨진 경우는 원래 닫는 '}' 가 손상 구간 안에 있음
+        candidates = ["{" + body] if body.endswith("}") else []
+        candidates.append("{" + body + "}")
+        error_pos = len(body)
+        for candidate in candidates:
+            try:
+                python_object = dirtyjson.loads(candidate)
+            except dirtyjson.Error as e:
+                error_pos = min(error_pos, e.pos - 1)
+                continue
+            if isinstance(python_object, dict):
+                return list(python_object.items()), len(text) - len(body)
+        cut = body.rfind(",", 0, max(error_pos, 0))
+        if cut < 0:
+            break
+        body = body[:cut]
+    return [], len(text)
+
+
+def repair_json_tail(input_path, output_path):
+    """
+    잘린 / 끝부분이 깨진 JSON 객체 파일을 빠르게 복구합니다.
+    앞에서부터 스트리밍으로 읽으면서 정상 항목까지는 다시 해석하지 않고 그대로 복사하고,
+    손상이 시작된 곳(바이트 위치 / 키를 보고)부터 파일 끝까지만 dirtyjson 으로 복구합니다.
+    → dirtyjson 에 걸리는 시간은 파일 전체가 아니라 손상 구간 크기만큼
+    """
+    print(f"'{input_path}' 파일의 꼬리 복구를 시작합니다...")
+    started = time.time()
+
+    try:
+        scan = ObjectScan()
+        for _ in scan_json_object(input_path, scan):
+            pass
+
+        if not scan.opened:
+            print(f" -> 최상위가 JSON 객체가 아닙니다 ({scan.error}). 전체 복구로 전환합니다.")
+            return repair_json_file(input_path, output_path)
+
+        with JsonObjectWriter(output_path, indent=2) as writer:
+            writer.copy_from(input_path, scan.body_start, scan.good_end, scan.count)
+            if scan.complete:
+                print(f" -> 손상된 곳이 없습니다. (항목 {scan.count}개)")
+            else:
+                print(f" -> 정상 항목 {scan.count}개 (마지막 키: {scan.last_key!r})")
+                print(f" -> 손상 시작: {scan.good_end} 바이트"
+                      f"{f' (키 {scan.broken_key!r} 의 값)' if scan.broken_key is not None else ''} - {scan.error}")
+                with open(input_path, 'rb') as f:
+                    f.seek(scan.good_end)
+                    damaged = f.read().decode('utf-8', errors='replace')
+                print(f" -> 손상 구간 {len(damaged)}글자만 dirtyjson 으로 분석하는 중...")
+                recovered, dropped = recover_tail(damaged)
+                writer.write_many(recovered)
+                print(f" -> 손상 구간에서 항목 {len(recovered)}개 복구, 복구하지 못한 {dropped}글자는 버림")
+                if dropped > MIDDLE_DAMAGE_CHARS:
+                    print(f"⚠️ 파일 끝이 잘린 게 아니라 중간이 깨진 것 같습니다. 손상 위치 뒤의 데이터를 많이 버렸으니 "
+                          f"REPAIR_MODE = \"full\" 로도 시도해 보세요.")
+
+        print(f"✅ 복구 성공! '{output_path}' 파일로 저장되었습니다. (항목 {writer.count}개, {time.time() - started:.1f}초)")
+
+    except Exception as e:
+        print(f"❌ 복구 실패: 파일을 처리하는 중 오류가 발생했습니다.")
+        print(f"오류 내용: {e}")
+
+
 # 스크립트 실행
 if __name__ == "__main__":
-    repair_json_file(INPUT_FILENAME, OUTPUT_FILENAME)
\ No newline at end of file
+    if REPAIR_MODE == "tail":
+        repair_json_tail(INPUT_FILENAME, OUTPUT_FILENAME)
+    else:
+        repair_json_file(INPUT_FILENAME, OUTPUT_FILENAME)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+용어집 일괄 치환기 (trie, 최장 일치)
+- 용어집을 한 번만 trie 로 컴파일해 두고, 문장을 한 번 훑으면서 치환
+- 같은 위치에서 여러 용어가 걸리면 가장 긴 용어를 사용 (용어 순서에 따라 결과가 바뀌지 않음)
+- 치환된 결과를 다시 치환하지 않음 (기존 replace 루프의 연쇄 치환 없음)
+- 용어 첫 글자 집합을 정규식으로 만들어서, 후보 위치만 trie 로 확인
+"""
+
+import re
+
+_END = ""   # trie 노드에서 용어 끝을 표시하는 키 (글자 키는 항상 길이 1)
+
+
+class GlossaryMatcher:
+    def __init__(self, glossary: dict):
+        self.size = 0
+        self.trie = {}
+        for jp, kr in glossary.items():
+            if not jp:
+                continue
+            node = self.trie
+            for ch in jp:
+                node = node.setdefault(ch, {})
+            node[_END] = (jp, kr)
+            self.size += 1
+
+        if self.trie:
+            self.first_re = re.compile("[" + "".join(re.escape(ch) for ch in self.trie) + "]")
+        else:
+            self.first_re = None
+
+    def _longest_at(self, text: str, start: int):
+        """start 위치에서 시작하는 가장 긴 용어 (없으면 None)"""
+        node = self.trie
+        best = None
+        best_end = start
+        i = start
+        n = len(text)
+        while i < n:
+            node = node.get(text[i])
+            if node is None:
+                break
+            i += 1
+            entry = node.get(_END)
+            if entry is not None:
+                best = entry
+                best_end = i
+        return (best_end, best) if best is not None else None
+
+    def finditer(self, text: str):
+        """왼쪽부터 겹치지 않는 최장 일치 (start, end, jp, kr) 를 차례로 반환"""
+        if self.first_re is None:
+            return
+        pos = 0
+        search = self.first_re.search
+        while True:
+            m = search(text, pos)
+            if m is None:
+                return
+            start = m.start()
+            found = self._longest_at(text, start)
+            if found is None:
+                pos = start + 1
+                continue
+            end, (jp, kr) = found
+            yield start, end, jp, kr
+            pos = end
+
+    def replace(self, text: str) -> str:
+        parts = []
+        last = 0
+        for start, end, _, kr in self.finditer(text):
+            parts.append(text[last:start])
+            parts.append(kr)
+            last = end
+        if not parts:
+            return text
+        parts.append(text[last:])
+        return "".join(parts)
+
+    def terms_in(self, text: str) -> set:
+        """text 에서 실제로 치환되는 용어(jp) 집합"""
+        return {jp for _, _, jp, _ in self.finditer(text)}
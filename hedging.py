@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+헤지 요청 (꼬리 지연 대응)
+- 대부분 몇 초면 끝나는데 가끔 몇 분씩 멈추는 요청 때문에 배치 전체가 기다리는 문제
+- 요청이 최근 지연 시간의 percentile 분위수 안에 안 끝나면 같은 요청을 하나 더 보냄
+  (가능하면 다른 엔드포인트 / 키로) → 먼저 온 유효한 응답을 쓰고 나머지는 취소 (번역기 쪽에서 처리)
+- 배치 크기마다 걸리는 시간이 다르므로 지연 시간은 "예약 토큰 1개당 초" 로 모아서 분위수를 구함
+- 헤지 요청 수는 전체 요청 수 대비 max_share 비율로 제한 (속도 제한 / 토큰 예산을 잡아먹지 않도록)
+"""
+
+from collections import deque
+
+
+class HedgeCancelled(Exception):
+    """헤지에서 이미 진 요청 (속도 제한 대기가 끝났을 때 상대가 먼저 끝났으면 보내지 않음)"""
+
+
+class HedgePolicy:
+    def __init__(self, percentile: float = 0.95, max_share: float = 0.05, window: int = 200,
+                 min_samples: int = 20, min_delay: float = 2.0):
+        """
+        percentile  : 이 분위수만큼 기다려도 응답이 없으면 헤지 (0.95 → 최근 요청 95% 보다 느릴 때)
+        max_share   : 전체 요청 수 대비 헤지 요청 비율 상한
+        window      : 분위수를 구할 최근 성공 요청 수
+        min_samples : 이만큼 모이기 전에는 헤지하지 않음 (시작 직후 오판 방지)
+        min_delay   : 헤지까지 최소 대기 시간 (초)
+        """
+        self.percentile = percentile
+        self.max_share = max_share
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.samples = deque(maxlen=window)   # 예약 토큰 1개당 초
+
+        self.requests = 0     # 헤지가 아닌 요청 수
+        self.hedged = 0       # 보낸 헤지 요청 수
+        self.wins = 0         # 헤지 요청이 먼저 끝난 수
+        self.cancelled = 0    # 진 쪽을 취소한 수
+        self.denied = 0       # 비율 상한 때문에 보내지 못한 수
+
+    def observe(self, seconds: float, tokens: int):
+        """성공한 요청의 지연 시간 기록"""
+        self.samples.append(seconds / max(tokens, 1))
+
+    def delay(self, tokens: int):
+        """이 요청을 헤지하기까지 기다릴 시간(초). 샘플이 모자라면 None (헤지 안 함)"""
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        per_token = ordered[min(len(ordered) - 1, int(self.percentile * len(ordered)))]
+        return max(self.min_delay, per_token * tokens)
+
+    def allow(self) -> bool:
+        """헤지 1건을 더 보내도 비율 상한 안이면 True (실제로 보낸 헤지는 번역기가 hedged 에 셈)"""
+        if self.hedged + 1 > self.max_share * max(self.requests, self.min_samples):
+            self.denied += 1
+            return False
+        return True
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.wins,
+            "cancelled": self.cancelled,
+            "denied": self.denied,
+            "hedge_share": round(self.hedged / self.requests, 4) if self.requests else 0.0,
+        }
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+최상위가 객체({ "key": value, ... })인 JSON 파일을 스트리밍으로 읽고 쓰기
+- iter_json_object : 파일을 조금씩 읽으면서 (key, value) 를 하나씩 돌려줌 (전체를 메모리에 올리지 않음)
+- scan_json_object : 위와 같지만 잘리거나 깨진 곳에서 예외 없이 멈추고 그 위치(바이트)를 알려줌 (fix_run.py 복구용)
+- JsonObjectWriter : (key, value) 를 받는 대로 바로 파일에 씀. json.dump(..., indent=N) 과 같은 모양.
+                     임시 파일에 쓰고 정상 종료 시에만 교체 → 중간에 죽어도 기존 파일이 깨지지 않음
+"""
+
+import codecs
+import json
+import os
+import re
+
+_decoder = json.JSONDecoder()
+_WS = " \t\n\r"
+_INVALID_BYTE = re.compile("[\udc80-\udcff]")   # errors="surrogateescape" 로 읽은 잘못된 UTF-8 바이트
+
+
+class _Reader:
+    def __init__(self, f, chunk_size, recover=False):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.offset = 0    # buf[0] 이 파일(문자 기준)에서 몇 번째인지
+        self.eof = False
+        self.start = None  # '{' 바로 뒤 (파일 문자 기준)
+        self.mark = 0      # 마지막으로 끝까지 읽은 항목의 끝 (buf 기준)
+        self.key = None    # 키까지만 읽고 값은 아직 못 읽은 항목의 키
+        # 복구용 스캔: 깨진 곳에서 파일 끝까지 더 읽지 않고 바로 멈추고,
+        # mark 앞은 버리지 않아서 마지막 정상 항목 끝의 바이트 위치를 셀 수 있게 함 (bytes = 버린 앞부분의 바이트 수)
+        self.recover = recover
+        self.bytes = 0
+
+    def fill(self) -> bool:
+        """데이터를 더 읽는다. 더 읽을 게 없으면 False"""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if self.recover:
+            bad = _INVALID_BYTE.search(chunk)
+            if bad:
+                # 잘못된 UTF-8 바이트부터는 손상 구간 → 그 앞에서 파일이 끝난 것처럼
+                chunk = chunk[:bad.start()]
+                self.eof = True
+        if not chunk:
+            self.eof = True
+            return False
+        cut = min(self.pos, self.mark) if self.recover else self.pos
+        if cut > self.chunk_size:
+            # 이미 처리한 앞부분은 버려서 버퍼가 계속 커지지 않게 함
+            if self.recover:
+                self.bytes += len(self.buf[:cut].encode("utf-8"))
+            self.offset += cut
+            self.buf = self.buf[cut:]
+            self.pos -= cut
+            self.mark = max(self.mark - cut, 0)
+        self.buf += chunk
+        return True
+
+    def skip_ws(self) -> str:
+        """공백을 건너뛰고 다음 글자를 반환 (파일 끝이면 "")"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WS:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def decode(self, terminators):
+        """
+        현재 위치의 JSON 값 하나를 읽는다.
+        버퍼 끝에서 잘린 값(숫자 "12" 뒤에 "3" 이나 ".5" 가 더 오는 경우 등)을 피하려고,
+        값 뒤에 terminators 중 하나가 보일 때까지 필요하면 더 읽어서 다시 해석한다.
+        """
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                cut_off = e.pos >= len(self.buf) - 8 or e.msg.startswith("Unterminated string")
+                if (cut_off or not self.recover) and self.fill():
+                    continue
+                raise json.JSONDecodeError(f"{e.msg} (파일 {self.offset + e.pos}번째 글자)", self.buf, e.pos) from None
+            rest = end
+            while rest < len(self.buf) and self.buf[rest] in _WS:
+                rest += 1
+            if (rest == len(self.buf) or (self.buf[rest] not in terminators and not self.recover)) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+    def error(self, msg):
+        return json.JSONDecodeError(f"{msg} (파일 {self.offset + self.pos}번째 글자)", self.buf, self.pos)
+
+
+def _iter_pairs(r: _Reader):
+    if r.skip_ws() != "{":
+        raise r.error("최상위가 JSON 객체가 아닙니다")
+    r.pos += 1
+    r.start = r.offset + r.pos
+    r.mark = r.pos
+    if r.skip_ws() == "}":
+        return
+    while True:
+        if r.skip_ws() != '"':
+            raise r.error("키(문자열)가 와야 합니다")
+        r.key = r.decode(":")
+        if r.skip_ws() != ":":
+            raise r.error("':' 가 와야 합니다")
+        r.pos += 1
+        r.skip_ws()
+        value = r.decode(",}")
+        key, r.key = r.key, None
+        r.mark = r.pos
+        yield key, value
+
+        c = r.skip_ws()
+        r.pos += 1
+        if c == "}":
+            return
+        if c != ",":
+            r.pos -= 1
+            raise r.error("',' 또는 '}' 가 와야 합니다")
+
+
+def iter_json_object(path, chunk_size=1 << 20, encoding="utf-8-sig"):
+    """최상위 JSON 객체의 (key, value) 를 파일 순서대로 하나씩 돌려준다."""
+    with open(path, "r", encoding=encoding) as f:
+        yield from _iter_pairs(_Reader(f, chunk_size))
+
+
+class ObjectScan:
+    """scan_json_object 가 멈춘 곳 (위치는 모두 파일 바이트 기준)"""
+
+    def __init__(self):
+        self.count = 0            # 끝까지 정상으로 읽은 항목 수
+        self.complete = False     # 닫는 '}' 까지 정상
+        self.opened = False       # 최상위 '{' 를 찾았는지 (False 면 객체 파일이 아님)
+        self.body_start = 0       # '{' 바로 뒤
+        self.good_end = 0         # 마지막 정상 항목 값의 끝 = 손상이 시작되는 곳
+        self.last_key = None      # 마지막 정상 항목의 키
+        self.broken_key = None    # 손상 구간에서 키까지만 읽힌 항목의 키
+        self.error = None         # 멈춘 이유
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+def scan_json_object(path, scan: ObjectScan, chunk_size=1 << 20):
+    """
+    iter_json_object 와 같지만 잘리거나 깨진 곳에서 예외 없이 멈춘다 (그 앞의 정상 항목만 돌려주고 위치는 scan 에).
+    중간이 깨진 경우도 파일 끝까지 읽지 않고 그 자리에서 멈춤.
+    바이트 위치를 정확히 세려고 줄바꿈 변환 없이 읽고, 잘못된 UTF-8 바이트가 나오면 거기부터 손상 구간으로 봄
+    """
+    with open(path, "rb") as f:
+        bom = len(codecs.BOM_UTF8) if f.read(len(codecs.BOM_UTF8)) == codecs.BOM_UTF8 else 0
+    with open(path, "r", encoding="utf-8-sig", errors="surrogateescape", newline="") as f:
+        r = _Reader(f, chunk_size, recover=True)
+        try:
+            for key, value in _iter_pairs(r):
+                scan.count += 1
+                scan.last_key = key
+                yield key, value
+            scan.complete = True
+        except json.JSONDecodeError as e:
+            scan.error = e.msg
+            scan.broken_key = r.key
+        finally:
+            # '{' 앞에는 공백만 있으므로 문자 수 = 바이트 수
+            scan.opened = r.start is not None
+            scan.body_start = bom + (r.start or 0)
+            scan.good_end = bom + r.bytes + len(r.buf[:r.mark].encode("utf-8"))
+
+
+class JsonObjectWriter:
+    """
+    사용 예:
+        with JsonObjectWriter(path, indent=4) as w:
+            for k, v in items:
+                w.write(k, v)
+    """
+
+    def __init__(self, path, indent=4):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.indent = indent
+        self.count = 0
+        self.f = None
+
+    def __enter__(self):
+        self.f = open(self.tmp_path, "w", encoding="utf-8")
+        self.f.write("{")
+        return self
+
+    def write(self, key, value):
+        if self.indent is None:
+            sep = ", " if self.count else ""
+            self.f.write(f"{sep}{json.dumps(key, ensure_ascii=False)}: {json.dumps(value, ensure_ascii=False)}")
+        else:
+            pad = "\n" + " " * self.indent
+            sep = "," if self.count else ""
+            dumped = json.dumps(value, ensure_ascii=False, indent=self.indent).replace("\n", pad)
+            self.f.write(f"{sep}{pad}{json.dumps(key, ensure_ascii=False)}: {dumped}")
+        self.count += 1
+
+    def write_many(self, items):
+        for key, value in items:
+            self.write(key, value)
+
+    def copy_from(self, path, start, end, count):
+        """
+        다른 JSON 객체 파일의 항목 부분(start ~ end 바이트: '{' 바로 뒤 ~ 마지막 값 끝)을 다시 해석하지 않고 그대로 붙임.
+        count 는 그 안의 항목 수 (이어서 write 하는 항목 앞에 ',' 를 붙이기 위해)
+        """
+        self.f.flush()
+        with open(path, "rb") as src:
+            src.seek(start)
+            left = end - start
+            while left > 0:
+                chunk = src.read(min(left, 1 << 20))
+                if not chunk:
+                    break
+                self.f.buffer.write(chunk)
+                left -= len(chunk)
+        self.count += count
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            if self.count and self.indent is not None:
+                self.f.write("\n")
+            self.f.write("}")
+            self.f.flush()
+            os.fsync(self.f.fileno())
+            self.f.close()
+            os.replace(self.tmp_path, self.path)
+        else:
+            self.f.close()
+            os.remove(self.tmp_path)
+        return False
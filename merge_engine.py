@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+큰 JSON 결과 파일용 외부 정렬 / k-way 병합 (sort.py, paste.py 가 사용)
+- (key, value) 를 run_size 개씩 모아 정렬해서 임시 파일(run)로 내보내고, 마지막에 heapq.merge 로 k 개 run 을 한 번에 병합
+  → 메모리는 run 하나 크기 정도 (몇 GB 짜리 병합 덤프도 처리), 작은 입력은 임시 파일 없이 메모리에서 끝남
+- sort_json_objects : 여러 shard 를 숫자 키 순서로 병합. 같은 키는 뒤에 준 shard 가 이김 (last writer wins)
+    - 숫자가 아닌 키는 멈추지 않고 개수 / 이름을 보고한 뒤 맨 뒤에 입력 순서대로 (보고 대상이라 적다고 보고 메모리에 모음)
+    - shard 하나면 기존 sort.py (dict + sorted(int(key))) 와 같은 결과
+    - 이미 숫자 순서인 shard 는 presorted=True 로 정렬 없이 바로 병합 (순서가 틀리면 ValueError)
+- overlay_json_objects : 기준 파일의 키 순서 그대로 patch 값으로 덮어쓰고, 새 키는 맨 뒤에 (기존 paste.py / dict.update 와 같은 결과)
+  → patch 파일 합계가 PATCH_MEMORY_BYTES 이하면 patch 만 메모리에 올리고 기준 파일은 흘려 읽음 (보통 경우, 가장 빠름)
+  → 더 크면 모든 입력을 키 순서로 외부 정렬해서 같은 키끼리 맞춰 본 뒤(merge join), 출력 위치 순서로 다시 외부 정렬
+- 출력은 JsonObjectWriter (임시 파일에 쓰고 마지막에 교체) → 입력 파일에 그대로 덮어써도 안전
+
+사용법:
+    python merge_engine.py sort <output.json> <shard1.json> [shard2.json ...]           # 숫자 순서, 뒤 shard 가 이김
+    python merge_engine.py paste <output.json> <base.json> <patch1.json> [patch2.json ...]
+    (--run-size N : run 하나의 항목 수, --presorted : sort 에서 shard 가 이미 숫자 순서일 때)
+"""
+
+import argparse
+import heapq
+import json
+import os
+import pickle
+import tempfile
+from itertools import groupby
+
+from json_stream import JsonObjectWriter, iter_json_object
+
+RUN_SIZE = 200000          # run 하나에 모으는 항목 수 (메모리 사용량 기준)
+SPILL_CHUNK = 1000         # run 파일을 이만큼씩 묶어서 쓰고 읽음
+PATCH_MEMORY_BYTES = 64 << 20   # overlay: patch 파일 합계가 이 이하면 메모리에서 처리
+MAX_REPORTED_KEYS = 20     # 숫자가 아닌 키는 이만큼만 이름을 보관 (개수는 전부 셈)
+
+
+class MergeStats:
+    def __init__(self):
+        self.read = 0             # 읽은 항목 수 (모든 입력 합계)
+        self.written = 0          # 출력한 키 수
+        self.overridden = 0       # 뒤 입력(또는 같은 파일 안 중복)이 덮어쓴 횟수
+        self.added = 0            # overlay: 기준 파일에 없던 새 키 수
+        self.runs = 0             # 임시 파일로 내보낸 run 수
+        self.non_integer = 0      # 숫자로 바꿀 수 없는 키 수
+        self.non_integer_keys = []
+
+    def report_key(self, key):
+        self.non_integer += 1
+        if len(self.non_integer_keys) < MAX_REPORTED_KEYS:
+            self.non_integer_keys.append(key)
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+def numeric_key(key):
+    """sort.py 와 같은 기준 (int(key)). 숫자로 바꿀 수 없으면 None"""
+    try:
+        return int(key)
+    except (ValueError, TypeError):
+        return None
+
+
+# ---------------------------
+# 외부 정렬
+# ---------------------------
+def _spill(run, tmp_dir) -> str:
+    # 이 프로세스만 다시 읽는 임시 파일이라 pickle (JSON 보다 쓰고 읽기가 훨씬 빠름), SPILL_CHUNK 개씩 묶어서
+    fd, path = tempfile.mkstemp(prefix="merge_", suffix=".run", dir=tmp_dir)
+    with os.fdopen(fd, "wb") as f:
+        for start in range(0, len(run), SPILL_CHUNK):
+            pickle.dump(run[start:start + SPILL_CHUNK], f, pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def _read_run(path):
+    with open(path, "rb") as f:
+        while True:
+            try:
+                chunk = pickle.load(f)
+            except EOFError:
+                return
+            yield from chunk
+
+
+def external_sort(records, sort_key, run_size: int = RUN_SIZE, tmp_dir=None, stats: MergeStats = None):
+    """
+    records(pickle 할 수 있는 list) 를 sort_key 순서로 돌려주는 generator.
+    run_size 개씩 정렬해서 임시 파일로 내보내고 heapq.merge 로 병합.
+    임시 파일은 다 읽거나 generator 를 닫으면 지움
+    """
+    run = []
+    paths = []
+    readers = []
+    try:
+        for record in records:
+            run.append(record)
+            if len(run) >= run_size:
+                run.sort(key=sort_key)
+                paths.append(_spill(run, tmp_dir))
+                run = []
+        run.sort(key=sort_key)
+        if stats is not None:
+            stats.runs += len(paths)
+        if not paths:
+            yield from run
+            return
+        readers = [_read_run(path) for path in paths]
+        yield from heapq.merge(*readers, run, key=sort_key)
+    finally:
+        # Windows 에서는 열린 파일을 지울 수 없으므로 먼저 닫음
+        for reader in readers:
+            reader.close()
+        for path in paths:
+            os.remove(path)
+
+
+# ---------------------------
+# 숫자 키 정렬 + shard 병합 (sort.py)
+# ---------------------------
+def _check_sorted(records, path):
+    """presorted shard 가 정말 숫자 순서인지 확인하면서 그대로 넘김"""
+    last = None
+    for record in records:
+        if last is not None and record[0] < last:
+            raise ValueError(f"숫자 순서가 아닌 shard: {path} (키 {record[3]!r})")
+        last = record[0]
+        yield record
+
+
+def iter_sorted_merge(paths, run_size: int = RUN_SIZE, tmp_dir=None, presorted: bool = False,
+                      stats: MergeStats = None):
+    """
+    여러 JSON 객체 파일을 숫자 키 순서로 병합한 (key, value) generator.
+    같은 키는 처음 나온 자리에 뒤에 준 파일의 값 (dict.update 를 이어서 한 뒤 int(key) 로 안정 정렬한 것과 같음),
+    숫자가 아닌 키는 맨 뒤에 처음 나온 순서대로
+    """
+    stats = stats if stats is not None else MergeStats()
+    others = {}   # 숫자가 아닌 키 -> [shard 번호, 위치, 값]
+
+    def numbered(path, rank):
+        """[숫자 키, shard 번호, 파일 안 위치, key, value]"""
+        for pos, (key, value) in enumerate(iter_json_object(path)):
+            stats.read += 1
+            number = numeric_key(key)
+            if number is not None:
+                yield [number, rank, pos, key, value]
+                continue
+            stats.report_key(key)
+            if key in others:
+                stats.overridden += 1
+                others[key][2] = value
+            else:
+                others[key] = [rank, pos, value]
+
+    shards = [numbered(path, rank) for rank, path in enumerate(paths)]
+    order = lambda record: (record[0], record[1], record[2])
+    if presorted:
+        records = heapq.merge(*[_check_sorted(shard, path) for shard, path in zip(shards, paths)], key=order)
+    else:
+        records = external_sort((record for shard in shards for record in shard), order, run_size, tmp_dir, stats)
+
+    # 같은 숫자 키끼리 dict 로 합침 ("1" 과 "01" 처럼 숫자만 같은 키는 따로 남음)
+    for _, group in groupby(records, key=lambda record: record[0]):
+        merged = {}
+        for record in group:
+            if record[3] in merged:
+                stats.overridden += 1
+            merged[record[3]] = record[4]
+        yield from merged.items()
+    for key, (_, _, value) in sorted(others.items(), key=lambda item: item[1][:2]):
+        yield key, value
+
+
+def sort_json_objects(paths, output_path, indent=4, run_size: int = RUN_SIZE, tmp_dir=None,
+                      presorted: bool = False) -> MergeStats:
+    """iter_sorted_merge 결과를 output_path 에 씀 (임시 run 은 기본적으로 출력 파일과 같은 폴더)"""
+    stats = MergeStats()
+    tmp_dir = tmp_dir or os.path.dirname(os.path.abspath(output_path))
+    with JsonObjectWriter(output_path, indent=indent) as writer:
+        writer.write_many(iter_sorted_merge(paths, run_size, tmp_dir, presorted, stats))
+    stats.written = writer.count
+    return stats
+
+
+# ---------------------------
+# 기준 파일 순서 유지 덮어쓰기 (paste.py)
+# ---------------------------
+def _overlay_in_memory(base_path, patch_paths, stats: MergeStats):
+    """patch 만 dict 로 올리고 base 는 흘려 읽음 (기존 paste.py 방식, base 안의 중복 키는 그대로 둠)"""
+    patch = {}
+    for path in patch_paths:
+        for key, value in iter_json_object(path):
+            stats.read += 1
+            if key in patch:
+                stats.overridden += 1
+            patch[key] = value
+    used = set()
+    for key, value in iter_json_object(base_path):
+        stats.read += 1
+        if key in patch:
+            stats.overridden += 1
+            used.add(key)
+            value = patch[key]
+        yield key, value
+    for key, value in patch.items():
+        if key not in used:
+            stats.added += 1
+            yield key, value
+
+
+def iter_overlay(base_path, patch_paths, run_size: int = RUN_SIZE, tmp_dir=None, stats: MergeStats = None,
+                 memory_bytes: int = PATCH_MEMORY_BYTES):
+    """
+    base 의 키 순서 그대로, patch 에 있는 키는 patch 값으로 (뒤 patch 가 이김),
+    base 에 없는 키는 맨 뒤에 처음 나온 순서대로 (dict(base).update(patch1) ... 와 같은 결과)
+    patch 파일 합계가 memory_bytes 이하면 메모리에서, 넘으면 외부 정렬로 처리
+    """
+    stats = stats if stats is not None else MergeStats()
+    if sum(os.path.getsize(path) for path in patch_paths) <= memory_bytes:
+        yield from _overlay_in_memory(base_path, patch_paths, stats)
+        return
+
+    def tagged():
+        """[key, 입력 번호 (0 = base), 파일 안 위치, value]"""
+        for rank, path in enumerate([base_path, *patch_paths]):
+            for pos, (key, value) in enumerate(iter_json_object(path)):
+                stats.read += 1
+                yield [key, rank, pos, value]
+
+    def placed():
+        """키 순서로 모아서 출력 위치(처음 나온 곳)와 마지막 값을 정함 → [새 키인지, 입력 번호, 위치, key, value]"""
+        by_key = external_sort(tagged(), lambda record: (record[0], record[1], record[2]), run_size, tmp_dir, stats)
+        for key, group in groupby(by_key, key=lambda record: record[0]):
+            first = last = next(group)
+            for last in group:
+                stats.overridden += 1
+            if first[1] > 0:
+                stats.added += 1
+            yield [first[1] > 0, first[1], first[2], key, last[3]]
+
+    for record in external_sort(placed(), lambda record: (record[0], record[1], record[2]), run_size, tmp_dir, stats):
+        yield record[3], record[4]
+
+
+def overlay_json_objects(base_path, patch_paths, output_path, indent=4, run_size: int = RUN_SIZE,
+                         tmp_dir=None, memory_bytes: int = PATCH_MEMORY_BYTES) -> MergeStats:
+    """iter_overlay 결과를 output_path 에 씀 (output_path 가 base_path 와 같아도 됨)"""
+    stats = MergeStats()
+    tmp_dir = tmp_dir or os.path.dirname(os.path.abspath(output_path))
+    with JsonObjectWriter(output_path, indent=indent) as writer:
+        writer.write_many(iter_overlay(base_path, patch_paths, run_size, tmp_dir, stats, memory_bytes))
+    stats.written = writer.count
+    return stats
+
+
+def print_report(stats: MergeStats):
+    if stats.non_integer:
+        print(f"⚠️ 숫자로 바꿀 수 없는 키 {stats.non_integer}개 → 맨 뒤에 원래 순서대로 둠: "
+              f"{', '.join(repr(k) for k in stats.non_integer_keys)}"
+              f"{' ...' if stats.non_integer > len(stats.non_integer_keys) else ''}")
+    print(f"📊 {json.dumps(stats.as_dict(), ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="큰 JSON 결과 파일 외부 정렬 / 병합")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("sort", help="숫자 키 순서로 정렬 / 여러 shard 병합 (뒤 shard 가 이김)")
+    p.add_argument("output")
+    p.add_argument("shards", nargs="+")
+    p.add_argument("--presorted", action="store_true", help="shard 가 이미 숫자 순서 (정렬 없이 바로 병합)")
+    p = sub.add_parser("paste", help="base 순서 그대로 patch 값으로 덮어쓰기, 새 키는 맨 뒤에")
+    p.add_argument("output")
+    p.add_argument("base")
+    p.add_argument("patches", nargs="+")
+    p.add_argument("--memory-mb", type=int, default=PATCH_MEMORY_BYTES >> 20,
+                   help="patch 파일 합계가 이 이하면 메모리에서 처리, 넘으면 외부 정렬 (0 = 항상 외부 정렬)")
+    for p in sub.choices.values():
+        p.add_argument("--run-size", type=int, default=RUN_SIZE, help="run 하나의 항목 수")
+        p.add_argument("--indent", type=int, default=4)
+    args = parser.parse_args()
+
+    if args.command == "sort":
+        result = sort_json_objects(args.shards, args.output, args.indent, args.run_size, presorted=args.presorted)
+    else:
+        result = overlay_json_objects(args.base, args.patches, args.output, args.indent, args.run_size,
+                                      memory_bytes=args.memory_mb << 20)
+    print(f"🎉 {result.written}개 → {args.output}")
+    print_report(result)
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+단계별 소요 시간 / 카운터 계측
+- metrics.timer("api_call") : with 블록에 걸린 시간을 단계별 히스토그램에 기록
+- metrics.inc("throttled")  : 카운터 증가 (토큰 사용량처럼 값을 더할 수도 있음)
+- JSONL 파일에 누적 스냅샷을 주기적으로 한 줄씩 기록 (flush_interval 초마다 + 종료 시)
+- 선택: Prometheus 텍스트 형식 HTTP 엔드포인트 (http://127.0.0.1:<port>/metrics)
+- 경로도 포트도 없으면 꺼진 상태: timer 는 공용 no-op 객체를 돌려주고 inc/observe 는 바로 반환
+"""
+
+import bisect
+import json
+import threading
+import time
+
+# 히스토그램 버킷 상한 (초). 텍스트 처리(ms 이하)부터 API 호출(수십 초)까지
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+PROMETHEUS_PREFIX = "ggz_translate"
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)   # 마지막 칸은 +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """버킷 상한 기준 근사 분위수 (+Inf 버킷이면 최댓값)"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target:
+                return min(BUCKETS[i], self.max) if i < len(BUCKETS) else self.max
+        return self.max
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "max": round(self.max, 6),
+            "p50": round(self.quantile(0.5), 6),
+            "p90": round(self.quantile(0.9), 6),
+            "p99": round(self.quantile(0.99), 6),
+        }
+
+
+class Metrics:
+    def __init__(self, path=None, port: int = 0, flush_interval: float = 10.0, labels=None):
+        """
+        path           : JSONL 스냅샷 파일 (None 이면 파일 기록 안 함)
+        port           : Prometheus 엔드포인트 포트 (0 이면 안 띄움)
+        flush_interval : maybe_flush() 가 실제로 파일에 쓰는 최소 간격 (초)
+        labels         : 스냅샷/엔드포인트에 같이 붙일 값 (예: {"run": "..."} )
+        """
+        self.path = path
+        self.enabled = bool(path or port)
+        self.flush_interval = flush_interval
+        self.labels = dict(labels or {})
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.last_flush = time.monotonic()
+        self.server = None
+        if port:
+            self.serve(port)
+
+    # ---- 기록 ----
+    def timer(self, name: str):
+        return _Timer(self, name) if self.enabled else _NULL_TIMER
+
+    def observe(self, name: str, seconds: float):
+        if not self.enabled:
+            return
+        with self.lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = Histogram()
+            hist.observe(seconds)
+
+    def inc(self, name: str, value=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    # ---- 출력 ----
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "uptime_s": round(time.time() - self.started, 3),
+                **self.labels,
+                "counters": dict(self.counters),
+                "stages": {name: hist.as_dict() for name, hist in sorted(self.histograms.items())},
+            }
+
+    def flush(self):
+        if not self.path:
+            return
+        line = json.dumps(self.snapshot(), ensure_ascii=False)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+        self.last_flush = time.monotonic()
+
+    def maybe_flush(self):
+        if self.path and time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def prometheus_text(self) -> str:
+        labels = "".join(f',{k}="{v}"' for k, v in self.labels.items())
+        counter_labels = f"{{{labels[1:]}}}" if labels else ""
+        lines = []
+        with self.lock:
+            for name, value in sorted(self.counters.items()):
+                metric = f"{PROMETHEUS_PREFIX}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric}{counter_labels} {value}")
+            metric = f"{PROMETHEUS_PREFIX}_stage_seconds"
+            if self.histograms:
+                lines.append(f"# TYPE {metric} histogram")
+            for name, hist in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, c in zip(BUCKETS + ("+Inf",), hist.counts):
+                    cumulative += c
+                    lines.append(f'{metric}_bucket{{stage="{name}",le="{bound}"{labels}}} {cumulative}')
+                lines.append(f'{metric}_sum{{stage="{name}"{labels}}} {hist.sum}')
+                lines.append(f'{metric}_count{{stage="{name}"{labels}}} {hist.count}')
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int, host: str = "127.0.0.1"):
+        """Prometheus 가 긁어갈 수 있게 /metrics 엔드포인트를 백그라운드 스레드로 띄움"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer   # 포트를 쓸 때만 import
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                body = metrics.prometheus_text().encode("utf-8")
+                self.send_response(200 if self.path.startswith("/metrics") else 404)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"📈 메트릭 엔드포인트: http://{host}:{self.server.server_address[1]}/metrics")
+
+    def close(self):
+        if self.enabled:
+            self.flush()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+로컬 모의 DeepSeek (Azure AI Inference) 서버 - 쿼터를 쓰지 않고 번역기 성능/복구 동작 측정용
+- POST /chat/completions : ChatCompletionsClient 와 같은 형식으로 응답
+  (일본어/한자는 글자별로 한글로 바꾸고, 플레이스홀더/마커는 그대로 둠)
+- 지연 시간 분포 (fixed / uniform / lognormal) + 출력 토큰당 생성 시간 + 가끔 멈추는 요청 (꼬리 지연)
+- 429 주입 (확률 또는 분당 요청 수 쿼터, retry-after-ms 헤더 포함)
+- content_filter 오류 / 503 (엔드포인트 장애) 주입
+- 마커 손상 주입 (＃BATCH_SPLIT, "#BATCH SPLIT_n#", 조각 누락, 플레이스홀더 누락) 과 <think> 블록 추가
+- 폭주 주입 (마지막 조각을 max_tokens 까지 반복) / 해설 주입 ("**Translation Notes:**" 블록 추가)
+- "stream": true 요청은 SSE (data: {...} / data: [DONE]) 로 조금씩 보냄, 클라이언트가 끊으면 남은 토큰은 생성하지 않음
+- GET /stats : 받은 요청/주입한 오류 수 (JSON),  POST /reset : 통계 초기화
+
+사용법:
+    python mock_server.py --port 8765 --latency uniform:0.2,0.8 --throttle-rate 0.05 --drop-rate 0.1
+    (토큰 파일 첫 줄을 http://127.0.0.1:8765 로 바꾸면 번역기를 그대로 붙여서 돌릴 수 있음)
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from batch_packer import estimate_tokens
+
+MARKER_RE = re.compile(r'#BATCH_SPLIT_(\d+)#')
+_TRANSLATE_RE = re.compile(r'[぀-ヿ一-鿿]')
+_PLACEHOLDER_RE = re.compile(r'\{\d+\}')
+_PROTECTED_RE = re.compile(r'(\{\d+\}|#BATCH_SPLIT_\d+#)')
+
+
+def fake_translate(text: str) -> str:
+    """가나/한자를 글자별로 한글 음절로 바꾼다 (결정적, 플레이스홀더/마커 유지)"""
+    parts = _PROTECTED_RE.split(text)
+    for i in range(0, len(parts), 2):
+        parts[i] = _TRANSLATE_RE.sub(lambda m: chr(0xAC00 + ord(m.group(0)) % 11172), parts[i])
+    return "".join(parts)
+
+
+def parse_latency(spec: str):
+    """
+    "fixed:0.2" / "uniform:0.1,0.5" / "lognormal:mu,sigma" → rng 를 받아 초를 돌려주는 함수
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "fixed":
+        return lambda rng: values[0] if values else 0.0
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(values[0], values[1])
+    raise ValueError(f"알 수 없는 지연 분포: {spec}")
+
+
+class MockConfig:
+    def __init__(self, latency="fixed:0", token_latency=0.0, throttle_rate=0.0, rpm_limit=0,
+                 retry_after_ms=500, content_filter_rate=0.0, fullwidth_rate=0.0, space_rate=0.0,
+                 drop_rate=0.0, think_rate=0.0, error_rate=0.0, mangle_rate=0.0, runaway_rate=0.0,
+                 notes_rate=0.0, stream_chunk_chars=6, stall_rate=0.0, stall_seconds=10.0, seed=0):
+        """
+        latency             : 요청당 기본 지연 분포 (parse_latency 형식)
+        token_latency       : 출력 토큰 하나당 추가 지연 (초)
+        throttle_rate       : 요청을 429 로 거절할 확률
+        rpm_limit           : 분당 요청 수 쿼터 (넘으면 429, 0 이면 없음)
+        content_filter_rate : content_filter 오류로 거절할 확률
+        fullwidth_rate      : 마커의 # 를 전각 ＃ 로 바꿀 확률 (응답 단위)
+        space_rate          : "#BATCH SPLIT_n#" 처럼 _ 를 공백으로 바꿀 확률 (응답 단위)
+        drop_rate           : 마커 하나를 빼서 두 조각을 합칠 확률 (응답 단위)
+        think_rate          : 응답 앞에 <think>...</think> 블록을 붙일 확률
+        error_rate          : 503 Service Unavailable 로 실패할 확률
+        mangle_rate         : 플레이스홀더 {n} 하나를 빼먹을 확률 (응답 단위)
+        runaway_rate        : 마지막 조각을 max_tokens 까지 반복할 확률 (응답 단위)
+        notes_rate          : 번역 뒤에 긴 "**Translation Notes:**" 해설을 붙일 확률 (응답 단위)
+        stream_chunk_chars  : 스트리밍 응답 청크 하나의 글자 수
+        stall_rate          : 응답 전에 stall_seconds 만큼 더 멈출 확률 (헤지 요청 측정용)
+        """
+        self.latency = latency
+        self.token_latency = token_latency
+        self.throttle_rate = throttle_rate
+        self.rpm_limit = rpm_limit
+        self.retry_after_ms = retry_after_ms
+        self.content_filter_rate = content_filter_rate
+        self.fullwidth_rate = fullwidth_rate
+        self.space_rate = space_rate
+        self.drop_rate = drop_rate
+        self.think_rate = think_rate
+        self.error_rate = error_rate
+        self.mangle_rate = mangle_rate
+        self.runaway_rate = runaway_rate
+        self.notes_rate = notes_rate
+        self.stream_chunk_chars = stream_chunk_chars
+        self.stall_rate = stall_rate
+        self.stall_seconds = stall_seconds
+        self.seed = seed
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+class MockStats:
+    FIELDS = ("requests", "completed", "throttled", "filtered", "errors", "fullwidth", "space", "dropped",
+              "think", "mangled", "runaway", "notes", "streamed", "stream_aborted", "stalled", "prompt_tokens",
+              "completion_tokens")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            for name in self.FIELDS:
+                setattr(self, name, 0)
+
+    def add(self, **counts):
+        with self.lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def as_dict(self) -> dict:
+        with self.lock:
+            return {name: getattr(self, name) for name in self.FIELDS}
+
+
+class MockInferenceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: MockConfig):
+        super().__init__(address, MockHandler)
+        self.config = config
+        self.stats = MockStats()
+        self.rng = random.Random(config.seed)
+        self.rng_lock = threading.Lock()
+        self.latency = parse_latency(config.latency)
+        self.window = []   # 최근 60초 요청 시각 (rpm_limit 용)
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handle_error(self, request, client_address):
+        # 스트리밍을 중간에 끊은 클라이언트의 연결 종료는 정상 동작
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+    def roll(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self.rng_lock:
+            return self.rng.random() < rate
+
+    def sample_latency(self) -> float:
+        with self.rng_lock:
+            latency = max(0.0, self.latency(self.rng))
+        if self.roll(self.config.stall_rate):
+            self.stats.add(stalled=1)
+            latency += self.config.stall_seconds
+        return latency
+
+    def over_quota(self) -> bool:
+        if not self.config.rpm_limit:
+            return False
+        now = time.monotonic()
+        with self.rng_lock:
+            self.window = [t for t in self.window if now - t < 60]
+            if len(self.window) >= self.config.rpm_limit:
+                return True
+            self.window.append(now)
+            return False
+
+    def corrupt(self, content: str, max_tokens: int = 4096) -> str:
+        cfg = self.config
+        if self.roll(cfg.runaway_rate):
+            markers = list(MARKER_RE.finditer(content))
+            tail = content[markers[-1].end():] if markers else content
+            tail = tail.strip() or "반복"
+            while estimate_tokens(content) < max_tokens:
+                content += "\n" + tail
+            self.stats.add(runaway=1)
+        if self.roll(cfg.notes_rate):
+            content += ("\n\n**Translation Notes:**\n"
+                        + "\n".join(f"- Segment {i}: kept the honorific and the original line breaks." for i in range(40)))
+            self.stats.add(notes=1)
+        if self.roll(cfg.drop_rate):
+            markers = list(MARKER_RE.finditer(content))
+            if len(markers) > 1:
+                with self.rng_lock:
+                    m = markers[self.rng.randrange(1, len(markers))]
+                content = content[:m.start()] + content[m.end():].lstrip("\n")
+                self.stats.add(dropped=1)
+        if self.roll(cfg.space_rate):
+            content = MARKER_RE.sub(r'#BATCH SPLIT_\1#', content)
+            self.stats.add(space=1)
+        if self.roll(cfg.fullwidth_rate):
+            content = content.replace("#BATCH", "＃BATCH")
+            self.stats.add(fullwidth=1)
+        if self.roll(cfg.mangle_rate):
+            placeholders = list(_PLACEHOLDER_RE.finditer(content))
+            if placeholders:
+                with self.rng_lock:
+                    m = placeholders[self.rng.randrange(len(placeholders))]
+                content = content[:m.start()] + content[m.end():]
+                self.stats.add(mangled=1)
+        if self.roll(cfg.think_rate):
+            content = "<think>\nThe segment is Japanese. Let's break down each marker.\n</think>\n" + content
+            self.stats.add(think=1)
+        return content
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status: int, body: dict, headers=None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.startswith("/stats"):
+            self.send_json(200, self.server.stats.as_dict())
+        else:
+            self.send_json(404, {"error": {"code": "NotFound", "message": self.path}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        server = self.server
+        cfg = server.config
+
+        if self.path.startswith("/reset"):
+            server.stats.reset()
+            self.send_json(200, {})
+            return
+        if not self.path.split("?")[0].rstrip("/").endswith("/chat/completions"):
+            self.send_json(404, {"error": {"code": "NotFound", "message": self.path}})
+            return
+
+        server.stats.add(requests=1)
+        request = json.loads(body or b"{}")
+
+        if server.over_quota() or server.roll(cfg.throttle_rate):
+            server.stats.add(throttled=1)
+            self.send_json(429, {"error": {"code": "429", "message": "Too Many Requests: rate limit exceeded"}},
+                           {"retry-after-ms": str(cfg.retry_after_ms),
+                            "retry-after": str(max(1, cfg.retry_after_ms // 1000))})
+            return
+        if server.roll(cfg.error_rate):
+            server.stats.add(errors=1)
+            self.send_json(503, {"error": {"code": "ServiceUnavailable", "message": "Service temporarily unavailable"}})
+            return
+        if server.roll(cfg.content_filter_rate):
+            server.stats.add(filtered=1)
+            self.send_json(400, {"error": {
+                "code": "content_filter",
+                "message": "The response was filtered due to the prompt triggering content management policy. "
+                           "(ResponsibleAIPolicyViolation)",
+                "status": 400}})
+            return
+
+        messages = request.get("messages") or []
+        prompt = "\n".join(str(m.get("content", "")) for m in messages)
+        user = str(messages[-1].get("content", "")) if messages else ""
+        source = user.rsplit("\n\nTranslate", 1)[0]
+        content = server.corrupt(fake_translate(source), int(request.get("max_tokens") or 4096))
+
+        prompt_tokens = estimate_tokens(prompt)
+        if request.get("stream"):
+            self.send_stream(request, content, prompt_tokens)
+            return
+        completion_tokens = estimate_tokens(content)
+        time.sleep(server.sample_latency() + completion_tokens * cfg.token_latency)
+
+        server.stats.add(completed=1, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        self.send_json(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model") or "mock-deepseek",
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content},
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        })
+
+    def send_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def send_event(self, body):
+        payload = body if isinstance(body, str) else json.dumps(body, ensure_ascii=False)
+        self.send_chunk(f"data: {payload}\n\n".encode("utf-8"))
+
+    def send_stream(self, request: dict, content: str, prompt_tokens: int):
+        """SSE 스트리밍 응답 (chunked). 클라이언트가 중간에 끊으면 남은 조각은 생성하지 않은 것으로 침"""
+        server = self.server
+        cfg = server.config
+        base = {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": request.get("model") or "mock-deepseek",
+        }
+        step = max(1, cfg.stream_chunk_chars)
+        sent = 0
+        server.stats.add(streamed=1)
+        time.sleep(server.sample_latency())
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for pos in range(0, len(content), step):
+                piece = content[pos:pos + step]
+                tokens = estimate_tokens(piece)
+                time.sleep(tokens * cfg.token_latency)
+                self.send_event({**base, "choices": [
+                    {"index": 0, "delta": {"role": "assistant", "content": piece}, "finish_reason": None}]})
+                sent = pos + len(piece)
+            completion_tokens = estimate_tokens(content)
+            self.send_event({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                             "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                                       "total_tokens": prompt_tokens + completion_tokens}})
+            self.send_event("[DONE]")
+            self.send_chunk(b"")
+            server.stats.add(completed=1)
+        except (BrokenPipeError, ConnectionResetError):
+            server.stats.add(stream_aborted=1)
+            self.close_connection = True
+        finally:
+            server.stats.add(prompt_tokens=prompt_tokens, completion_tokens=estimate_tokens(content[:sent]))
+
+
+def start_server(config: MockConfig, host="127.0.0.1", port=0) -> MockInferenceServer:
+    """백그라운드 스레드에서 서버를 띄우고 돌려준다 (port=0 이면 빈 포트 자동 선택). 끝나면 shutdown()"""
+    server = MockInferenceServer((host, port), config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_config_arguments(parser):
+    parser.add_argument("--latency", default="fixed:0", help="fixed:S / uniform:A,B / lognormal:MU,SIGMA")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="출력 토큰당 추가 지연 (초)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--rpm-limit", type=int, default=0)
+    parser.add_argument("--retry-after-ms", type=int, default=500)
+    parser.add_argument("--content-filter-rate", type=float, default=0.0)
+    parser.add_argument("--fullwidth-rate", type=float, default=0.0)
+    parser.add_argument("--space-rate", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--think-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--mangle-rate", type=float, default=0.0)
+    parser.add_argument("--runaway-rate", type=float, default=0.0)
+    parser.add_argument("--notes-rate", type=float, default=0.0)
+    parser.add_argument("--stream-chunk-chars", type=int, default=6)
+    parser.add_argument("--stall-rate", type=float, default=0.0)
+    parser.add_argument("--stall-seconds", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def config_from_args(args) -> MockConfig:
+    return MockConfig(latency=args.latency, token_latency=args.token_latency, throttle_rate=args.throttle_rate,
+                      rpm_limit=args.rpm_limit, retry_after_ms=args.retry_after_ms,
+                      content_filter_rate=args.content_filter_rate, fullwidth_rate=args.fullwidth_rate,
+                      space_rate=args.space_rate, drop_rate=args.drop_rate, think_rate=args.think_rate,
+                      error_rate=args.error_rate, mangle_rate=args.mangle_rate, runaway_rate=args.runaway_rate,
+                      notes_rate=args.notes_rate, stream_chunk_chars=args.stream_chunk_chars,
+                      stall_rate=args.stall_rate, stall_seconds=args.stall_seconds, seed=args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 모의 DeepSeek (Azure AI Inference) 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockInferenceServer((args.host, args.port), config_from_args(args))
+    print(f"🧪 모의 서버 시작: {server.endpoint}  (Ctrl+C 로 종료)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"📊 {json.dumps(server.stats.as_dict(), ensure_ascii=False)}")
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,9 @@
 import json
+import os
+
+from json_stream import iter_json_object
+from merge_engine import overlay_json_objects, print_report
+from project_store import open_store
 
 # 두 파일의 전체 경로를 지정합니다.
 # 'r'을 앞에 붙이면 경로에 있는 백슬래시(\)를 문자로 인식하여 편리합니다.
@@ -6,26 +11,27 @@ import json
 source_file_path = r"C:\Users\hoho\Desktop\new\translated_output-final22525111111122223334444444555.json"
 destination_file_path = r"C:\Users\hoho\Desktop\new\translated_output_end3.json"
 
-try:
-    # 덮어쓸 내용이 있는 파일(source)을 읽습니다.
-    with open(source_file_path, 'r', encoding='utf-8') as f:
-        source_data = json.load(f)
-
-    # 기존 파일(destination)을 읽습니다.
-    with open(destination_file_path, 'r', encoding='utf-8') as f:
-        destination_data = json.load(f)
+# 프로젝트 저장소(project_store.py)를 쓰면 경로를 입력하세요. (None 이면 위 destination 파일에 합칩니다)
+# 저장소에는 넣을 항목의 키만 갱신하고 바로 품질 검사합니다. (결과 파일 전체를 다시 쓰지 않음)
+store_path = None
 
-    # source_data의 내용으로 destination_data를 업데이트(덮어쓰기)합니다.
-    # 같은 키(key)가 있다면 source_data의 값으로 변경됩니다.
-    destination_data.update(source_data)
+try:
+    # 기존 파일(destination)의 키 순서 그대로, 같은 키(key)가 있다면 source 의 값으로 변경되고, 새 키는 맨 뒤에 붙습니다.
+    # (dict.update 와 같은 결과)
+    # 두 파일 모두 메모리에 다 올리지 않고, 키 순서로 나눠 정렬한 조각(run)을 임시 파일에 써서 맞춰 봅니다.
+    # 임시 파일에 쓴 뒤 마지막에 교체하므로 읽는 파일과 쓰는 파일이 같아도 안전합니다.
+    if store_path:
+        store = open_store(store_path)
+        counts = store.import_translation(iter_json_object(source_file_path), label=os.path.basename(source_file_path))
+        store.close()
 
-    # 업데이트된 내용을 다시 destination 파일에 씁니다.
-    with open(destination_file_path, 'w', encoding='utf-8') as f:
-        # ensure_ascii=False는 한글이 깨지지 않게 저장하기 위함입니다.
-        # indent=4는 JSON 파일을 보기 좋게 4칸 들여쓰기하여 저장하는 옵션입니다.
-        json.dump(destination_data, f, ensure_ascii=False, indent=4)
+        print(f"🎉 성공! '{store_path}' 저장소에 {counts['good'] + counts['broken']}개를 합쳤습니다.")
+        print(f"   정상 {counts['good']}개, 오류 {counts['broken']}개 (원문 없는 새 키 {counts['added']}개)")
+    else:
+        stats = overlay_json_objects(destination_file_path, [source_file_path], destination_file_path, indent=4)
 
-    print(f"🎉 성공! '{destination_file_path}' 파일에 내용을 성공적으로 덮어썼습니다.")
+        print(f"🎉 성공! '{destination_file_path}' 파일에 내용을 성공적으로 덮어썼습니다.")
+        print_report(stats)
 
 except FileNotFoundError:
     print("❌ 오류: 파일 경로를 찾을 수 없습니다. 경로가 올바른지 다시 확인해주세요.")
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+번역 실행 계획 (dry-run) - 쿼터를 쓰기 전에 요청 수 / 토큰 / 시간을 오프라인으로 추정
+- 번역기와 같은 preprocess (보호 + 용어집) 로 문장마다 입력/출력 토큰 추정 (batch_packer 휴리스틱)
+- 번역기와 같은 방식으로 배치를 묶고, 번역 메모리 적중 / 실행 안 중복 문장은 요청에서 뺌
+- 동시 요청 수, 엔드포인트별 rpm / tpm, 지연 모델로 예상 소요 시간
+- 혼자서도 max_tokens 를 넘을 것 같은 문장 목록 (잘려서 분할 불일치가 날 후보)
+- --workers N 이면 토큰 추정을 프로세스 풀로 (결과 순서는 같음)
+
+사용법:
+    python plan_translate.py input.json --glossary glossary-japan.json --tm translation_memory.sqlite
+    python plan_translate.py input.json --glossary g.json --concurrency 8 --rpm 60 --tpm 120000 --endpoints 2 --workers 4
+    python plan_translate.py input.json --json plan.json --price-in 0.27 --price-out 1.10
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from collections import deque
+
+from batch_packer import MARKER_TOKENS, PROMPT_TOKENS, estimate_output_tokens, estimate_tokens, pack_batches
+from deepseek_transtool2 import Translator, TranslatorConfig
+from json_stream import iter_json_object
+
+_worker_translator = None
+
+
+def _init_worker(translator):
+    global _worker_translator
+    _worker_translator = translator
+
+
+def _estimate_chunk(chunk, translator=None):
+    """(key, value) 묶음 → [(key, pre_text, 입력 토큰, 출력 토큰)] (빈 문자열은 pre_text None)"""
+    translator = translator or _worker_translator
+    rows = []
+    for key, value in chunk:
+        if not value or not str(value).strip():
+            rows.append((key, None, 0, 0))
+            continue
+        pre_text, _ = translator.preprocess(str(value))
+        rows.append((key, pre_text, estimate_tokens(pre_text), estimate_output_tokens(pre_text)))
+    return rows
+
+
+def _chunks(pairs, size):
+    chunk = []
+    for item in pairs:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def estimate_rows(translator, pairs, workers=1, chunk_size=2000):
+    """_estimate_chunk 결과를 입력 순서대로 (workers > 1 이면 프로세스 풀, 올려두는 묶음 수는 workers * 2 까지)"""
+    if workers <= 1:
+        for chunk in _chunks(pairs, chunk_size):
+            yield from _estimate_chunk(chunk, translator)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    translator.glossary_matcher   # 용어집을 먼저 읽어서 worker 마다 파일을 다시 읽지 않게
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(translator,)) as pool:
+        queue = deque()
+        for chunk in _chunks(pairs, chunk_size):
+            queue.append(pool.submit(_estimate_chunk, chunk))
+            if len(queue) >= workers * 2:
+                yield from queue.popleft().result()
+        while queue:
+            yield from queue.popleft().result()
+
+
+class RunPlan:
+    def __init__(self):
+        self.strings = 0
+        self.empty = 0
+        self.tm_hits = 0
+        self.duplicates = 0       # 같은 실행 안에서 이미 요청한 문장 (번역 메모리 / 배치 안 공유)
+        self.api_strings = 0
+        self.batches = 0
+        self.requests = 0         # API 를 부르는 배치 수 (재시도 제외)
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.request_output_tokens = []   # 요청별 예상 출력 토큰 (시간 추정용)
+        self.overflow = []        # (key, 예상 출력 토큰): 혼자서도 max_tokens 를 넘을 것 같은 문장
+        self.estimate_s = 0.0
+
+    def wall_time(self, concurrency, rpm, tpm, endpoints, base_latency, token_latency) -> dict:
+        """
+        예상 소요 시간 (초). 세 가지 상한 중 가장 느린 것:
+          latency : 요청 지연 합 / 동시 요청 수
+          rpm     : 요청 수 / (rpm * 엔드포인트 수)
+          tpm     : 토큰 수 / (tpm * 엔드포인트 수)
+        """
+        latency = sum(base_latency + tokens * token_latency for tokens in self.request_output_tokens)
+        bounds = {
+            "latency": latency / max(1, concurrency),
+            "rpm": self.requests / (rpm * endpoints) * 60 if rpm else 0.0,
+            "tpm": (self.input_tokens + self.output_tokens) / (tpm * endpoints) * 60 if tpm else 0.0,
+        }
+        limit = max(bounds, key=bounds.get)
+        return {"seconds": round(bounds[limit], 1), "bound_by": limit,
+                **{f"{name}_s": round(value, 1) for name, value in bounds.items()}}
+
+    def as_dict(self) -> dict:
+        return {
+            "strings": self.strings,
+            "empty": self.empty,
+            "tm_hits": self.tm_hits,
+            "duplicates": self.duplicates,
+            "api_strings": self.api_strings,
+            "batches": self.batches,
+            "requests": self.requests,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "total_tokens": self.input_tokens + self.output_tokens,
+            "overflow": len(self.overflow),
+            "estimate_s": round(self.estimate_s, 3),
+        }
+
+
+def plan_run(translator, pairs, workers=1, use_tm=True) -> RunPlan:
+    """
+    batch_translate 를 API 없이 흉내 냄.
+    make_batches 와 같은 기준(예상 출력 토큰, 배치 최대 문장 수)으로 묶은 뒤, 배치마다 build_batch 처럼
+    빈 문자열 / 번역 메모리 적중 / 이미 요청한 문장을 빼고 남는 문장만 요청으로 셈
+    """
+    config = translator.config
+    plan = RunPlan()
+    start = time.perf_counter()
+    rows = {}
+    for key, pre_text, in_tokens, out_tokens in estimate_rows(translator, pairs, workers):
+        rows[key] = (pre_text, in_tokens, out_tokens)
+        if out_tokens + MARKER_TOKENS > config.max_tokens:
+            plan.overflow.append((key, out_tokens))
+    plan.estimate_s = time.perf_counter() - start
+    plan.strings = len(rows)
+
+    tm = translator.translation_memory if use_tm else None
+    seen = set()
+    for batch_keys in pack_batches(rows, lambda key: rows[key][2], config.batch_token_budget,
+                                   config.max_batch_items):
+        plan.batches += 1
+        count = in_tokens = out_tokens = 0
+        for key in batch_keys:
+            pre_text, key_in, key_out = rows[key]
+            if pre_text is None:
+                plan.empty += 1
+            elif pre_text in seen:
+                plan.duplicates += 1
+            elif tm is not None and tm.contains(pre_text):
+                plan.tm_hits += 1
+                seen.add(pre_text)
+            else:
+                seen.add(pre_text)
+                count += 1
+                in_tokens += key_in + MARKER_TOKENS
+                out_tokens += key_out + MARKER_TOKENS
+        if count:
+            plan.requests += 1
+            plan.api_strings += count
+            plan.input_tokens += in_tokens + PROMPT_TOKENS
+            plan.output_tokens += out_tokens
+            plan.request_output_tokens.append(out_tokens)
+    return plan
+
+
+def format_duration(seconds: float) -> str:
+    hours, rest = divmod(int(seconds), 3600)
+    return f"{hours}시간 {rest // 60}분 {rest % 60}초" if hours else f"{rest // 60}분 {rest % 60}초"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="번역 실행 계획 (요청 수 / 토큰 / 시간 추정, API 호출 없음)")
+    parser.add_argument("input", help="번역 입력 JSON")
+    parser.add_argument("--glossary", help="용어집 JSON (없으면 용어집 없이)")
+    parser.add_argument("--tm", help="번역 메모리 SQLite (없으면 적중 없음으로 계산, 없는 경로면 파일을 만들지 않음)")
+    parser.add_argument("--prompt-version", default=None, help="번역 메모리 키의 프롬프트 버전 (기본: 번역기 기본값)")
+    parser.add_argument("--batch-items", type=int, default=40, help="MAX_BATCH_ITEMS")
+    parser.add_argument("--budget", type=int, default=2800, help="BATCH_TOKEN_BUDGET")
+    parser.add_argument("--max-tokens", type=int, default=4096, help="MAX_TOKENS")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시 요청 수")
+    parser.add_argument("--rpm", type=float, default=60, help="엔드포인트별 분당 요청 수 (0 이면 제한 없음)")
+    parser.add_argument("--tpm", type=float, default=120000, help="엔드포인트별 분당 토큰 수 (0 이면 제한 없음)")
+    parser.add_argument("--endpoints", type=int, default=1, help="엔드포인트 수")
+    parser.add_argument("--latency", type=float, default=2.0, help="요청당 기본 지연 (초)")
+    parser.add_argument("--token-latency", type=float, default=0.02, help="출력 토큰당 생성 시간 (초)")
+    parser.add_argument("--price-in", type=float, default=0.0, help="입력 토큰 100만 개당 가격")
+    parser.add_argument("--price-out", type=float, default=0.0, help="출력 토큰 100만 개당 가격")
+    parser.add_argument("--workers", type=int, default=1, help="토큰 추정 프로세스 수")
+    parser.add_argument("--show-overflow", type=int, default=10, help="max_tokens 초과 후보를 몇 개까지 보여줄지")
+    parser.add_argument("--json", help="결과를 JSON 파일로도 저장")
+    args = parser.parse_args()
+
+    # 없는 번역 메모리를 열면 빈 SQLite 파일이 생김 → dry-run 이 파일을 만들지 않도록 적중 없음으로 계산
+    tm_path = args.tm
+    if tm_path and not os.path.exists(tm_path):
+        print(f"⚠️ 번역 메모리 '{tm_path}' 가 없음 → 적중 없음으로 계산")
+        tm_path = None
+
+    workdir = tempfile.mkdtemp(prefix="plan_translate_")
+    glossary_path = args.glossary
+    if not glossary_path:
+        glossary_path = os.path.join(workdir, "glossary.json")
+        with open(glossary_path, "w", encoding="utf-8") as f:
+            json.dump({"JP_TO_KR": {}}, f)
+    config = TranslatorConfig(
+        token_path="", output_path=os.path.join(workdir, "plan.json"), glossary_path=glossary_path,
+        tm_path=tm_path, max_tokens=args.max_tokens, max_batch_items=args.batch_items,
+        batch_token_budget=args.budget, **({"prompt_version": args.prompt_version} if args.prompt_version else {}))
+
+    with Translator(config) as translator:
+        plan = plan_run(translator, iter_json_object(args.input), args.workers, use_tm=bool(tm_path))
+    timing = plan.wall_time(args.concurrency, args.rpm, args.tpm, args.endpoints, args.latency, args.token_latency)
+    cost = plan.input_tokens / 1e6 * args.price_in + plan.output_tokens / 1e6 * args.price_out
+
+    print(f"📄 문장 {plan.strings}개: 빈 문자열 {plan.empty}, 번역 메모리 적중 {plan.tm_hits}, "
+          f"중복 {plan.duplicates} → 요청할 문장 {plan.api_strings}개")
+    print(f"📦 배치 {plan.batches}개 → 요청 {plan.requests}회 (재시도 제외)")
+    print(f"🔢 예상 토큰: 입력 {plan.input_tokens:,} / 출력 {plan.output_tokens:,} / 합계 "
+          f"{plan.input_tokens + plan.output_tokens:,}" + (f"  (비용 약 {cost:,.2f})" if cost else ""))
+    print(f"⏱️ 예상 시간: {format_duration(timing['seconds'])} ({timing['bound_by']} 기준, 동시 {args.concurrency}, "
+          f"엔드포인트 {args.endpoints}개 × {args.rpm:g} rpm / {args.tpm:g} tpm)")
+    if plan.overflow:
+        print(f"⚠️ 혼자서도 max_tokens({args.max_tokens}) 를 넘을 것 같은 문장 {len(plan.overflow)}개:")
+        for key, tokens in sorted(plan.overflow, key=lambda item: -item[1])[:args.show_overflow]:
+            print(f"   {key}: 예상 출력 {tokens} 토큰")
+    print(f"🧮 토큰 추정 {plan.estimate_s:.2f}초 (worker {args.workers}개)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({**plan.as_dict(), "wall_time": timing, "cost": round(cost, 4),
+                       "overflow_keys": [key for key, _ in plan.overflow]}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+번역 프로젝트 저장소 (SQLite, WAL) - 중간 JSON 파일을 이어 붙이는 작업 흐름 대신 쓰는 하나의 색인된 저장소
+- 키마다 원문 / 번역 / 상태 / 품질 규칙 / 시도 횟수, 그리고 번역이 들어올 때마다의 기록(history)
+- 예전 도구와의 대응 (각 도구에 저장소 경로를 주면 아래 메서드를 그대로 부름)
+    번역 결과 합치기 (paste.py)              → import-translation (같은 키는 나중에 들어온 번역이 이김)
+    정상/오류 분리 (filter_ai.py --store)    → import-translation 할 때 바로 검사, recheck 로 다시 검사
+    오류 원문 뽑기 (filter_ai_broken.py)     → export --what source --status broken
+    숫자 키 정렬 (sort.py)                   → export --order numeric (정렬용 정수 열 색인, 스트리밍으로 씀)
+- 번역기에 store_path 를 주면 배치가 끝날 때마다 그 배치의 키만 바로 기록 (출력 JSON 전체를 다시 쓰지 않음)
+- 상태 변경은 들어온 키만 갱신 (말뭉치 전체를 다시 읽고 쓰지 않음)
+
+상태:
+    new     : 원문만 있음 (번역 전)
+    good    : 번역 있음, 품질 검사 통과
+    broken  : 번역 있음, 품질 검사 실패 (rule 에 처음 걸린 규칙)
+    stale   : 번역 후 원문이 바뀜 (다시 번역할 것)
+
+사용법:
+    python project_store.py import-source <db> <original.json>
+    python project_store.py import-translation <db> <translated.json> [--label retranslate-3]
+    python project_store.py recheck <db> [--status good]
+    python project_store.py export <db> <out.json> [--what translation|source] [--status good,broken] [--order numeric|input]
+    python project_store.py history <db> <key>
+    python project_store.py stats <db>
+"""
+
+import argparse
+import errno
+import json
+import os
+import sqlite3
+import time
+
+from filter_ai import find_broken_rule
+from json_stream import JsonObjectWriter, iter_json_object
+
+STATUSES = ("new", "good", "broken", "stale")
+
+# SQLite INTEGER 범위 (넘는 키는 정렬 열에 넣지 않음, 넣으면 OverflowError)
+NUM_KEY_MIN = -2 ** 63
+NUM_KEY_MAX = 2 ** 63 - 1
+
+
+def numeric_key(key):
+    """
+    정수로 바꿀 수 있는 키는 정수 (sort.py 와 같은 기준), 아니면 None.
+    SQLite 정수 범위를 넘는 키도 None → 숫자가 아닌 키처럼 맨 뒤에 원문 순서로 정렬
+    """
+    try:
+        value = int(key)
+    except (ValueError, TypeError):
+        return None
+    return value if NUM_KEY_MIN <= value <= NUM_KEY_MAX else None
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def open_store(path) -> "ProjectStore":
+    """이미 있는 저장소만 열기 (도구에 경로를 잘못 주면 빈 저장소를 만들지 않고 FileNotFoundError)"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(errno.ENOENT, "프로젝트 저장소가 없음", path)
+    return ProjectStore(path)
+
+
+class ProjectStore:
+    def __init__(self, path, batch_size: int = 900):
+        """batch_size : 가져오기 할 때 한 번에 커밋할 행 수"""
+        self.path = path
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS strings ("
+            " key TEXT PRIMARY KEY,"
+            " seq INTEGER NOT NULL,"          # 원문 파일에서의 순서 (처음 들어온 순서)
+            " num_key INTEGER,"               # 정렬용 정수 키 (정수가 아니거나 범위를 넘으면 NULL)
+            " source TEXT,"
+            " translation TEXT,"
+            " status TEXT NOT NULL,"
+            " rule TEXT,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " updated REAL NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS history ("
+            " key TEXT NOT NULL,"
+            " translation TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " rule TEXT,"
+            " label TEXT,"
+            " created REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS strings_status ON strings (status, seq)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS strings_num ON strings (num_key, seq)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS strings_seq ON strings (seq)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS history_key ON history (key, created)")
+        self.conn.commit()
+
+    def _next_seq(self) -> int:
+        return self.conn.execute("SELECT COALESCE(MAX(seq), -1) + 1 FROM strings").fetchone()[0]
+
+    def _chunks(self, pairs):
+        chunk = []
+        for item in pairs:
+            chunk.append(item)
+            if len(chunk) >= self.batch_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def import_source(self, pairs) -> dict:
+        """
+        원문 (key, value) 가져오기. 새 키는 new, 원문이 바뀐 번역 키는 stale.
+        반환: {"new": n, "changed": n, "unchanged": n}
+        """
+        counts = {"new": 0, "changed": 0, "unchanged": 0}
+        seq = self._next_seq()
+        now = time.time()
+        for chunk in self._chunks(pairs):
+            keys = [key for key, _ in chunk]
+            stored = dict(self.conn.execute(
+                f"SELECT key, source FROM strings WHERE key IN ({','.join('?' * len(keys))})", keys))
+            inserts, updates = [], []
+            for key, value in chunk:
+                source = _dumps(value)
+                if key not in stored:
+                    inserts.append((key, seq, numeric_key(key), source, now))
+                    seq += 1
+                    counts["new"] += 1
+                elif stored[key] != source:
+                    updates.append((source, now, key))
+                    counts["changed"] += 1
+                else:
+                    counts["unchanged"] += 1
+            self.conn.executemany(
+                "INSERT INTO strings (key, seq, num_key, source, status, updated) VALUES (?, ?, ?, ?, 'new', ?)",
+                inserts)
+            self.conn.executemany(
+                "UPDATE strings SET source = ?, updated = ?,"
+                " status = CASE WHEN translation IS NULL THEN 'new' ELSE 'stale' END WHERE key = ?", updates)
+            self.conn.commit()
+        return counts
+
+    def import_translation(self, pairs, label: str = None, sources: dict = None) -> dict:
+        """
+        번역 (key, value) 가져오기 (paste: 같은 키는 나중에 들어온 번역이 이김) + 바로 품질 검사.
+        원문이 없는 키도 받음 (원문 없이 순서만 뒤에 붙음).
+        sources : {key: 원문} 을 주면 원문도 같이 기록 (번역기 write-through, import-source 를 따로 안 해도 됨)
+        반환: {"good": n, "broken": n, "added": n}
+        """
+        counts = {"good": 0, "broken": 0, "added": 0}
+        seq = self._next_seq()
+        now = time.time()
+        for chunk in self._chunks(pairs):
+            keys = [key for key, _ in chunk]
+            known = {row[0] for row in self.conn.execute(
+                f"SELECT key FROM strings WHERE key IN ({','.join('?' * len(keys))})", keys)}
+            inserts, updates, history = [], [], []
+            for key, value in chunk:
+                rule = find_broken_rule(value)
+                status = "broken" if rule else "good"
+                counts[status] += 1
+                translation = _dumps(value)
+                source = _dumps(sources[key]) if sources is not None and key in sources else None
+                history.append((key, translation, status, rule, label, now))
+                if key in known:
+                    updates.append((source, translation, status, rule, now, key))
+                else:
+                    known.add(key)
+                    inserts.append((key, seq, numeric_key(key), source, translation, status, rule, now))
+                    seq += 1
+                    counts["added"] += 1
+            self.conn.executemany(
+                "INSERT INTO strings (key, seq, num_key, source, translation, status, rule, attempts, updated)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?)", inserts)
+            self.conn.executemany(
+                "UPDATE strings SET source = COALESCE(?, source), translation = ?, status = ?, rule = ?,"
+                " attempts = attempts + 1, updated = ? WHERE key = ?", updates)
+            self.conn.executemany(
+                "INSERT INTO history (key, translation, status, rule, label, created) VALUES (?, ?, ?, ?, ?, ?)",
+                history)
+            self.conn.commit()
+        return counts
+
+    def recheck(self, statuses=("good", "broken")) -> dict:
+        """
+        품질 규칙(filter_ai)이 바뀌었을 때 번역을 다시 검사. 상태가 바뀐 행만 갱신.
+        batch_size 행씩 rowid 순서로 읽고 묶음마다 커밋 (말뭉치 전체를 메모리에 올리지 않음,
+        갱신하는 status 열로 페이지를 넘기지 않으므로 바뀐 행을 다시 읽거나 건너뛰지 않음)
+        """
+        counts = {"checked": 0, "changed": 0}
+        placeholders = ",".join("?" * len(statuses))
+        last = 0
+        while True:
+            rows = self.conn.execute(
+                f"SELECT rowid, key, translation, status, rule FROM strings"
+                f" WHERE rowid > ? AND status IN ({placeholders}) AND translation IS NOT NULL"
+                f" ORDER BY rowid LIMIT ?", (last, *statuses, self.batch_size)).fetchall()
+            if not rows:
+                break
+            last = rows[-1][0]
+            updates = []
+            now = time.time()
+            for _, key, translation, status, rule in rows:
+                new_rule = find_broken_rule(json.loads(translation))
+                new_status = "broken" if new_rule else "good"
+                if (new_status, new_rule) != (status, rule):
+                    updates.append((new_status, new_rule, now, key))
+            self.conn.executemany("UPDATE strings SET status = ?, rule = ?, updated = ? WHERE key = ?", updates)
+            self.conn.commit()
+            counts["checked"] += len(rows)
+            counts["changed"] += len(updates)
+        return counts
+
+    def iter_rows(self, what="translation", statuses=None, order="input"):
+        """
+        (key, value) 를 스트리밍으로 돌려줌.
+        what  : "translation" (번역이 없는 키는 건너뜀) / "source"
+        order : "input" (원문 순서) / "numeric" (정수 키 순서, 정수가 아니거나 범위를 넘는 키는 맨 뒤에 원문 순서)
+        """
+        column = "translation" if what == "translation" else "source"
+        where = [f"{column} IS NOT NULL"]
+        params = []
+        if statuses:
+            where.append(f"status IN ({','.join('?' * len(statuses))})")
+            params += list(statuses)
+        order_by = "num_key IS NULL, num_key, seq" if order == "numeric" else "seq"
+        cur = self.conn.execute(
+            f"SELECT key, {column} FROM strings WHERE {' AND '.join(where)} ORDER BY {order_by}", params)
+        for key, value in cur:
+            yield key, json.loads(value)
+
+    def export(self, output_path, what="translation", statuses=None, order="input", indent=4) -> int:
+        """iter_rows 결과를 JSON 파일로 (임시 파일에 쓴 뒤 교체). 쓴 키 수를 반환"""
+        with JsonObjectWriter(output_path, indent=indent) as writer:
+            writer.write_many(self.iter_rows(what, statuses, order))
+        return writer.count
+
+    def history(self, key) -> list:
+        return [{"translation": json.loads(tr), "status": status, "rule": rule, "label": label, "created": created}
+                for tr, status, rule, label, created in self.conn.execute(
+                    "SELECT translation, status, rule, label, created FROM history WHERE key = ? ORDER BY created, rowid",
+                    (key,))]
+
+    def stats(self) -> dict:
+        by_status = dict(self.conn.execute("SELECT status, COUNT(*) FROM strings GROUP BY status"))
+        rules = dict(self.conn.execute(
+            "SELECT rule, COUNT(*) FROM strings WHERE status = 'broken' GROUP BY rule ORDER BY COUNT(*) DESC"))
+        total, non_numeric = self.conn.execute(
+            "SELECT COUNT(*), SUM(num_key IS NULL) FROM strings").fetchone()
+        return {
+            "strings": total,
+            **{status: by_status.get(status, 0) for status in STATUSES},
+            "non_numeric_keys": non_numeric or 0,
+            "history": self.conn.execute("SELECT COUNT(*) FROM history").fetchone()[0],
+            "broken_rules": rules,
+        }
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="번역 프로젝트 저장소 (SQLite)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("import-source", help="원문 JSON 가져오기")
+    p.add_argument("db")
+    p.add_argument("input")
+    p = sub.add_parser("import-translation", help="번역 JSON 합치기 + 품질 검사")
+    p.add_argument("db")
+    p.add_argument("input")
+    p.add_argument("--label", help="기록에 남길 이름 (예: 재번역 회차)")
+    p = sub.add_parser("recheck", help="품질 규칙으로 다시 검사")
+    p.add_argument("db")
+    p.add_argument("--status", default="good,broken")
+    p = sub.add_parser("export", help="JSON 으로 내보내기")
+    p.add_argument("db")
+    p.add_argument("output")
+    p.add_argument("--what", choices=("translation", "source"), default="translation")
+    p.add_argument("--status", default="", help="쉼표로 구분 (없으면 전체)")
+    p.add_argument("--order", choices=("input", "numeric"), default="input")
+    p = sub.add_parser("history", help="키 하나의 번역 기록")
+    p.add_argument("db")
+    p.add_argument("key")
+    p = sub.add_parser("stats", help="상태별 개수")
+    p.add_argument("db")
+    args = parser.parse_args()
+
+    store = ProjectStore(args.db)
+    if args.command == "import-source":
+        counts = store.import_source(iter_json_object(args.input))
+        print(f"📥 원문: 새 키 {counts['new']}, 바뀐 원문 {counts['changed']}, 그대로 {counts['unchanged']}")
+    elif args.command == "import-translation":
+        counts = store.import_translation(iter_json_object(args.input), args.label)
+        print(f"📥 번역: 정상 {counts['good']}, 오류 {counts['broken']} (원문 없는 새 키 {counts['added']})")
+    elif args.command == "recheck":
+        counts = store.recheck([s for s in args.status.split(",") if s])
+        print(f"🔍 {counts['checked']}개 검사, 상태가 바뀐 키 {counts['changed']}개")
+    elif args.command == "export":
+        statuses = [s for s in args.status.split(",") if s]
+        count = store.export(args.output, args.what, statuses, args.order)
+        if args.order == "numeric":
+            non_numeric = store.stats()["non_numeric_keys"]
+            if non_numeric:
+                print(f"⚠️ 숫자로 바꿀 수 없거나 정수 범위(±2^63)를 넘는 키 {non_numeric}개는 맨 뒤에 원문 순서로 씀")
+        print(f"📦 {count}개 → {args.output}")
+    elif args.command == "history":
+        print(json.dumps(store.history(args.key), ensure_ascii=False, indent=2))
+    elif args.command == "stats":
+        print(json.dumps(store.stats(), ensure_ascii=False, indent=2))
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
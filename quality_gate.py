@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+번역 중 즉시 품질 검사 (filter_ai.py 와 같은 기준)
+- 남은 히라가나/가타카나, "Note:"/"translation" 같은 AI 주석이 있으면 실패
+- 실패한 문장은 같은 실행 안에서 단계적으로 재요청 (번역기 쪽에서 처리)
+- 재요청 총량은 검사한 문장 수 대비 retry_budget 비율로 제한 (체계적으로 실패할 때 비용 폭주 방지)
+- 끝까지 실패한 문장은 dead-letter JSONL 에 기록 → 나중에 이 파일만 다시 돌리면 됨
+"""
+
+import json
+
+from filter_ai import find_broken_rule, is_translation_broken_final
+
+
+class QualityGate:
+    def __init__(self, dead_letter_path, max_attempts: int = 2, retry_budget: float = 0.2):
+        """
+        max_attempts : 문장 하나당 재요청 단계 수 (1단계: 실패한 것끼리 묶어서 strict 프롬프트, 2단계: 개별 strict)
+        retry_budget : 검사한 문장 수 대비 재요청 허용 비율
+        """
+        self.dead_letter_path = dead_letter_path
+        self.max_attempts = max_attempts
+        self.retry_budget = retry_budget
+
+        self.checked = 0
+        self.failed = 0       # 처음 검사에서 실패한 문장 수
+        self.retried = 0      # 재요청한 문장 수 (단계별 누적)
+        self.recovered = 0    # 재요청으로 통과한 문장 수
+        self.dead = 0         # dead-letter 로 보낸 문장 수
+
+    def is_broken(self, text) -> bool:
+        return is_translation_broken_final(text)
+
+    def allow_retry(self, count: int) -> bool:
+        """재요청 예산이 남아 있으면 count 만큼 사용하고 True"""
+        if self.retried + count > self.retry_budget * max(self.checked, 100):
+            return False
+        self.retried += count
+        return True
+
+    def dead_letter(self, key, source, translation, rule=None):
+        """rule: 실패 이유 (None 이면 filter_ai 규칙 이름)"""
+        self.dead += 1
+        with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"key": key, "source": source, "translation": translation,
+                                "rule": rule or find_broken_rule(translation)}, ensure_ascii=False) + "\n")
+
+    def as_dict(self) -> dict:
+        return {
+            "checked": self.checked,
+            "failed": self.failed,
+            "retried": self.retried,
+            "recovered": self.recovered,
+            "dead_letter": self.dead,
+        }
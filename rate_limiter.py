@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+429 응답 기반 적응형(AIMD) 속도 제한기
+- 요청/분(RPM), 토큰/분(TPM) 토큰 버킷 두 개로 요청 간격 조절
+- 성공하면 허용 속도를 조금씩(가산) 올리고, 429 가 나면 절반으로(승산) 줄임
+- 여러 worker 가 동시에 429 를 받아도 한 번만 줄이고, 전원이 같이 대기 (재시도 폭주 방지)
+- 서버가 Retry-After 를 보내면 그 시간만큼 대기
+- 동기(time.sleep) / 비동기(asyncio.sleep) 둘 다 같은 객체로 사용 가능
+"""
+
+import threading
+import time
+
+
+def get_retry_after(e: Exception):
+    """azure HttpResponseError 등에서 Retry-After(초) 를 꺼낸다. 없으면 None"""
+    response = getattr(e, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    for name, scale in (("retry-after-ms", 0.001), ("x-ms-retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return max(0.0, float(value) * scale)
+        except (TypeError, ValueError):
+            continue  # HTTP-date 형식 등은 무시하고 기본 backoff 사용
+    return None
+
+
+class _Bucket:
+    """분당 rate 만큼 채워지는 토큰 버킷. 잔량이 음수(빚)가 되면 그만큼 기다린다."""
+
+    def __init__(self, per_minute: float, burst_seconds: float):
+        self.per_minute = per_minute
+        self.burst_seconds = burst_seconds
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    @property
+    def capacity(self) -> float:
+        return max(1.0, self.per_minute * self.burst_seconds / 60.0)
+
+    def refill(self, now: float):
+        if now <= self.updated:
+            return  # 대기 중(미래 시점)에 예약된 경우 이미 그 시점까지 채워져 있음
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.per_minute / 60.0)
+        self.updated = now
+
+    def take(self, amount: float, now: float) -> float:
+        """amount 만큼 예약하고, 예약분을 쓸 수 있을 때까지 기다릴 시간(초)을 반환"""
+        self.refill(now)
+        self.level -= amount
+        if self.level >= 0:
+            return 0.0
+        return -self.level * 60.0 / self.per_minute
+
+
+class AdaptiveRateLimiter:
+    def __init__(self, max_rpm: float, max_tpm: float = 0, start_ratio: float = 0.5,
+                 increase_ratio: float = 0.01, decrease_factor: float = 0.5,
+                 min_ratio: float = 0.02, burst_seconds: float = 5.0, default_backoff: float = 2.0):
+        """
+        max_rpm / max_tpm : 배포(deployment) 쿼터. max_tpm=0 이면 토큰 제한 없음
+        start_ratio       : 처음 시작 속도 (쿼터 대비 비율)
+        increase_ratio    : 성공 1회당 올리는 속도 (쿼터 대비 비율, 가산 증가)
+        decrease_factor   : 429 1회당 곱하는 값 (승산 감소)
+        min_ratio         : 아무리 줄여도 이 비율 아래로는 내려가지 않음
+        """
+        self.max_rpm = max_rpm
+        self.max_tpm = max_tpm
+        self.increase_ratio = increase_ratio
+        self.decrease_factor = decrease_factor
+        self.min_ratio = min_ratio
+        self.default_backoff = default_backoff
+
+        self.ratio = start_ratio
+        self.requests = _Bucket(max_rpm * start_ratio, burst_seconds)
+        self.tokens = _Bucket(max_tpm * start_ratio, burst_seconds) if max_tpm else None
+
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.backoff = default_backoff
+        self.lock = threading.Lock()
+
+        self.successes = 0
+        self.throttles = 0
+
+    @property
+    def current_rpm(self) -> float:
+        return self.requests.per_minute
+
+    @property
+    def paused(self) -> bool:
+        """429 로 전체 대기 중이면 True (여러 엔드포인트 중 고를 때 사용)"""
+        return time.monotonic() < self.paused_until
+
+    def _apply_ratio(self, now: float):
+        self.requests.refill(now)
+        self.requests.per_minute = self.max_rpm * self.ratio
+        if self.tokens:
+            self.tokens.refill(now)
+            self.tokens.per_minute = self.max_tpm * self.ratio
+
+    def reserve(self, tokens: float = 0) -> float:
+        """요청 1건(+토큰) 을 예약하고 보내기 전에 기다려야 할 시간(초) 반환"""
+        with self.lock:
+            now = time.monotonic()
+            wait = max(0.0, self.paused_until - now)
+            start = now + wait
+            wait += self.requests.take(1, start)
+            if self.tokens and tokens:
+                wait = max(wait, self.tokens.take(tokens, start) + (start - now))
+            return wait
+
+    def acquire(self, tokens: float = 0):
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: float = 0):
+        import asyncio   # 비동기 모드에서만 필요 (import 비용이 커서 여기서)
+
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def adjust_tokens(self, delta: float):
+        """예약한 토큰 추정치와 실제 usage 의 차이를 반영 (delta > 0 이면 더 썼음)"""
+        if not self.tokens or not delta:
+            return
+        with self.lock:
+            self.tokens.refill(time.monotonic())
+            self.tokens.level -= delta
+
+    def on_success(self):
+        """가산 증가 (Additive Increase)"""
+        with self.lock:
+            self.successes += 1
+            self.backoff = self.default_backoff
+            if self.ratio < 1.0:
+                self.ratio = min(1.0, self.ratio + self.increase_ratio)
+                self._apply_ratio(time.monotonic())
+
+    def on_throttle(self, retry_after=None) -> float:
+        """
+        승산 감소 (Multiplicative Decrease).
+        동시에 들어온 429 는 하나의 혼잡 신호로 보고 한 번만 줄인다.
+        반환값: 모든 worker 가 공통으로 쉬게 될 시간(초)
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.throttles += 1
+
+            # 직전 감소 이후 대기 시간이 끝나기 전에 온 429 는 같은 혼잡으로 취급
+            if now >= self.paused_until and now - self.last_decrease >= self.backoff:
+                self.ratio = max(self.min_ratio, self.ratio * self.decrease_factor)
+                self._apply_ratio(now)
+                self.last_decrease = now
+                if retry_after is None:
+                    self.backoff = min(self.backoff * 2, 60.0)
+
+            pause = retry_after if retry_after is not None else self.backoff
+            self.paused_until = max(self.paused_until, now + pause)
+            # 대기가 끝나면 버킷이 한꺼번에 쏟아내지 않도록 비워 둔다
+            self.requests.level = min(self.requests.level, 0.0)
+            return self.paused_until - now
@@ -1,37 +1,47 @@
 import json
 
+from merge_engine import print_report, sort_json_objects
+from project_store import open_store
+
 # --- 설정 ---
 # 정렬하고 싶은 원본 파일 이름을 여기에 입력하세요.
-input_file_name = r"C:\Users\hoho\Desktop\new\translated_output_end.json"
+# 여러 개를 넣으면 합치면서 정렬합니다. (같은 키는 뒤 파일의 값)
+input_file_names = [r"C:\Users\hoho\Desktop\new\translated_output_end.json"]
 
 # 정렬된 결과를 저장할 파일 이름을 여기에 입력하세요.
 output_file_name = r"C:\Users\hoho\Desktop\new\translated_output_end2.json"
+
+# 프로젝트 저장소(project_store.py)를 쓰면 경로를 입력하세요. (None 이면 위 파일들을 정렬합니다)
+# 저장소의 번역을 정렬용 정수 열 색인 순서로 바로 내보냅니다.
+store_path = None
 # --- 설정 끝 ---
 
 try:
-    # 1. JSON 파일 읽기
-    with open(input_file_name, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    print(f"'{input_file_name}' 파일을 성공적으로 읽었습니다.")
-
-    # 2. 키(key)를 정수(int)로 변환하여 숫자 순서대로 정렬
-    # 각 키-값 쌍(item)에서 키(item[0])를 숫자로 바꿔 정렬 기준으로 사용합니다.
-    sorted_data = dict(sorted(data.items(), key=lambda item: int(item[0])))
-    print("데이터를 숫자 순서대로 정렬했습니다.")
-
-    # 3. 정렬된 데이터를 새로운 JSON 파일로 저장
-    with open(output_file_name, 'w', encoding='utf-8') as f:
-        # ensure_ascii=False는 한글 등 다국어 문자가 깨지지 않도록 합니다.
-        # indent=4는 JSON 파일을 보기 좋게 4칸 들여쓰기합니다.
-        json.dump(sorted_data, f, ensure_ascii=False, indent=4)
-
-    print(f"🎉 정렬 완료! '{output_file_name}' 파일에 결과를 저장했습니다.")
-    print(f"총 {len(sorted_data)}개의 항목이 정렬되었습니다.")
-
-except FileNotFoundError:
-    print(f"❌ 오류: '{input_file_name}' 파일을 찾을 수 없습니다.")
+    # 키(key)를 정수(int)로 변환하여 숫자 순서대로 정렬
+    # 파일 전체를 메모리에 올리지 않고, 조금씩 나눠 정렬한 조각(run)을 임시 파일에 쓴 뒤 한 번에 병합합니다.
+    # 숫자로 바꿀 수 없는 키가 있어도 멈추지 않고 맨 뒤에 원래 순서대로 두고 알려줍니다.
+    # (json.dump(..., ensure_ascii=False, indent=4) 와 같은 모양으로, 임시 파일에 쓴 뒤 교체합니다.)
+    if store_path:
+        store = open_store(store_path)
+        count = store.export(output_file_name, order="numeric", indent=4)
+        non_numeric = store.stats()["non_numeric_keys"]
+        store.close()
+
+        print(f"🎉 정렬 완료! '{output_file_name}' 파일에 결과를 저장했습니다.")
+        print(f"총 {count}개의 항목이 정렬되었습니다.")
+        if non_numeric:
+            print(f"⚠️ 숫자로 바꿀 수 없거나 정수 범위(±2^63)를 넘는 키 {non_numeric}개는 맨 뒤에 원래 순서대로 두었습니다.")
+    else:
+        stats = sort_json_objects(input_file_names, output_file_name, indent=4)
+
+        print(f"🎉 정렬 완료! '{output_file_name}' 파일에 결과를 저장했습니다.")
+        print(f"총 {stats.written}개의 항목이 정렬되었습니다.")
+        print_report(stats)
+
+except FileNotFoundError as e:
+    print(f"❌ 오류: '{e.filename}' 파일을 찾을 수 없습니다.")
     print("   스크립트 파일과 같은 폴더에 파일이 있는지, 파일 이름이 올바른지 확인해주세요.")
-except (ValueError, TypeError):
-    print("❌ 오류: 파일의 키(key) 중에 숫자로 바꿀 수 없는 값이 있습니다.")
+except json.JSONDecodeError as e:
+    print(f"❌ 오류: JSON 파일 형식이 잘못되었습니다: {e}")
 except Exception as e:
     print(f"❌ 알 수 없는 오류가 발생했습니다: {e}")
\ No newline at end of file
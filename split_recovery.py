@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+#BATCH_SPLIT_ 분할 불일치 복구
+- 응답을 번호 마커(#BATCH_SPLIT_<idx>#) 기준으로 파싱해서, 번호와 내용이 멀쩡한 조각은 살림
+- 번호가 빠졌거나 중복된 조각, 다음 번호가 빠져서 두 문장이 합쳐졌을 가능성이 있는 조각,
+  원문에 비해 비정상적으로 긴 조각은 버리고 그 번호만 다시 요청
+- 살린 조각 수 / 복구에 쓴 호출 수 / 절약한 호출 수(예전 서브 배치 fallback 대비)를 집계
+"""
+
+import math
+import re
+
+MARKER_RE = re.compile(r'#BATCH_SPLIT_(\d+)#[ \t]*\n?')
+
+
+def legacy_fallback_calls(batch_size: int, individual_slots) -> int:
+    """
+    예전 fallback 이 같은 불일치 배치에 썼을 호출 수 (절약 수의 기준).
+    예전 방식: 3~5개씩 서브 배치로 전부 다시 요청하고, 서브 배치가 또 어긋나면 그 안의 문장을 하나씩 개별 번역.
+    어느 서브 배치가 어긋났을지는 모르므로, 이번에 개별 번역까지 가야 했던 슬롯이 들어 있는 서브 배치만 어긋났다고 봄
+    """
+    size = max(3, min(5, batch_size))
+    failed_groups = {slot // size for slot in individual_slots}
+    individual = sum(min(size, batch_size - group * size) for group in failed_groups)
+    return math.ceil(batch_size / size) + individual
+
+
+def parse_marked_segments(output: str, sources: list) -> dict:
+    """
+    output   : fix_batch_markers 까지 끝난 모델 응답
+    sources  : 요청에 넣은 슬롯별 preprocess_text 결과 (마커 번호 = 리스트 순서)
+    반환값   : {번호: 조각} (믿을 수 있는 조각만)
+    """
+    n = len(sources)
+    matches = list(MARKER_RE.finditer(output))
+    found = {}
+    seen = set()   # 다음 번호 마커가 있는 번호 (found + 응답 끝의 빈 마커)
+    duplicated = set()
+    for pos, m in enumerate(matches):
+        idx = int(m.group(1))
+        end = matches[pos + 1].start() if pos + 1 < len(matches) else len(output)
+        segment = output[m.end():end].strip()
+        if not segment and pos == len(matches) - 1:
+            seen.add(idx)   # 스트리밍 조기 중단으로 끝난 응답: 마지막 마커까지는 앞 조각이 끝난 것
+        if idx >= n or not segment:
+            continue
+        seen.add(idx)
+        if idx in found:
+            duplicated.add(idx)
+        found[idx] = segment
+
+    segments = {}
+    for idx, segment in found.items():
+        if idx in duplicated:
+            continue
+        # 다음 번호 마커가 없으면 다음 문장이 이 조각에 합쳐졌을 수 있음
+        if idx + 1 < n and idx + 1 not in seen:
+            continue
+        # 원문 대비 지나치게 길면 합쳐진 것으로 간주
+        if len(segment) > max(3 * len(sources[idx]), len(sources[idx]) + 60):
+            continue
+        segments[idx] = segment
+    return segments
+
+
+class RecoveryStats:
+    def __init__(self):
+        self.mismatches = 0       # 분할 불일치가 난 배치 수
+        self.salvaged = 0         # 불일치 응답 / 번호 재요청 응답에서 살린 조각 수
+        self.individual = 0       # 끝까지 못 살려서 개별 번역한 슬롯 수
+        self.recovery_calls = 0   # 복구에 추가로 쓴 API 호출 수
+        self.calls_saved = 0      # 예전 서브 배치 fallback 대비 절약한 호출 수 (legacy_fallback_calls, 더 쓰면 음수)
+
+    def record(self, batch_size: int, calls: int, individual_slots):
+        self.mismatches += 1
+        self.individual += len(individual_slots)
+        self.recovery_calls += calls
+        self.calls_saved += legacy_fallback_calls(batch_size, individual_slots) - calls
+
+    def as_dict(self) -> dict:
+        return {
+            "mismatches": self.mismatches,
+            "salvaged": self.salvaged,
+            "individual": self.individual,
+            "recovery_calls": self.recovery_calls,
+            "calls_saved": self.calls_saved,
+        }
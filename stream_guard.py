@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+스트리밍 응답 조기 중단
+- 청크가 올 때마다 #BATCH_SPLIT_ 마커를 따라가며 지금 쓰고 있는 조각을 추적
+- 중단 조건
+    length     : 전체 출력이 입력 길이 대비 비정상적으로 길어짐 (폭주 / 반복)
+    segment    : 조각 하나가 원문 조각 대비 비정상적으로 길어짐 (그 조각에서 반복)
+    commentary : "Translation Notes" 같은 해설이 시작됨 (clean_translation 이 어차피 지울 부분)
+- 중단하면 그때까지 끝난 조각만 남김 → split_recovery 가 끝난 조각은 살리고 나머지 번호만 재요청
+- <think> 블록 안은 길이만 보고 해설 / 마커 검사는 하지 않음
+"""
+
+import re
+
+from split_recovery import MARKER_RE
+
+# 모델이 변형한 마커도 따라가도록 느슨하게 (＃, SPIT/SPLlT, 공백)
+_LOOSE_MARKER_RE = re.compile(r'[#＃]BATCH[_\s]*SP(?:LI|Ll|I)?T[_\s]*(\d+)[#＃]', re.IGNORECASE)
+_COMMENTARY_RE = re.compile(r'Translation Notes:|\*\*Translation Notes')
+_NOTE_LINE_RE = re.compile(r'(?:^|\n)[ \t]*Note:')   # 마지막 조각 뒤에 붙는 "Note: ..." 줄
+
+LENGTH_FACTOR = 2.5     # 전체 출력 글자 수 상한 = 입력 글자 수 * LENGTH_FACTOR + LENGTH_SLACK
+LENGTH_SLACK = 300
+SEGMENT_FACTOR = 4      # 조각 하나의 글자 수 상한 = max(원문 조각 * SEGMENT_FACTOR, 원문 조각 + SEGMENT_SLACK)
+SEGMENT_SLACK = 120
+_OVERLAP = 40           # 청크 경계에 걸린 마커 / 해설 패턴을 놓치지 않도록 다시 보는 글자 수
+
+
+def split_sources(batch_text: str) -> list:
+    """요청 텍스트를 마커 기준으로 나눈 원문 조각 목록 (마커가 없으면 전체가 한 조각)"""
+    matches = list(MARKER_RE.finditer(batch_text))
+    if not matches:
+        return [batch_text]
+    sources = []
+    for pos, m in enumerate(matches):
+        end = matches[pos + 1].start() if pos + 1 < len(matches) else len(batch_text)
+        sources.append(batch_text[m.end():end])
+    return sources
+
+
+class StreamGuard:
+    def __init__(self, batch_text: str):
+        self.sources = split_sources(batch_text)
+        self.marked = len(self.sources) > 1 or bool(MARKER_RE.search(batch_text))
+        self.limit = int(len(batch_text) * LENGTH_FACTOR) + LENGTH_SLACK
+        self.text = ""
+        self.reason = None     # 중단 이유 (끝까지 받았으면 None)
+        self.cut = None        # 중단 시 남길 글자 수
+        self.thinking = None   # <think> 블록 안인지 (None: 아직 모름)
+        self.body_start = 0    # <think> 블록이 끝난 위치
+        self.scanned = 0
+        self.marker_end = 0    # 마지막으로 처리한 마커 끝 위치
+        self.segment = None if self.marked else 0
+        self.segment_start = 0
+
+    def feed(self, delta: str) -> bool:
+        """청크 추가. 계속 받아도 되면 True, 중단해야 하면 False"""
+        self.text += delta
+        text = self.text
+        if len(text) > self.limit:
+            return self._stop("length", self.segment_start)
+
+        if self.thinking is None:
+            head = text.lstrip()
+            if len(head) < len("<think>") and "<think>".startswith(head):
+                return True
+            self.thinking = head.startswith("<think>")
+        if self.thinking:
+            end = text.find("</think>")
+            if end < 0:
+                return True
+            self.thinking = False
+            self.body_start = self.scanned = self.segment_start = end + len("</think>")
+
+        start = max(self.scanned - _OVERLAP, self.body_start)
+        window = text[start:]
+        for m in _LOOSE_MARKER_RE.finditer(window):
+            if start + m.end() > self.marker_end:
+                self.segment = int(m.group(1))
+                self.segment_start = self.marker_end = start + m.end()
+        self.scanned = len(text)
+
+        m = _COMMENTARY_RE.search(window)
+        if m is None and self._last_segment():
+            m = _NOTE_LINE_RE.search(text, max(start, self.segment_start))
+            if m is not None:
+                return self._stop("commentary", m.start())
+        elif m is not None:
+            return self._stop("commentary", start + m.start())
+
+        if self.segment is not None and self.segment < len(self.sources):
+            source_len = len(self.sources[self.segment].strip())
+            if len(text) - self.segment_start > max(source_len * SEGMENT_FACTOR, source_len + SEGMENT_SLACK):
+                return self._stop("segment", self.segment_start)
+        return True
+
+    def _last_segment(self) -> bool:
+        return self.segment is not None and self.segment >= len(self.sources) - 1
+
+    def _stop(self, reason: str, cut: int) -> bool:
+        self.reason = reason
+        self.cut = cut
+        return False
+
+    @property
+    def finished_segments(self) -> int:
+        """끝까지 받은 조각 수 (지금 쓰고 있는 조각은 제외)"""
+        if self.segment is None:
+            return 0
+        return self.segment + (1 if self.reason is None else 0)
+
+    def result(self) -> str:
+        """받은 텍스트. 중단했으면 끝난 조각까지만 (해설로 중단했으면 해설 앞까지)"""
+        return self.text if self.cut is None else self.text[:self.cut]
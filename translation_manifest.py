@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+증분 번역용 매니페스트 (SQLite)
+- 키마다 원문 해시 + 그 원문에 실제로 걸리는 용어집 항목(jp → kr)의 해시 + 마지막 번역을 저장
+- 새 원문 덤프가 오면 매니페스트와 비교해서 번역할 키만 고름
+    new      : 매니페스트에 없는 키
+    source   : 원문이 바뀐 키
+    glossary : 원문은 같지만 걸리는 용어가 추가/삭제/수정된 키
+  나머지는 API 를 부르지 않고 저장된 번역을 그대로 사용
+- 입력을 읽으면서 비교 (diff_iter) → 번역기는 입력 전체를 기다리지 않고 첫 배치 시작
+  (LOOKUP_CHUNK 개씩 그 키의 해시만 조회, 저장된 번역은 합칠 때 translations 로 꺼냄 → 매니페스트 전체를 메모리에 올리지 않음)
+- 새 입력에 없는 키(removed)는 전체 덤프를 넣었을 때만 지울 것 (일부만 다시 번역하는 입력이면 나머지가 지워짐)
+- 번역 메모리는 용어집이 한 줄만 바뀌어도 전체가 미적중 → 용어 단위로 영향받는 키만 다시 번역
+
+사용법 (관리용):
+    python translation_manifest.py stats <manifest.sqlite>
+    python translation_manifest.py diff <manifest.sqlite> <new_source.json> <glossary.json> [changed_out.json]
+"""
+
+import hashlib
+import json
+import sqlite3
+import sys
+import time
+from collections import Counter
+
+LOOKUP_CHUNK = 500   # 한 번에 조회할 키 수 (SQLite 변수 개수 제한 999 이하)
+
+
+def source_hash(text) -> str:
+    return hashlib.sha256(str(text).encode("utf-8")).hexdigest()
+
+
+def glossary_hash(terms: dict) -> str:
+    """원문에 걸리는 용어집 항목 {jp: kr} 의 해시 (걸리는 용어가 없으면 빈 문자열)"""
+    if not terms:
+        return ""
+    raw = json.dumps(sorted(terms.items()), ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class ManifestDiff:
+    def __init__(self):
+        self.changed = {}        # 번역할 키 -> (원문 해시, 용어 해시)
+        self.unchanged = set()   # 그대로 쓸 키 (번역은 TranslationManifest.translations 로 꺼냄)
+        self.removed = []        # 새 원문에서 사라진 키
+        self.reasons = Counter()
+
+    def as_dict(self) -> dict:
+        total = len(self.changed) + len(self.unchanged)
+        return {
+            "total": total,
+            "changed": len(self.changed),
+            "unchanged": len(self.unchanged),
+            "removed": len(self.removed),
+            "changed_ratio": round(len(self.changed) / total, 4) if total else 0.0,
+            **{f"reason_{name}": count for name, count in sorted(self.reasons.items())},
+        }
+
+
+class TranslationManifest:
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS manifest ("
+            " key TEXT PRIMARY KEY,"
+            " source_hash TEXT NOT NULL,"
+            " glossary_hash TEXT NOT NULL,"
+            " translation TEXT NOT NULL,"
+            " updated REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def diff(self, pairs, terms_of) -> ManifestDiff:
+        """
+        pairs    : 새 원문 (key, value)
+        terms_of : 원문 → 걸리는 용어집 항목 {jp: kr} (번역기와 같은 전처리 기준)
+        """
+        result = ManifestDiff()
+        for _ in self.diff_iter(pairs, terms_of, result):
+            pass
+        return result
+
+    def diff_iter(self, pairs, terms_of, result: ManifestDiff):
+        """
+        diff 의 스트리밍 버전: pairs 를 읽으면서 result 를 채우고 (key, value) 를 그대로 넘겨줌.
+        LOOKUP_CHUNK 개씩 모아서 그 키들의 해시만 조회 → yield 하기 전에 그 키의 분류가 끝나 있음
+        (result.unchanged 로 건너뛸지 바로 판단 가능).
+        읽은 키는 임시 테이블에 모아 두고, result.removed 는 끝까지 읽은 뒤 NOT IN 조회로 채움
+        """
+        conn = self.conn
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS diff_seen (key TEXT PRIMARY KEY)")
+        conn.execute("DELETE FROM temp.diff_seen")
+        chunk = []
+        for pair in pairs:
+            chunk.append(pair)
+            if len(chunk) >= LOOKUP_CHUNK:
+                yield from self._diff_chunk(chunk, terms_of, result)
+                chunk = []
+        yield from self._diff_chunk(chunk, terms_of, result)
+        result.removed = [row[0] for row in conn.execute(
+            "SELECT key FROM manifest WHERE key NOT IN (SELECT key FROM temp.diff_seen)")]
+        conn.execute("DELETE FROM temp.diff_seen")
+        conn.commit()
+
+    def _diff_chunk(self, chunk, terms_of, result: ManifestDiff):
+        keys = [key for key, _ in chunk]
+        self.conn.executemany("INSERT OR IGNORE INTO temp.diff_seen (key) VALUES (?)", [(key,) for key in keys])
+        stored = {key: (sh, gh) for key, sh, gh in self.conn.execute(
+            f"SELECT key, source_hash, glossary_hash FROM manifest WHERE key IN ({','.join('?' * len(keys))})", keys)}
+        for key, value in chunk:
+            hashes = (source_hash(value), glossary_hash(terms_of(value)))
+            old = stored.get(key)
+            if old is None:
+                reason = "new"
+            elif old[0] != hashes[0]:
+                reason = "source"
+            elif old[1] != hashes[1]:
+                reason = "glossary"
+            else:
+                result.unchanged.add(key)
+                yield key, value
+                continue
+            result.changed[key] = hashes
+            result.reasons[reason] += 1
+            yield key, value
+
+    def translations(self, keys) -> dict:
+        """keys 의 저장된 번역 {key: 번역} (LOOKUP_CHUNK 개씩 조회)"""
+        keys = list(keys)
+        found = {}
+        for start in range(0, len(keys), LOOKUP_CHUNK):
+            part = keys[start:start + LOOKUP_CHUNK]
+            found.update(self.conn.execute(
+                f"SELECT key, translation FROM manifest WHERE key IN ({','.join('?' * len(part))})", part))
+        return found
+
+    def update(self, rows):
+        """(key, 원문 해시, 용어 해시, 번역) 들을 저장하고 커밋"""
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO manifest (key, source_hash, glossary_hash, translation, updated)"
+            " VALUES (?, ?, ?, ?, ?)", [(*row, now) for row in rows]
+        )
+        self.conn.commit()
+
+    def remove(self, keys):
+        self.conn.executemany("DELETE FROM manifest WHERE key = ?", [(key,) for key in keys])
+        self.conn.commit()
+
+    def stats(self) -> dict:
+        entries, glossary_keys = self.conn.execute(
+            "SELECT COUNT(*), SUM(glossary_hash != '') FROM manifest").fetchone()
+        return {"entries": entries, "keys_with_glossary_terms": glossary_keys or 0}
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+
+    command, db_path = sys.argv[1], sys.argv[2]
+    manifest = TranslationManifest(db_path)
+    if command == "stats":
+        print(json.dumps(manifest.stats(), ensure_ascii=False, indent=2))
+    elif command == "diff" and len(sys.argv) >= 5:
+        # 번역기와 같은 전처리/용어집 기준으로 비교 (import 만으로는 아무것도 열지 않음)
+        from deepseek_transtool2 import glossary_terms_of
+        from json_stream import JsonObjectWriter, iter_json_object
+
+        with open(sys.argv[4], "r", encoding="utf-8") as f:
+            glossary = json.load(f).get("JP_TO_KR", {})
+        diff = manifest.diff(iter_json_object(sys.argv[3]), glossary_terms_of(glossary))
+        print(json.dumps(diff.as_dict(), ensure_ascii=False, indent=2))
+        if len(sys.argv) >= 6:
+            # 입력을 한 번 더 흘려 읽으면서 번역할 키만 씀
+            with JsonObjectWriter(sys.argv[5]) as out:
+                out.write_many((key, value) for key, value in iter_json_object(sys.argv[3]) if key in diff.changed)
+            print(f"📝 번역할 키 {len(diff.changed)}개 → {sys.argv[5]}")
+    else:
+        print(__doc__)
+        sys.exit(1)
+    manifest.close()
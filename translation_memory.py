@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+번역 메모리 (SQLite)
+- 키: sha256(프롬프트 버전 + 용어집 버전 + preprocess_text 결과)
+- 값: 모델이 돌려준 번역 조각 (플레이스홀더가 남아 있는 상태 → 문장마다 자기 플레이스홀더로 복원)
+- 같은 문장은 이번 실행이든 예전 실행이든 API 를 다시 부르지 않음
+- 용어집/프롬프트가 바뀌면 키가 달라져서 자동으로 적중하지 않고, purge_stale 로 정리
+- 적중 횟수 갱신은 모아 뒀다가 put_many 때 같이 커밋 → 쓰기 잠금을 API 요청 동안 잡고 있지 않음
+  (여러 프로세스가 같은 파일을 공유해도 됨, work_store.py 분산 모드)
+
+사용법 (관리용):
+    python translation_memory.py stats <db>
+    python translation_memory.py purge <db> <glossary.json> [prompt_version]   # 기본: PROMPT_VERSION
+    python translation_memory.py evict <db> <days>
+"""
+
+import hashlib
+import json
+import sqlite3
+import sys
+import time
+
+# 번역기(TranslatorConfig.prompt_version) 기본값과 같은 값 → purge 기본값이 현재 항목을 지우지 않게
+PROMPT_VERSION = "v2"
+
+
+def glossary_version(glossary: dict) -> str:
+    """용어집 내용으로 만든 버전 문자열 (항목이 하나라도 바뀌면 달라짐)"""
+    raw = json.dumps(glossary, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class TranslationMemory:
+    def __init__(self, path, glossary_version: str, prompt_version: str):
+        self.path = path
+        self.glossary_version = glossary_version
+        self.prompt_version = prompt_version
+
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS tm ("
+            " key TEXT PRIMARY KEY,"
+            " translation TEXT NOT NULL,"
+            " glossary_version TEXT NOT NULL,"
+            " prompt_version TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " hits INTEGER NOT NULL DEFAULT 0)"
+        )
+        self.conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0   # 동시에 요청 중인 같은 문장을 기다려서 재사용한 횟수
+        self.stored = 0
+        self.touched = []  # 적중한 키 (다음 커밋 때 hits / last_used 갱신)
+
+    def make_key(self, protected_text: str) -> str:
+        raw = f"{self.prompt_version}\0{self.glossary_version}\0{protected_text}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, protected_text: str):
+        key = self.make_key(protected_text)
+        row = self.conn.execute("SELECT translation FROM tm WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.touched.append(key)
+        return row[0]
+
+    def contains(self, protected_text: str) -> bool:
+        """적중 여부만 확인 (통계 / hits 를 건드리지 않음, plan 용)"""
+        return self.conn.execute("SELECT 1 FROM tm WHERE key = ?", (self.make_key(protected_text),)).fetchone() is not None
+
+    def put_many(self, pairs):
+        """(preprocess_text 결과, 번역 조각) 쌍들을 저장하고 커밋"""
+        now = time.time()
+        rows = [(self.make_key(src), tr, self.glossary_version, self.prompt_version, now, now)
+                for src, tr in pairs]
+        if self.touched:
+            self.conn.executemany("UPDATE tm SET hits = hits + 1, last_used = ? WHERE key = ?",
+                                  [(now, key) for key in self.touched])
+            self.touched = []
+        if rows:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO tm (key, translation, glossary_version, prompt_version, created, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            self.stored += len(rows)
+        self.conn.commit()
+
+    def purge_stale(self) -> int:
+        """현재 용어집/프롬프트 버전이 아닌 항목 삭제"""
+        cur = self.conn.execute(
+            "DELETE FROM tm WHERE glossary_version != ? OR prompt_version != ?",
+            (self.glossary_version, self.prompt_version)
+        )
+        self.conn.commit()
+        return cur.rowcount
+
+    def evict_older_than(self, days: float) -> int:
+        """days 일 동안 한 번도 쓰이지 않은 항목 삭제"""
+        cur = self.conn.execute("DELETE FROM tm WHERE last_used < ?", (time.time() - days * 86400,))
+        self.conn.commit()
+        return cur.rowcount
+
+    def stats(self) -> dict:
+        total = self.conn.execute("SELECT COUNT(*) FROM tm").fetchone()[0]
+        current = self.conn.execute(
+            "SELECT COUNT(*) FROM tm WHERE glossary_version = ? AND prompt_version = ?",
+            (self.glossary_version, self.prompt_version)
+        ).fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": total,
+            "current_version_entries": current,
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared_in_flight": self.shared,
+            "stored": self.stored,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def close(self):
+        self.put_many(())
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+
+    command, db_path = sys.argv[1], sys.argv[2]
+    if command == "stats":
+        tm = TranslationMemory(db_path, "", "")
+        print(json.dumps(tm.stats(), ensure_ascii=False, indent=2))
+    elif command == "purge" and len(sys.argv) >= 4:
+        with open(sys.argv[3], "r", encoding="utf-8") as f:
+            version = glossary_version(json.load(f).get("JP_TO_KR", {}))
+        tm = TranslationMemory(db_path, version, sys.argv[4] if len(sys.argv) >= 5 else PROMPT_VERSION)
+        print(f"🧹 예전 용어집/프롬프트 항목 {tm.purge_stale()}개 삭제")
+    elif command == "evict" and len(sys.argv) >= 4:
+        tm = TranslationMemory(db_path, "", "")
+        print(f"🧹 {sys.argv[3]}일 이상 안 쓰인 항목 {tm.evict_older_than(float(sys.argv[3]))}개 삭제")
+    else:
+        print(__doc__)
+        sys.exit(1)
+    tm.close()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+여러 프로세스 / 여러 PC 가 나눠서 번역하는 공유 작업 저장소 (SQLite)
+- 입력을 한 번 올려두면 키 순서대로 range_size 개씩 구간(range)으로 나눔
+  (여러 worker 가 동시에 시작하면 하나만 LOAD_CHUNK 개씩 커밋하면서 올리고, 나머지는 다 올라갈 때까지 기다림)
+- worker 는 구간을 임대(lease)해서 번역하고, 배치가 끝날 때마다 결과를 저장하면서 임대를 연장
+- 임대가 만료된 구간(worker 가 죽었거나 멈춤)은 다른 worker 에게 다시 배정
+  → 이미 저장된 키는 건너뛰고 나머지만 번역
+- 모든 구간이 끝나면 merge 로 입력 순서 그대로 출력 파일 생성 (단일 실행 결과와 같은 파일)
+- 파일 하나를 공유해야 하므로 같은 PC 의 여러 프로세스, 또는 네트워크 드라이브에 둔 파일로 사용
+  (SQLite 잠금이 제대로 되지 않는 파일 시스템에서는 쓰지 말 것)
+
+사용법 (관리용):
+    python work_store.py load <store.sqlite> <input.json> [range_size]
+    python work_store.py stats <store.sqlite>
+    python work_store.py requeue <store.sqlite>           # 임대 중인 구간을 모두 즉시 재배정 가능하게
+    python work_store.py merge <store.sqlite> <output.json>
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import sys
+import time
+
+from json_stream import JsonObjectWriter
+
+LOAD_CHUNK = 10000   # 입력을 올릴 때 한 번에 커밋할 행 수 (그 사이에만 쓰기 잠금을 잡음)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkRange:
+    def __init__(self, range_id: int, sources: dict, done: int, reassigned: bool):
+        self.range_id = range_id
+        self.sources = sources         # 아직 번역하지 않은 키 -> 원문 (키 순서)
+        self.done = done               # 이전 worker 가 이미 저장한 키 수
+        self.reassigned = reassigned   # 만료된 임대를 넘겨받은 구간인지
+
+
+class WorkStore:
+    def __init__(self, path, lease_seconds: float = 300.0, worker_id: str = None):
+        """
+        lease_seconds : 임대 유효 시간 (배치 하나가 끝날 때마다 연장 → 배치 하나 처리 시간보다 넉넉하게)
+        worker_id     : 이 프로세스 이름 (기본: 호스트명:pid)
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.worker_id = worker_id or default_worker_id()
+        # 트랜잭션은 직접 관리 (임대는 BEGIN IMMEDIATE 로 다른 worker 와 겹치지 않게)
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            " seq INTEGER PRIMARY KEY,"
+            " key TEXT NOT NULL UNIQUE,"
+            " source TEXT NOT NULL,"
+            " translation TEXT)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS ranges ("
+            " range_id INTEGER PRIMARY KEY,"
+            " start_seq INTEGER NOT NULL,"
+            " end_seq INTEGER NOT NULL,"
+            " state TEXT NOT NULL DEFAULT 'pending',"
+            " worker TEXT,"
+            " lease_until REAL NOT NULL DEFAULT 0,"
+            " leases INTEGER NOT NULL DEFAULT 0)"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def _meta(self, name):
+        row = self.conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _claim_load(self) -> str:
+        """
+        올리기 담당 차지. "loaded" (이미 올라감) / "claimed" (이 worker 가 올림) / "waiting" (다른 worker 가 올리는 중)
+        올리던 worker 가 lease_seconds 동안 진행이 없으면(죽었으면) 올리다 만 행을 지우고 넘겨받음
+        """
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self._meta("loaded"):
+                result = "loaded"
+            else:
+                loading = self._meta("loading")
+                if loading is not None and json.loads(loading)["at"] > time.time() - self.lease_seconds:
+                    result = "waiting"
+                else:
+                    conn.execute("DELETE FROM items")
+                    conn.execute("DELETE FROM ranges")
+                    self._set_loading()
+                    result = "claimed"
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def _set_loading(self):
+        self.conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('loading', ?)",
+                          (json.dumps({"worker": self.worker_id, "at": time.time()}),))
+
+    def _owns_load(self) -> bool:
+        loading = self._meta("loading")
+        return loading is not None and json.loads(loading)["worker"] == self.worker_id
+
+    def _insert_items(self, rows) -> bool:
+        """올리기 담당인 동안만 rows 를 넣고 진행 시각 갱신 (넘겨받혔으면 False)"""
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            owned = self._owns_load()
+            if owned:
+                conn.executemany("INSERT INTO items (seq, key, source) VALUES (?, ?, ?)", rows)
+                self._set_loading()
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return owned
+
+    def load(self, pairs, range_size: int = 200, poll_interval: float = 1.0) -> bool:
+        """
+        입력 (key, value) 를 올리고 구간으로 나눔. 이미 올라가 있으면 아무것도 하지 않고 False
+        (여러 worker 가 동시에 시작해도 한 번만 올라감).
+        쓰기 잠금은 'loading' 표시를 차지할 때와 LOAD_CHUNK 개씩 넣을 때만 잡음 → 큰 입력을 올리는 동안
+        다른 worker 가 잠금 대기 시간 초과로 실패하지 않고, poll_interval 마다 'loaded' 가 됐는지 확인하며 기다림
+        """
+        while True:
+            claim = self._claim_load()
+            if claim == "loaded":
+                return False
+            if claim == "claimed":
+                break
+            time.sleep(poll_interval)
+
+        seq = 0
+        rows = []
+        owned = True
+        for key, value in pairs:
+            rows.append((seq, key, json.dumps(value, ensure_ascii=False)))
+            seq += 1
+            if len(rows) >= LOAD_CHUNK:
+                owned = self._insert_items(rows)
+                rows = []
+                if not owned:
+                    break
+        if owned:
+            owned = self._insert_items(rows)
+
+        conn = self.conn
+        if owned:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                owned = self._owns_load()
+                if owned:
+                    # 구간과 'loaded' 를 한 트랜잭션에 → 다른 worker 는 다 올라간 뒤에만 구간을 봄
+                    conn.executemany("INSERT INTO ranges (start_seq, end_seq) VALUES (?, ?)",
+                                     [(start, min(start + range_size, seq)) for start in range(0, seq, range_size)])
+                    conn.execute("INSERT INTO meta (name, value) VALUES ('loaded', ?)", (str(time.time()),))
+                    conn.execute("DELETE FROM meta WHERE name = 'loading'")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        # 너무 오래 멈춰서 다른 worker 가 넘겨받았으면 False (그 worker 가 다 올리면 lease 로 구간을 받음)
+        return owned
+
+    def lease(self):
+        """
+        다음 구간 임대 (대기 중인 구간 → 만료된 임대 순서). 남은 구간이 없으면 None.
+        다른 worker 가 임대 중인 구간만 남아 있어도 None (그 worker 가 죽으면 다음 lease 에서 넘겨받음)
+        """
+        conn = self.conn
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT range_id, start_seq, end_seq, state FROM ranges"
+                " WHERE state = 'pending' OR (state = 'leased' AND lease_until < ?)"
+                " ORDER BY state = 'leased', range_id LIMIT 1", (now,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            range_id, start, end, state = row
+            conn.execute(
+                "UPDATE ranges SET state = 'leased', worker = ?, lease_until = ?, leases = leases + 1"
+                " WHERE range_id = ?", (self.worker_id, now + self.lease_seconds, range_id)
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        sources = {}
+        done = 0
+        for key, source, translation in conn.execute(
+                "SELECT key, source, translation FROM items WHERE seq >= ? AND seq < ? ORDER BY seq", (start, end)):
+            if translation is None:
+                sources[key] = json.loads(source)
+            else:
+                done += 1
+        return WorkRange(range_id, sources, done, reassigned=state == "leased")
+
+    def save(self, work: WorkRange, results: dict) -> bool:
+        """
+        배치 결과 저장 + 임대 연장. 임대를 이미 다른 worker 가 가져갔으면 False
+        (그래도 결과는 저장 → 넘겨받은 worker 는 저장된 키를 건너뜀)
+        """
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("UPDATE items SET translation = ? WHERE key = ?",
+                             [(json.dumps(v, ensure_ascii=False), k) for k, v in results.items()])
+            owned = conn.execute(
+                "UPDATE ranges SET lease_until = ? WHERE range_id = ? AND worker = ? AND state = 'leased'",
+                (time.time() + self.lease_seconds, work.range_id, self.worker_id)
+            ).rowcount
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return bool(owned)
+
+    def complete(self, work: WorkRange) -> bool:
+        """구간 완료 표시 (임대를 잃었으면 False → 가져간 worker 가 완료 처리)"""
+        return bool(self.conn.execute(
+            "UPDATE ranges SET state = 'done', lease_until = 0 WHERE range_id = ? AND worker = ? AND state = 'leased'",
+            (work.range_id, self.worker_id)
+        ).rowcount)
+
+    def release(self, work: WorkRange):
+        """구간을 끝내지 못하고 그만둘 때 (Ctrl+C 등) 바로 다른 worker 가 가져갈 수 있게 반납"""
+        self.conn.execute(
+            "UPDATE ranges SET state = 'pending', worker = NULL, lease_until = 0"
+            " WHERE range_id = ? AND worker = ? AND state = 'leased'", (work.range_id, self.worker_id)
+        )
+
+    def requeue(self) -> int:
+        """임대 중인 구간을 모두 대기 상태로 (worker 를 전부 내린 뒤 바로 다시 시작할 때)"""
+        return self.conn.execute(
+            "UPDATE ranges SET state = 'pending', worker = NULL, lease_until = 0 WHERE state = 'leased'"
+        ).rowcount
+
+    def finished(self) -> bool:
+        return self._meta("loaded") is not None and not self.conn.execute(
+            "SELECT 1 FROM ranges WHERE state != 'done' LIMIT 1").fetchone()
+
+    def claim_merge(self) -> bool:
+        """모든 구간이 끝났고 아직 아무도 merge 하지 않았으면 True (여러 worker 중 하나만)"""
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            claimed = self.finished() and self._meta("merged_by") is None
+            if claimed:
+                conn.execute("INSERT INTO meta (name, value) VALUES ('merged_by', ?)", (self.worker_id,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return claimed
+
+    def merge(self, output_path, indent=2) -> int:
+        """입력 순서대로 출력 파일 생성 (번역이 없는 키는 원문, 저장소에서 흘려 읽으며 바로 씀). 쓴 키 수를 반환"""
+        with JsonObjectWriter(output_path, indent=indent) as writer:
+            for key, source, translation in self.conn.execute(
+                    "SELECT key, source, translation FROM items ORDER BY seq"):
+                writer.write(key, json.loads(translation if translation is not None else source))
+        return writer.count
+
+    def stats(self) -> dict:
+        ranges = dict(self.conn.execute("SELECT state, COUNT(*) FROM ranges GROUP BY state").fetchall())
+        items, translated = self.conn.execute("SELECT COUNT(*), COUNT(translation) FROM items").fetchone()
+        reassigned = self.conn.execute("SELECT COALESCE(SUM(leases - 1), 0) FROM ranges WHERE leases > 1").fetchone()[0]
+        workers = self.conn.execute("SELECT COUNT(DISTINCT worker) FROM ranges WHERE worker IS NOT NULL").fetchone()[0]
+        return {
+            "items": items,
+            "translated": translated,
+            "ranges_pending": ranges.get("pending", 0),
+            "ranges_leased": ranges.get("leased", 0),
+            "ranges_done": ranges.get("done", 0),
+            "reassigned": reassigned,
+            "workers": workers,
+            "merged_by": self._meta("merged_by"),
+        }
+
+    def close(self):
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+
+    command, db_path = sys.argv[1], sys.argv[2]
+    store = WorkStore(db_path)
+    if command == "load" and len(sys.argv) >= 4:
+        from json_stream import iter_json_object
+
+        range_size = int(sys.argv[4]) if len(sys.argv) >= 5 else 200
+        if store.load(iter_json_object(sys.argv[3]), range_size):
+            print(f"📥 작업 저장소에 올림: {json.dumps(store.stats(), ensure_ascii=False)}")
+        else:
+            print("ℹ️ 이미 입력이 올라가 있음")
+    elif command == "stats":
+        print(json.dumps(store.stats(), ensure_ascii=False, indent=2))
+    elif command == "requeue":
+        print(f"↩️ 재배정 가능하게 돌린 구간: {store.requeue()}개")
+    elif command == "merge" and len(sys.argv) >= 4:
+        if not store.finished():
+            print(f"⚠️ 아직 끝나지 않은 구간이 있음 (번역 없는 키는 원문으로 씀): {json.dumps(store.stats(), ensure_ascii=False)}")
+        print(f"📦 {store.merge(sys.argv[3])}개 → {sys.argv[3]}")
+    else:
+        print(__doc__)
+        sys.exit(1)
+    store.close()